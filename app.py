@@ -1,12 +1,26 @@
 from enum import member
 from flask import Flask, request, jsonify
-import mysql.connector
 from dotenv import load_dotenv
 import os
 import logging
 import json 
+import threading
+import time
 from services.task_service import TaskService
 from services.reminder_service import ReminderService
+from services.webhook_queue import WebhookQueue
+from models.db_pool import get_pool, get_all_pool_stats
+from models.member_cache import get_member_cache
+from services.http_client import get_all_http_stats
+from services.free_translation_service import SUPPORTED_LANGUAGES, get_detection_stats
+from services.message_catalog import catalog
+from services.translation_cache import get_translation_cache
+from services.translation_providers import get_hedged_translator
+from services.outbound_sender import get_outbound_sender
+from services.webhook_batch import WebhookBatch
+from services.request_context import RequestContext
+from services.message_dedupe import MessageDeduplicator
+from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables
 load_dotenv()
@@ -29,19 +43,63 @@ DB_CONFIG = {
     'autocommit': True 
 }
 
+# Acknowledge webhooks immediately and process them on a worker pool
+WEBHOOK_ASYNC = os.getenv('WEBHOOK_ASYNC', 'false').lower() == 'true'
+
+# app.run(debug=True) starts the Werkzeug reloader: the first process only
+# watches files and runs this module again in a child (WERKZEUG_RUN_MAIN=true)
+# that serves requests. Background workers start in the serving process only.
+USE_RELOADER = os.getenv('FLASK_USE_RELOADER', 'true').lower() == 'true'
+SERVING_PROCESS = (
+    __name__ != '__main__' or not USE_RELOADER or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+)
+
+# Drop Meta redeliveries of messages we have already handled
+message_dedupe = MessageDeduplicator(
+    ttl_seconds=int(os.getenv('DEDUPE_TTL_SECONDS', 86400)),
+    max_entries=int(os.getenv('DEDUPE_MAX_ENTRIES', 100000)),
+    db_path=os.getenv('DEDUPE_DB_PATH') or None
+)
+
 def get_db_connection():
-    """Create and return MySQL database connection"""
+    """Check out a MySQL connection from the shared pool"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = get_pool(DB_CONFIG).get_connection()
         return connection
     except Exception as e:
         logger.error(f"Database connection error: {e}")
         return None
 
-# Initialize services
+# Initialize services (WhatsApp and language services are shared singletons)
 task_service = TaskService(DB_CONFIG)
 reminder_service = ReminderService(DB_CONFIG)
 
+def warm_up(check_data=False):
+    """Startup work that must not delay the first webhook"""
+    started = time.perf_counter()
+    
+    # Languages without a catalog silently get English messages; say so once
+    catalog.report_fallbacks(SUPPORTED_LANGUAGES)
+    
+    # Import the MySQL driver and open the pool before the first message needs it
+    connection = get_db_connection()
+    if connection:
+        connection.close()
+    
+    task_service.ensure_database_structure()
+    
+    if check_data:
+        # Check existing data instead of creating sample data
+        print("🔍 Checking existing data...")
+        check_existing_data()
+    
+    print(f"✅ Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+def start_warm_up(check_data=False):
+    thread = threading.Thread(target=warm_up, args=(check_data,), name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
 def check_existing_data():
     """Check what data already exists in the database"""
     from models.team_member import TeamMember
@@ -68,6 +126,223 @@ def check_existing_data():
 def home():
     return jsonify({"message": "Team Management WhatsApp Bot is running!"})
 
+def split_webhook_payload(data):
+    """Break a Meta webhook payload into (sender_key, event) pairs"""
+    events = []
+    
+    # Process every message of every change in every entry
+    for entry in data['entry']:
+        for change in entry.get('changes', []):
+            if change.get('field') == 'messages':
+                value = change.get('value', {})
+                
+                # Check if this is a message or a status update
+                if 'messages' in value:
+                    # This is an actual message from user
+                    messages = value.get('messages', [])
+                    contacts = value.get('contacts', [])
+                    contact_names = {
+                        contact.get('wa_id'): contact.get('profile', {}).get('name', '')
+                        for contact in contacts
+                    }
+                    
+                    for message in messages:
+                        if message_dedupe.is_duplicate(message.get('id')):
+                            logger.info(f"🔁 Dropping duplicate message {message.get('id')}")
+                            continue
+                        
+                        from_number = message.get('from', '')
+                        
+                        # Get contact name if available
+                        contact_name = contact_names.get(from_number)
+                        if contact_name is None:
+                            contact_name = contacts[0].get('profile', {}).get('name', '') if contacts else ''
+                        
+                        # Serialise all events from one sender onto the same lane
+                        sender_key = ''.join(c for c in from_number if c.isdigit()) or None
+                        events.append((sender_key, {
+                            'message': message,
+                            'contact_name': contact_name
+                        }))
+                
+                elif 'statuses' in value:
+                    # This is a status update for a message we sent (ignore to reduce logs)
+                    pass
+    
+    # Resolve every distinct sender of the batch with one lookup, shared by all events
+    batch = WebhookBatch(
+        task_service.team_member_model,
+        [event['message'].get('from', '').replace('whatsapp:', '') for _, event in events]
+    )
+    for _, event in events:
+        event['_batch'] = batch
+    
+    return events
+
+def process_webhook_event(event):
+    """Handle a single inbound message event"""
+    message = event['message']
+    contact_name = event.get('contact_name', '')
+    message_type = message.get('type')
+    from_number = message.get('from', '')
+    
+    # Get member info (batched per payload; replayed events have no batch)
+    clean_phone = from_number.replace('whatsapp:', '')
+    batch = event.get('_batch')
+    if batch:
+        member = batch.get_member(clean_phone)
+    else:
+        member = task_service.team_member_model.find_by_phone(clean_phone)
+    
+    # Member and preferences travel with the request so handlers don't look them up again
+    context = RequestContext(clean_phone, member)
+    
+    logger.info(f"📨 Message type: {message_type} from: {from_number} (Contact: {contact_name})")
+    
+    try:
+        if message_type == 'text':
+            incoming_msg = message.get('text', {}).get('body', '').strip()
+            logger.info(f"📝 Text message: {incoming_msg}")
+            
+            if incoming_msg.lower().startswith('join'):
+                logger.info(f"Join command received: {incoming_msg}")
+            else:
+                # Process text message
+                task_service.handle_message(f"whatsapp:{from_number}", incoming_msg, None, context=context)
+        
+        elif message_type == 'image':
+            # Get image information
+            image_data = message.get('image', {})
+            media_id = image_data.get('id', '')
+            caption = image_data.get('caption', '')
+            
+            logger.info(f"🖼️ Image message, Media ID: {media_id}, Caption: {caption}")
+            
+            # Process image upload with caption (if any)
+            task_service.handle_message(f"whatsapp:{from_number}", caption or "", media_id, context=context)
+        
+        elif message_type == 'interactive':
+            # Handle interactive messages
+            interactive_data = message.get('interactive', {})
+            interactive_type = interactive_data.get('type')
+            
+            if interactive_type == 'button_reply':
+                button_reply = interactive_data.get('button_reply', {})
+                if button_reply:
+                    button_id = button_reply.get('id', '')
+                    title = button_reply.get('title', '')
+                    logger.info(f"🔄 Button click: {button_id} - {title}")
+                    # Send the button title as the message
+                    task_service.handle_message(f"whatsapp:{from_number}", title, None, context=context)
+            
+            elif interactive_type == 'list_reply':
+                list_reply = interactive_data.get('list_reply', {})
+                if list_reply:
+                    list_id = list_reply.get('id', '')
+                    list_title = list_reply.get('title', '')
+                    list_description = list_reply.get('description', '')
+                    logger.info(f"📋 List selection: {list_id} - {list_title}")
+                    
+                    if member:
+                        # Handle settings menu selections
+                        if list_id == "property_info":
+                            # Show current property info
+                            task_service.show_current_property_info(member, f"whatsapp:{from_number}", 'en', context=context)
+                        elif list_id == "property_change":
+                            # Show property selection menu
+                            task_service.show_property_selection_menu(member, f"whatsapp:{from_number}", 'en')
+                        elif list_id == "back_main":
+                            # Return to main menu
+                            task_service.show_main_menu(member, f"whatsapp:{from_number}", 'en')
+                        elif list_id == "language_change":
+                            # Handle language change
+                            task_service.handle_language_change(member, f"whatsapp:{from_number}", 'en')
+                        elif list_id.startswith('lang_'):
+                            # Language selection
+                            if list_id == "lang_en":
+                                task_service.save_language_preference(f"whatsapp:{from_number}", 'en', 'English', context=context)
+                            elif list_id == "lang_hi":
+                                task_service.save_language_preference(f"whatsapp:{from_number}", 'hi', 'Hindi', context=context)
+                            elif list_id == "lang_es":
+                                task_service.save_language_preference(f"whatsapp:{from_number}", 'es', 'Spanish', context=context)
+                        elif list_id == "back_settings":
+                            # Return to settings
+                            task_service.show_settings_menu(member, f"whatsapp:{from_number}", 'en')
+                        elif list_id.startswith('property_'):
+                            # Property selection from property list
+                            property_id = list_id.replace('property_', '')
+                            logger.info(f"🎯 Property selected: ID={property_id}, Name={list_title}")
+                            task_service.handle_property_selection_result(f"whatsapp:{from_number}", property_id, list_title, context=context)
+                        else:
+                            # Send list title as regular message
+                            task_service.handle_message(f"whatsapp:{from_number}", list_title, None, context=context)
+                    else:
+                        logger.error(f"Member not found for {from_number}")
+                        # Fallback to regular message handling
+                        task_service.handle_message(f"whatsapp:{from_number}", list_title, None, context=context)
+        
+        else:
+            logger.info(f"⚠️ Unhandled message type: {message_type}")
+    
+    except Exception as e:
+        # Log error but don't crash - return 200 to Meta
+        logger.error(f"Error processing message: {e}")
+        import traceback
+        traceback.print_exc()
+
+def process_webhook_payload(data):
+    """Handle every message in a validated Meta webhook payload"""
+    process_webhook_events(split_webhook_payload(data))
+
+def process_webhook_events(events):
+    """Handle (sender_key, event) pairs already split (and deduplicated) from a payload"""
+    if not events:
+        return
+    
+    # Group by sender: each sender's messages run in order, senders run in parallel
+    lanes = {}
+    for sender_key, event in events:
+        lanes.setdefault(sender_key, []).append(event)
+    
+    if len(lanes) == 1:
+        for event in events:
+            process_webhook_event(event)
+        return
+    
+    # One lookup round trip for the whole batch before fanning out
+    events[0][1]['_batch'].resolve()
+    
+    def run_lane(lane_events):
+        for event in lane_events:
+            process_webhook_event(event)
+    
+    max_workers = min(len(lanes), int(os.getenv('WEBHOOK_WORKERS', 4)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(run_lane, lanes.values()))
+
+webhook_queue = WebhookQueue(
+    process_webhook_event,
+    splitter=split_webhook_payload,
+    num_workers=int(os.getenv('WEBHOOK_WORKERS', 4)),
+    max_size=int(os.getenv('WEBHOOK_QUEUE_SIZE', 1000)),
+    spool_path=os.getenv('WEBHOOK_SPOOL_PATH') or None,
+    lane_idle_timeout=int(os.getenv('WEBHOOK_LANE_IDLE_TIMEOUT', 300))
+)
+
+if WEBHOOK_ASYNC and SERVING_PROCESS:
+    webhook_queue.start()
+
+if os.getenv('MEDIA_PIPELINE_ENABLED', 'true').lower() == 'true' and SERVING_PROCESS:
+    task_service.upload_spool.start()
+    task_service.media_pipeline.start()
+    # Photos the backend already has are deleted after PROOF_RETENTION_SECONDS,
+    # unless a task_proofs row still names the local file
+    task_service.image_service.proof_store.start_gc(
+        task_service.upload_spool.reclaimable_hashes,
+        referenced=task_service.task_model.get_referenced_proof_files,
+        interval=int(os.getenv('PROOF_GC_INTERVAL', 3600))
+    )
+
 @app.route('/whatsapp/webhook', methods=['POST'])
 def whatsapp_webhook():
     try:
@@ -78,128 +353,18 @@ def whatsapp_webhook():
             logger.info("No valid message data in webhook")
             return '', 200
         
-        # Process each entry
-        for entry in data['entry']:
-            for change in entry.get('changes', []):
-                if change.get('field') == 'messages':
-                    value = change.get('value', {})
-                    
-                    # Check if this is a message or a status update
-                    if 'messages' in value:
-                        # This is an actual message from user
-                        messages = value.get('messages', [])
-                        contacts = value.get('contacts', [])
-                        
-                        if messages:
-                            message = messages[0]
-                            message_type = message.get('type')
-                            from_number = message.get('from', '')
-                            
-                            # Get contact name if available
-                            contact_name = contacts[0].get('profile', {}).get('name', '') if contacts else ''
-                            
-                            # Get member info
-                            clean_phone = from_number.replace('whatsapp:', '')
-                            member = task_service.team_member_model.find_by_phone(clean_phone)
-                            
-                            logger.info(f"📨 Message type: {message_type} from: {from_number} (Contact: {contact_name})")
-                            
-                            try:
-                                if message_type == 'text':
-                                    incoming_msg = message.get('text', {}).get('body', '').strip()
-                                    logger.info(f"📝 Text message: {incoming_msg}")
-                                    
-                                    if incoming_msg.lower().startswith('join'):
-                                        logger.info(f"Join command received: {incoming_msg}")
-                                    else:
-                                        # Process text message
-                                        task_service.handle_message(f"whatsapp:{from_number}", incoming_msg, None)
-                                
-                                elif message_type == 'image':
-                                    # Get image information
-                                    image_data = message.get('image', {})
-                                    media_id = image_data.get('id', '')
-                                    caption = image_data.get('caption', '')
-                                    
-                                    logger.info(f"🖼️ Image message, Media ID: {media_id}, Caption: {caption}")
-                                    
-                                    # Process image upload with caption (if any)
-                                    task_service.handle_message(f"whatsapp:{from_number}", caption or "", media_id)
-                                
-                                elif message_type == 'interactive':
-                                    # Handle interactive messages
-                                    interactive_data = message.get('interactive', {})
-                                    interactive_type = interactive_data.get('type')
-                                    
-                                    if interactive_type == 'button_reply':
-                                        button_reply = interactive_data.get('button_reply', {})
-                                        if button_reply:
-                                            button_id = button_reply.get('id', '')
-                                            title = button_reply.get('title', '')
-                                            logger.info(f"🔄 Button click: {button_id} - {title}")
-                                            # Send the button title as the message
-                                            task_service.handle_message(f"whatsapp:{from_number}", title, None)
-                                    
-                                    elif interactive_type == 'list_reply':
-                                        list_reply = interactive_data.get('list_reply', {})
-                                        if list_reply:
-                                            list_id = list_reply.get('id', '')
-                                            list_title = list_reply.get('title', '')
-                                            list_description = list_reply.get('description', '')
-                                            logger.info(f"📋 List selection: {list_id} - {list_title}")
-                                            
-                                            if member:
-                                                # Handle settings menu selections
-                                                if list_id == "property_info":
-                                                    # Show current property info
-                                                    task_service.show_current_property_info(member, f"whatsapp:{from_number}", 'en')
-                                                elif list_id == "property_change":
-                                                    # Show property selection menu
-                                                    task_service.show_property_selection_menu(member, f"whatsapp:{from_number}", 'en')
-                                                elif list_id == "back_main":
-                                                    # Return to main menu
-                                                    task_service.show_main_menu(member, f"whatsapp:{from_number}", 'en')
-                                                elif list_id == "language_change":
-                                                    # Handle language change
-                                                    task_service.handle_language_change(member, f"whatsapp:{from_number}", 'en')
-                                                elif list_id.startswith('lang_'):
-                                                    # Language selection
-                                                    if list_id == "lang_en":
-                                                        task_service.save_language_preference(f"whatsapp:{from_number}", 'en', 'English')
-                                                    elif list_id == "lang_hi":
-                                                        task_service.save_language_preference(f"whatsapp:{from_number}", 'hi', 'Hindi')
-                                                    elif list_id == "lang_es":
-                                                        task_service.save_language_preference(f"whatsapp:{from_number}", 'es', 'Spanish')
-                                                elif list_id == "back_settings":
-                                                    # Return to settings
-                                                    task_service.show_settings_menu(member, f"whatsapp:{from_number}", 'en')
-                                                elif list_id.startswith('property_'):
-                                                    # Property selection from property list
-                                                    property_id = list_id.replace('property_', '')
-                                                    logger.info(f"🎯 Property selected: ID={property_id}, Name={list_title}")
-                                                    task_service.handle_property_selection_result(f"whatsapp:{from_number}", property_id, list_title)
-                                                else:
-                                                    # Send list title as regular message
-                                                    task_service.handle_message(f"whatsapp:{from_number}", list_title, None)
-                                            else:
-                                                logger.error(f"Member not found for {from_number}")
-                                                # Fallback to regular message handling
-                                                task_service.handle_message(f"whatsapp:{from_number}", list_title, None)
-                                
-                                else:
-                                    logger.info(f"⚠️ Unhandled message type: {message_type}")
-                            
-                            except Exception as e:
-                                # Log error but don't crash - return 200 to Meta
-                                logger.error(f"Error processing message: {e}")
-                                import traceback
-                                traceback.print_exc()
-                                return '', 200  # IMPORTANT: Return 200 even on error
-                    
-                    elif 'statuses' in value:
-                        # This is a status update for a message we sent (ignore to reduce logs)
-                        pass
+        if WEBHOOK_ASYNC:
+            # Split once: message ids are marked as seen while splitting, so the
+            # inline fallback must reuse these events rather than re-split
+            events = split_webhook_payload(data)
+            # Acknowledge immediately, the worker pool does the processing
+            rejected = webhook_queue.enqueue_events(events)
+            if rejected:
+                logger.warning(f"⚠️ Webhook queue full, processing {len(rejected)} events inline")
+                process_webhook_events(rejected)
+            return '', 200
         
+        process_webhook_payload(data)
         return '', 200
 
     except Exception as e:
@@ -236,12 +401,63 @@ def debug_info():
     
     member = team_member_model.find_by_phone('7667130178')
     
+    connection = get_db_connection()
+    if connection:
+        connection.close()
+    
     return jsonify({
         "status": "running",
         "member_exists": bool(member),
         "member_details": member if member else None,
-        "database_connected": bool(get_db_connection())
+        "database_connected": bool(connection)
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Runtime metrics for sizing the worker pools"""
+    return jsonify({
+        "webhook_queue": webhook_queue.get_stats(),
+        "message_dedupe": message_dedupe.get_stats(),
+        "db_pools": get_all_pool_stats(),
+        "member_cache": get_member_cache().get_stats(),
+        "member_prefilter": task_service.team_member_model.prefilter.get_stats()
+        if task_service.team_member_model.prefilter else None,
+        "no_access_replies": task_service.no_access_replies.get_stats(),
+        "http_clients": get_all_http_stats(),
+        "outbound": get_outbound_sender().get_stats(),
+        "language_detection": get_detection_stats(),
+        "message_catalog": catalog.get_stats(SUPPORTED_LANGUAGES),
+        "translation_cache": get_translation_cache().get_stats(),
+        "translation_providers": get_hedged_translator().get_stats(),
+        "media_pipeline": task_service.media_pipeline.get_stats(),
+        "upload_spool": task_service.upload_spool.get_stats(),
+        "proof_store": task_service.image_service.proof_store.get_stats()
+    })
+
+@app.route('/upload-spool', methods=['GET'])
+def upload_spool_entries():
+    """Spooled photo uploads, optionally filtered with ?status=pending|failed|uploaded"""
+    spool = task_service.upload_spool
+    spool.open()
+    return jsonify({
+        "stats": spool.get_stats(),
+        "entries": spool.list_entries(
+            status=request.args.get('status'),
+            limit=request.args.get('limit', 50, type=int)
+        )
     })
+
+@app.route('/upload-spool/drain', methods=['POST'])
+def drain_upload_spool():
+    """Retry every pending upload now; ?failed=true also retries the ones that gave up"""
+    try:
+        spool = task_service.upload_spool
+        spool.open()
+        result = spool.drain(include_failed=request.args.get('failed', 'false').lower() == 'true')
+        return jsonify({"status": "success", **result})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @app.route('/send-test-reminder/<int:task_id>', methods=['POST'])
 def send_test_reminder(task_id):
     """Endpoint to test reminder for a specific task"""
@@ -258,8 +474,8 @@ def send_test_reminder(task_id):
 def test_whatsapp(phone_number):
     """Test endpoint to send a WhatsApp message"""
     try:
-        from services.whatsapp_service import WhatsAppService
-        whatsapp_service = WhatsAppService()
+        from services.whatsapp_service import get_whatsapp_service
+        whatsapp_service = get_whatsapp_service()
         
         test_message = "🔔 Test message from your Team Management Bot\n\nThis is a test to verify WhatsApp messaging is working."
         
@@ -280,21 +496,27 @@ def test_whatsapp(phone_number):
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# Runs under any WSGI server too; the data check only when started directly
+warm_up_thread = start_warm_up(check_data=__name__ == '__main__') if SERVING_PROCESS else None
+
 if __name__ == '__main__':
-    # Check existing data instead of creating sample data
-    print("🔍 Checking existing data...")
-    check_existing_data()
-    
     # Start the reminder scheduler
-    print("🔔 Starting reminder scheduler...")
-    reminder_service.start_reminder_scheduler()
+    if SERVING_PROCESS:
+        print("🔔 Starting reminder scheduler...")
+        reminder_service.start_reminder_scheduler()
     
     # Run the application
     port = int(os.getenv('PORT', 7000))
     logger.info(f"Starting Flask app on port {port}")
     
     try:
-        app.run(host='0.0.0.0', port=port, debug=True)
+        app.run(host='0.0.0.0', port=port, debug=True, use_reloader=USE_RELOADER)
     except KeyboardInterrupt:
         print("\n🛑 Shutting down...")
-        reminder_service.stop_reminder_scheduler()
\ No newline at end of file
+        reminder_service.stop_reminder_scheduler()
+        webhook_queue.stop()
+        task_service.media_pipeline.stop()
+        task_service.upload_spool.stop()
+        task_service.image_service.proof_store.stop_gc()
+        get_outbound_sender().stop()
+        get_hedged_translator().shutdown()
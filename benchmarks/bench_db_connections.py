@@ -0,0 +1,79 @@
+"""Physical MySQL connections per inbound message, unpooled vs pooled.
+
+Replays the model calls a "📋 Tasks" tap makes (member lookup, preference
+lookup, task list, a status update with its activity log) against the
+database configured in .env, once with pooling disabled (the old
+connect-per-call behaviour) and once with the shared pool.
+
+    BENCH_PHONE=917667130178 python -m benchmarks.bench_db_connections --messages 50
+"""
+import argparse
+import os
+import time
+
+from dotenv import load_dotenv
+
+from models.db_pool import ConnectionPool
+import models.db_pool as db_pool
+from models.task import Task
+from models.team_member import TeamMember
+
+
+def simulate_message(team_member_model, task_model, phone):
+    member = team_member_model.find_by_phone(phone)
+    if not member:
+        raise SystemExit(f"No active team member for {phone}")
+    team_member_model.find_by_phone(phone)  # preferences lookup
+    tasks = task_model.get_tasks_by_user(member['id'])
+    if tasks:
+        task = tasks[0]
+        task_model.update_task_status(task['id'], task['status'], member['id'])
+
+
+def run(db_config, pool_size, messages, phone):
+    pool = ConnectionPool(db_config, size=pool_size, name=f"bench_pool_{pool_size}")
+    db_pool._pools.clear()
+    db_pool._pools[tuple(sorted((k, str(v)) for k, v in db_config.items()))] = pool
+
+    team_member_model = TeamMember(db_config)
+    task_model = Task(db_config)
+
+    started = time.perf_counter()
+    for _ in range(messages):
+        simulate_message(team_member_model, task_model, phone)
+    elapsed = time.perf_counter() - started
+
+    stats = pool.get_stats()
+    return elapsed, stats
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--pool-size', type=int, default=5)
+    parser.add_argument('--phone', default=os.getenv('BENCH_PHONE', '7667130178'))
+    args = parser.parse_args()
+
+    db_config = {
+        'host': os.getenv('DB_HOST'),
+        'port': int(os.getenv('DB_PORT', 3306)),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+        'database': os.getenv('DB_NAME'),
+        'charset': 'utf8mb4',
+        'buffered': True,
+        'autocommit': True
+    }
+
+    print(f"{'mode':>10} {'connects/msg':>13} {'checkouts/msg':>14} {'ms/msg':>8} {'p99 wait ms':>12}")
+    for label, size in (('unpooled', 0), ('pooled', args.pool_size)):
+        elapsed, stats = run(db_config, size, args.messages, args.phone)
+        counters = stats['counters']
+        print(f"{label:>10} {counters['connects'] / args.messages:>13.2f} "
+              f"{counters['checkouts'] / args.messages:>14.2f} "
+              f"{elapsed * 1000 / args.messages:>8.1f} {stats['wait_time']['p99_ms']:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Per-request latency of one-off requests.get vs the pooled HttpClient.
+
+By default it talks to a throwaway local HTTP/1.1 server and counts how many
+TCP connections each mode opened. Point ``--url`` at a real HTTPS endpoint
+(e.g. https://graph.facebook.com/) to see the TLS handshake savings.
+
+    python -m benchmarks.bench_http_keepalive --requests 200
+"""
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from services.http_client import HttpClient
+from utils.metrics import LatencyStats
+
+connections_opened = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        global connections_opened
+        connections_opened += 1
+        super().setup()
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(fetch, count):
+    stats = LatencyStats(window=count)
+    for _ in range(count):
+        with stats.time():
+            fetch()
+    return stats.snapshot()
+
+
+def main():
+    global connections_opened
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--url', default=None)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    client = HttpClient('bench')
+    modes = [
+        ('requests.get', lambda: requests.get(url, timeout=10)),
+        ('HttpClient', lambda: client.get(url, endpoint='bench')),
+    ]
+
+    print(f"{'mode':>14} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'conns':>6}")
+    for label, fetch in modes:
+        connections_opened = 0
+        fetch()  # warm up DNS / the pool
+        started_conns = connections_opened
+        snapshot = measure(fetch, args.requests)
+        conns = connections_opened - started_conns if server else '-'
+        print(f"{label:>14} {snapshot['p50_ms']:>8.2f} {snapshot['p99_ms']:>8.2f} "
+              f"{snapshot['mean_ms']:>8.2f} {conns:>6}")
+
+    client.close()
+    if server:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
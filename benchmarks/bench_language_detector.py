@@ -0,0 +1,116 @@
+"""Speed and accuracy of the compiled detector vs the old keyword loops.
+
+``legacy`` is the former FreeTranslationService._keyword_detection followed
+by _character_based_detection (without the GoogleTranslator network call).
+Samples are the kind of messages workers actually send the bot; ``None``
+means no local guess is expected (the caller falls back to English).
+
+    python -m benchmarks.bench_language_detector --iterations 2000
+"""
+import argparse
+import time
+
+from services.language_detector import LANGUAGE_KEYWORDS, LanguageDetector
+
+SAMPLES = [
+    ("tasks", None),
+    ("status 1 completed", None),
+    ("📋 Tasks", None),
+    ("⚙️ Settings", None),
+    ("pending photos", None),
+    ("now done, photo sent", None),
+    ("I finished the room, no issues", None),
+    ("Is the pool cleaning done today?", None),
+    ("help", None),
+    ("recurring", None),
+    ("hola, ya terminé la limpieza", 'es'),
+    ("gracias", 'es'),
+    ("buenos días, ¿cómo estás?", 'es'),
+    ("merci, c'est fait", 'fr'),
+    ("bonjour madame", 'fr'),
+    ("danke, alles erledigt", 'de'),
+    ("ciao, grazie mille", 'it'),
+    ("obrigado, bom dia", 'pt'),
+    ("नमस्ते", 'hi'),
+    ("काम हो गया है", 'hi'),
+    ("मेरे कार्य क्या हैं", 'hi'),
+    ("धन्यवाद", 'hi'),
+    ("मी काम केले आहे", 'mr'),
+    ("வணக்கம், வேலை முடிந்தது", 'ta'),
+    ("నమస్కారం", 'te'),
+    ("ನಮಸ್ಕಾರ, ಕೆಲಸ ಮುಗಿದಿದೆ", 'kn'),
+    ("നന്ദി", 'ml'),
+    ("ধন্যবাদ, কাজ শেষ", 'bn'),
+    ("આભાર, કામ પૂરું થયું", 'gu'),
+    ("ਧੰਨਵਾਦ ਜੀ", 'pa'),
+    ("شکریہ، کام ہو گیا", 'ur'),
+    ("شكرا، تم العمل", 'ar'),
+    ("спасибо, всё готово", 'ru'),
+    ("ありがとう、終わりました", 'ja'),
+    ("감사합니다", 'ko'),
+    ("谢谢，做完了", 'zh'),
+]
+
+
+def legacy_detect(text):
+    text_lower = text.lower().strip()
+    for lang_code, keywords in LANGUAGE_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in text_lower:
+                return lang_code
+    if any('ऀ' <= char <= 'ॿ' for char in text):
+        return 'hi'
+    if any('؀' <= char <= 'ۿ' for char in text):
+        return 'ar'
+    if any('一' <= char <= '鿿' for char in text):
+        return 'zh'
+    if any('぀' <= char <= 'ゟ' for char in text):
+        return 'ja'
+    if any('゠' <= char <= 'ヿ' for char in text):
+        return 'ja'
+    if any('가' <= char <= '힯' for char in text):
+        return 'ko'
+    if any('Ѐ' <= char <= 'ӿ' for char in text):
+        return 'ru'
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--min-confidence', type=float, default=0.6)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    detector = LanguageDetector()
+
+    def compiled_detect(text):
+        detection = detector.detect(text)
+        return detection.language if detection.confidence >= args.min_confidence else None
+
+    groups = {
+        'english': [text for text, expected in SAMPLES if expected is None],
+        'other': [text for text, expected in SAMPLES if expected is not None],
+    }
+
+    print(f"{'detector':>9} {'accuracy':>9} {'us/msg english':>15} {'us/msg other':>13}")
+    for label, detect in (('legacy', legacy_detect), ('compiled', compiled_detect)):
+        correct = 0
+        for text, expected in SAMPLES:
+            got = detect(text)
+            correct += got == expected
+            if args.verbose and got != expected:
+                print(f"   {label}: {text!r} -> {got} (expected {expected})")
+
+        timings = []
+        for texts in groups.values():
+            started = time.perf_counter()
+            for _ in range(args.iterations):
+                for text in texts:
+                    detect(text)
+            timings.append((time.perf_counter() - started) / (args.iterations * len(texts)) * 1e6)
+        print(f"{label:>9} {correct / len(SAMPLES):>8.0%} {timings[0]:>15.1f} {timings[1]:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Peak RSS while downloading a burst of photos: whole-body vs streamed to disk.
+
+A local HTTP server plays the Graph API (media info + media download) and
+serves --size-mb of random bytes. --concurrency threads each download one
+photo through ImageService.download_meta_media ("streaming") or the former
+download_response.content write ("buffered"). Each mode runs in its own
+interpreter so ru_maxrss is not shared between them.
+
+    python -m benchmarks.bench_media_download --concurrency 50 --size-mb 8
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def start_server(size):
+    payload = os.urandom(size)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/file'):
+                body, content_type = payload, 'image/jpeg'
+            else:
+                port = self.server.server_address[1]
+                body = json.dumps({
+                    "url": f"http://127.0.0.1:{port}/file", "mime_type": "image/jpeg", "file_size": size
+                }).encode()
+                content_type = 'application/json'
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, payload
+
+
+def buffered_download(service, media_id, task_id):
+    """The old download_meta_media body: whole response in memory, then one write"""
+    headers = {"Authorization": f"Bearer {service.meta_access_token}"}
+    info = service.graph_http.get(f"{service.graph_api_base}/{service.api_version}/{media_id}", headers=headers).json()
+    response = service.graph_http.get(info["url"], headers=headers)
+    filepath = os.path.join(service.image_storage_path, f"task_{task_id}_{media_id}.jpg")
+    with open(filepath, "wb") as f:
+        f.write(response.content)
+    return filepath
+
+
+def child(mode, concurrency, size):
+    # Serve from this process: a burst of whole bodies would otherwise show
+    # only in the server's memory. The payload is allocated before the baseline.
+    server, _ = start_server(size)
+    os.environ["META_GRAPH_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["MEDIA_MAX_BYTES"] = str(size * 2)
+
+    from services.image_service import ImageService
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        service = ImageService()
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        def download(i):
+            if mode == 'buffered':
+                return buffered_download(service, f"media{i}", i)
+            return service.download_meta_media(f"media{i}", i, 1)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            paths = list(pool.map(download, range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        ok = sum(1 for path in paths if path and os.path.getsize(path) == size)
+    server.shutdown()
+    print(json.dumps({"peak_delta_kb": peak - baseline, "elapsed": elapsed, "ok": ok}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--size-mb', type=float, default=8)
+    parser.add_argument('--child', choices=['buffered', 'streaming'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+
+    if args.child:
+        child(args.child, args.concurrency, size)
+        return
+
+    print(f"{args.concurrency} concurrent downloads of {args.size_mb:g} MB")
+    print(f"{'mode':>10} {'peak RSS +MB':>13} {'seconds':>8} {'ok':>4}")
+    for mode in ('buffered', 'streaming'):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_media_download', '--child', mode,
+             '--concurrency', str(args.concurrency), '--size-mb', str(args.size_mb)],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>10} {result['peak_delta_kb'] / 1024:>13.0f} {result['elapsed']:>8.2f} {result['ok']:>4}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Peak RSS and throughput of photo uploads: in-memory multipart vs streamed.
+
+A local HTTP server plays the backend's PUT /team/active-tasks/<id> and
+discards the body as it arrives. --concurrency threads each upload one
+--size-mb photo through ImageService.upload_to_backend ("streaming") or
+the former f.read() + files= request ("buffered"). Each mode runs in its
+own interpreter so ru_maxrss is not shared. The streamed body is also
+parsed once to check the file bytes, mime type and Content-Length.
+
+    python -m benchmarks.bench_media_upload --concurrency 20 --size-mb 8
+"""
+import argparse
+import email.parser
+import email.policy
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def start_server(keep_bodies=False):
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_PUT(self):
+            length = int(self.headers['Content-Length'])
+            chunks, remaining = [], length
+            while remaining:
+                chunk = self.rfile.read(min(remaining, 256 * 1024))
+                remaining -= len(chunk)
+                if keep_bodies:
+                    chunks.append(chunk)
+            if keep_bodies:
+                received.append((self.headers['Content-Type'], b''.join(chunks)))
+            body = b'{"success": true, "data": {}}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+
+def buffered_upload(service, image_path, task_id, client_id):
+    """The old upload_to_backend request: whole file read, requests builds the body"""
+    with open(image_path, "rb") as f:
+        image_data = f.read()
+    files = {"task_completion_images": (os.path.basename(image_path), image_data, "image/jpeg")}
+    headers = {"Authorization": f"Bearer {service.api_auth_token}", "Client-ID": str(client_id)}
+    response = service.backend_http.put(
+        f"{service.backend_api_url}/team/active-tasks/{task_id}",
+        files=files, headers=headers, data={"status": "completed"},
+    )
+    return response.status_code == 200
+
+
+def verify(service, image_path, received):
+    """Upload once and parse what the server got"""
+    assert service.upload_to_backend(image_path, 1, 1)
+    content_type, body = received[-1]
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    parts = {part.get_param('name', header='content-disposition'): part for part in message.iter_parts()}
+    with open(image_path, 'rb') as f:
+        assert parts['task_completion_images'].get_payload(decode=True) == f.read()
+    assert parts['task_completion_images'].get_content_type() == 'image/png'
+    assert parts['status'].get_payload() == 'completed'
+
+
+def child(mode, concurrency, size):
+    server, received = start_server(keep_bodies=mode == 'verify')
+    os.environ["BACKEND_API_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from services.image_service import ImageService
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        service = ImageService()
+        paths = []
+        for i in range(concurrency):
+            path = os.path.join(directory, f"task_{i}.png")
+            with open(path, 'wb') as f:
+                f.write(os.urandom(size))
+            paths.append(path)
+
+        if mode == 'verify':
+            verify(service, paths[0], received)
+            print(json.dumps({"verified": True}))
+            return
+
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        def upload(i):
+            if mode == 'buffered':
+                return buffered_upload(service, paths[i], i, 1)
+            return service.upload_to_backend(paths[i], i, 1) is not None
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            ok = sum(pool.map(upload, range(concurrency)))
+        elapsed = time.perf_counter() - started
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    server.shutdown()
+    print(json.dumps({"peak_delta_kb": peak - baseline, "elapsed": elapsed, "ok": ok}))
+
+
+def run_child(mode, args):
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_media_upload', '--child', mode,
+         '--concurrency', str(args.concurrency), '--size-mb', str(args.size_mb)],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--size-mb', type=float, default=8)
+    parser.add_argument('--child', choices=['buffered', 'streaming', 'verify'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+
+    if args.child:
+        child(args.child, args.concurrency, size)
+        return
+
+    run_child('verify', args)
+    print(f"✅ streamed body parses back to the same file, mime type and fields")
+    print(f"{args.concurrency} concurrent uploads of {args.size_mb:g} MB")
+    print(f"{'mode':>10} {'peak RSS +MB':>13} {'MB/s':>8} {'ok':>4}")
+    for mode in ('buffered', 'streaming'):
+        result = run_child(mode, args)
+        throughput = args.concurrency * args.size_mb / result['elapsed']
+        print(f"{mode:>10} {result['peak_delta_kb'] / 1024:>13.0f} {throughput:>8.0f} {result['ok']:>4}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Messages rendered per second: per-call dict literal vs the loaded catalog.
+
+The "inline" mode rebuilds the nested {language: {key: text}} dict on every
+lookup, the way WhatsAppService._get_translated_message used to.
+
+    python -m benchmarks.bench_message_catalog --iterations 200000
+"""
+import argparse
+import json
+import os
+import time
+
+from services.message_catalog import CATALOG_DIR, MessageCatalog
+
+KEYS = [('welcome', ('Asha',)), ('task_list_header', (3,)), ('status', ()), ('invalid_task', ())]
+LANGUAGES = ['en', 'hi', 'es', 'fr']
+
+
+def inline_lookup_factory():
+    # Compile a function whose body is one big dict literal, like the old code
+    raw = {}
+    for filename in os.listdir(CATALOG_DIR):
+        with open(os.path.join(CATALOG_DIR, filename), encoding='utf-8') as f:
+            raw[filename[:-len('.json')]] = json.load(f)
+    source = (
+        "def lookup(key, language):\n"
+        f"    messages = {raw!r}\n"
+        "    if language not in messages:\n"
+        "        language = 'en'\n"
+        "    return messages[language].get(key, messages['en'].get(key, ''))\n"
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace['lookup']
+
+
+def run(render, iterations):
+    started = time.perf_counter()
+    for i in range(iterations):
+        key, args = KEYS[i % len(KEYS)]
+        render(key, LANGUAGES[i % len(LANGUAGES)], args)
+    return iterations / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200000)
+    args = parser.parse_args()
+
+    lookup = inline_lookup_factory()
+    catalog = MessageCatalog()
+
+    def inline(key, language, fields):
+        text = lookup(key, language)
+        return text.format(*fields) if fields else text
+
+    def catalogued(key, language, fields):
+        return catalog.format(key, language, *fields)
+
+    baseline = run(inline, args.iterations)
+    loaded = run(catalogued, args.iterations)
+    print(f"{'mode':>10} {'msgs/s':>12} {'speedup':>8}")
+    print(f"{'inline':>10} {baseline:>12,.0f} {1:>7.1f}x")
+    print(f"{'catalog':>10} {loaded:>12,.0f} {loaded / baseline:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
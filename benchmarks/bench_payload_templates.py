@@ -0,0 +1,75 @@
+"""Per-send cost of building an interactive payload: dicts + json vs template.
+
+Uses the welcome buttons and the settings list exactly as the bot sends them.
+
+    python -m benchmarks.bench_payload_templates --iterations 50000
+"""
+import argparse
+import json
+import time
+
+from services.payload_templates import BUTTONS, LIST, TemplateRegistry, interactive_payload
+
+WELCOME_BUTTONS = [
+    {"type": "reply", "reply": {"id": "btn_tasks", "title": "📋 Tasks"}},
+    {"type": "reply", "reply": {"id": "btn_photos", "title": "📷 Photos"}},
+    {"type": "reply", "reply": {"id": "btn_settings", "title": "⚙️ Settings"}},
+]
+
+SETTINGS_SECTIONS = [
+    {"title": "Property Settings", "rows": [
+        {"id": "property_change", "title": "🏠 Change Property", "description": "Select which property you're working on"},
+        {"id": "property_info", "title": "📋 View Property Info", "description": "See details of your current property"},
+    ]},
+    {"title": "Account Settings", "rows": [
+        {"id": "language_change", "title": "🌐 Change Language", "description": "Set your preferred language"},
+    ]},
+    {"title": "Other", "rows": [
+        {"id": "back_main", "title": "⬅️ Main Menu", "description": "Return to the main menu"},
+    ]},
+]
+
+CASES = {
+    'welcome_buttons': (BUTTONS, lambda: {"buttons": [dict(b, reply=dict(b["reply"])) for b in WELCOME_BUTTONS]}),
+    'settings_list': (LIST, lambda: {"button": "Select an option", "sections": [
+        {"title": s["title"], "rows": [dict(r) for r in s["rows"]]} for s in SETTINGS_SECTIONS
+    ]}),
+}
+
+
+def per_call_us(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50000)
+    args = parser.parse_args()
+
+    registry = TemplateRegistry()
+    body = "⚙️ *Settings*\n\nPlease select an option from the list below:"
+
+    print(f"{'payload':>16} {'dicts+json us':>14} {'template us':>12} {'speedup':>8}")
+    for name, (kind, action) in CASES.items():
+        registry.register(name, kind, lambda language, action=action: action())
+
+        def build():
+            payload = interactive_payload(kind, action())
+            payload["to"] = "919876543210"
+            payload["interactive"]["body"]["text"] = body
+            return json.dumps(payload).encode('utf-8')
+
+        def render():
+            return registry.render(name, 'en', to="919876543210", body=body)
+
+        assert json.loads(build()) == json.loads(render())
+        built = per_call_us(build, args.iterations)
+        rendered = per_call_us(render, args.iterations)
+        print(f"{name:>16} {built:>14.2f} {rendered:>12.2f} {built / rendered:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Phone lookup cost on a 100k-member table: format sweep vs phone_key.
+
+Builds a scratch copy of team_members (bench_team_members) with mixed phone
+formats, adds the phone_key column and index from
+migrations/001_team_members_phone_key.sql, then times the legacy
+multi-format lookup (including the LIKE fallback for unknown numbers)
+against the single indexed equality lookup.
+
+    python -m benchmarks.bench_phone_lookup --members 100000 --lookups 500
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from models.team_member import TeamMember
+from utils.helpers import normalize_phone_key
+
+TABLE = "bench_team_members"
+
+
+def build_table(cursor, members):
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(f"""
+        CREATE TABLE {TABLE} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            client_id INT NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            phone VARCHAR(20) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'active',
+            INDEX idx_phone (phone)
+        )
+    """)
+    formats = [
+        lambda d: f"91{d}",
+        lambda d: f"+91{d}",
+        lambda d: d,
+        lambda d: f"+91 {d[:5]} {d[5:]}",
+        lambda d: f"0{d}",
+    ]
+    rows = []
+    for i in range(members):
+        digits = f"{7000000000 + i}"
+        rows.append((i % 50 + 1, f"Member {i}", random.choice(formats)(digits)))
+        if len(rows) == 5000:
+            cursor.executemany(f"INSERT INTO {TABLE} (client_id, name, phone) VALUES (%s, %s, %s)", rows)
+            rows = []
+    if rows:
+        cursor.executemany(f"INSERT INTO {TABLE} (client_id, name, phone) VALUES (%s, %s, %s)", rows)
+
+    with open(os.path.join(os.path.dirname(__file__), '..', 'migrations',
+                           '001_team_members_phone_key.sql')) as f:
+        migration = ''.join(line for line in f if not line.startswith('--'))
+    cursor.execute(migration.replace('team_members', TABLE))
+
+
+def legacy_lookup(cursor, phone):
+    model = TeamMember({})
+    formats = model.get_possible_phone_formats(phone)
+    for fmt in formats:
+        cursor.execute(f"SELECT * FROM {TABLE} WHERE phone = %s AND status = 'active'", (fmt,))
+        row = cursor.fetchone()
+        if row:
+            return row, 1 + formats.index(fmt)
+    queries = len(formats)
+    for fmt in formats:
+        digits = model.clean_phone_number(fmt)
+        if len(digits) >= 10:
+            cursor.execute(f"SELECT * FROM {TABLE} WHERE phone LIKE %s AND status = 'active'",
+                           (f"%{digits[-10:]}",))
+            queries += 1
+            row = cursor.fetchone()
+            if row:
+                return row, queries
+    return None, queries
+
+
+def keyed_lookup(cursor, phone):
+    cursor.execute(
+        f"SELECT id, client_id, name, phone, status FROM {TABLE} "
+        f"WHERE phone_key = %s AND status = 'active' LIMIT 1",
+        (normalize_phone_key(phone),)
+    )
+    return cursor.fetchone(), 1
+
+
+def time_lookups(cursor, lookup, phones):
+    queries = 0
+    started = time.perf_counter()
+    for phone in phones:
+        _, count = lookup(cursor, phone)
+        queries += count
+    elapsed = time.perf_counter() - started
+    return elapsed * 1000 / len(phones), queries / len(phones)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--members', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=500)
+    parser.add_argument('--keep', action='store_true', help="keep the scratch table")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        host=os.getenv('DB_HOST'), port=int(os.getenv('DB_PORT', 3306)),
+        user=os.getenv('DB_USER'), password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME'), autocommit=True, buffered=True
+    )
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        build_table(cursor, args.members)
+        known = [f"91{7000000000 + random.randrange(args.members)}" for _ in range(args.lookups)]
+        unknown = [f"91{6000000000 + i}" for i in range(max(1, args.lookups // 10))]
+
+        results = []
+        for label, phones in (('registered', known), ('unregistered', unknown)):
+            for name, lookup in (('format sweep', legacy_lookup), ('phone_key', keyed_lookup)):
+                # The legacy path prints every format it tries
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ms, queries = time_lookups(cursor, lookup, phones)
+                results.append((label, name, ms, queries))
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.close()
+        conn.close()
+
+    print(f"{'sender':>13} {'method':>13} {'ms/lookup':>10} {'queries/lookup':>15}")
+    for label, name, ms, queries in results:
+        print(f"{label:>13} {name:>13} {ms:>10.2f} {queries:>15.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Disk and upload bytes for a stream of task photos with resends: per-message files vs content-addressed.
+
+A local HTTP server plays the Graph API. --photos messages arrive for
+--tasks tasks; a --resend-rate share of them repeats an earlier photo of
+the same task. Each message goes through ImageService.download_meta_media
+and UploadSpool.submit with an uploader that only counts bytes. The
+per-message layout (task_<id>_<timestamp> files, every message uploaded)
+is what the old code stored and sent for the same stream.
+
+    python -m benchmarks.bench_proof_store --photos 500 --resend-rate 0.3
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def start_server(payloads):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            port = self.server.server_address[1]
+            if self.path.startswith('/file/'):
+                body, content_type = payloads[self.path.rsplit('/', 1)[1]], 'image/jpeg'
+            else:
+                media_id = self.path.rsplit('/', 1)[1]
+                body = json.dumps({
+                    "url": f"http://127.0.0.1:{port}/file/{media_id}", "mime_type": "image/jpeg"
+                }).encode()
+                content_type = 'application/json'
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def disk_bytes(root):
+    return sum(os.path.getsize(os.path.join(directory, name))
+               for directory, _, names in os.walk(root) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--photos', type=int, default=500)
+    parser.add_argument('--tasks', type=int, default=100)
+    parser.add_argument('--resend-rate', type=float, default=0.3)
+    parser.add_argument('--size-kb', type=int, default=256)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    # Message i carries either a new photo or an earlier one of the same task
+    payloads, messages, sent = {}, [], {}
+    for i in range(args.photos):
+        task_id = rng.randrange(args.tasks)
+        if sent.get(task_id) and rng.random() < args.resend_rate:
+            payload = rng.choice(sent[task_id])
+        else:
+            payload = os.urandom(args.size_kb * 1024)
+            sent.setdefault(task_id, []).append(payload)
+        payloads[f"media{i}"] = payload
+        messages.append((f"media{i}", task_id))
+
+    server = start_server(payloads)
+    os.environ["META_GRAPH_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        from services.image_service import ImageService
+        from services.upload_spool import UploadSpool
+
+        uploaded = []
+        spool = UploadSpool(lambda path, *a, **k: uploaded.append(os.path.getsize(path)) or os.path.basename(path),
+                            db_path=os.path.join(directory, 'spool.sqlite3'))
+        spool.open()
+        service = ImageService()
+
+        for media_id, task_id in messages:
+            path = service.download_meta_media(media_id, task_id, 1)
+            spool.submit(path, task_id, 1, image_hash=service.proof_store.digest_of(path))
+
+        stats = service.proof_store.get_stats()
+        old_bytes = sum(len(payloads[media_id]) for media_id, _ in messages)
+        new_disk, new_upload = disk_bytes(service.proof_store.root), sum(uploaded)
+    server.shutdown()
+
+    mb = 1024 * 1024
+    print(f"{args.photos} photos for {args.tasks} tasks, resend rate {args.resend_rate:g}")
+    print(f"{'layout':>18} {'disk MB':>9} {'upload MB':>10}")
+    print(f"{'per-message':>18} {old_bytes / mb:>9.1f} {old_bytes / mb:>10.1f}")
+    print(f"{'content-addressed':>18} {new_disk / mb:>9.1f} {new_upload / mb:>10.1f}")
+    print(f"dedupe rate {stats['dedupe_rate']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
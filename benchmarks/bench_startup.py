@@ -0,0 +1,75 @@
+"""Cold start: time from process start to the first served webhook.
+
+Each run is a fresh interpreter that imports app.py and posts a
+status-update webhook (no database work needed to answer it) through
+Flask's test client. It reports the import time, the time to the first
+200, when the background warm-up (MySQL pool, schema check) finished,
+and which heavy dependencies had been imported by the first response.
+--modules also times each heavy dependency's import on its own.
+
+Needs the same .env as the bot (META_* variables, DB_*).
+
+    python -m benchmarks.bench_startup --runs 5 --modules
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ['mysql.connector', 'requests', 'deep_translator', 'langdetect']
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+payload = {"entry": [{"changes": [{"field": "messages", "value": {"statuses": [{"id": "wamid.bench", "status": "delivered"}]}}]}]}
+response = app.app.test_client().post('/whatsapp/webhook', json=payload)
+served = time.perf_counter()
+loaded = [name for name in HEAVY if name in sys.modules]
+app.warm_up_thread.join(timeout=60)
+warm = time.perf_counter()
+print(json.dumps({"import": imported - started, "first_webhook": served - started,
+                  "status": response.status_code, "warm_up": warm - started, "loaded": loaded}))
+"""
+
+
+def run_child(code):
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--modules', action='store_true', help="Also time each heavy import alone")
+    args = parser.parse_args()
+
+    if args.modules:
+        print(f"{'module':>16} {'import ms':>10}")
+        for name in HEAVY_MODULES:
+            code = (f"import json, time\nstarted = time.perf_counter()\nimport {name}\n"
+                    f"print(json.dumps((time.perf_counter() - started)))")
+            try:
+                print(f"{name:>16} {run_child(code) * 1000:>10.0f}")
+            except RuntimeError:
+                print(f"{name:>16} {'not installed':>10}")
+        print()
+
+    try:
+        results = [run_child(f"HEAVY = {HEAVY_MODULES!r}\n{CHILD}") for _ in range(args.runs)]
+    except RuntimeError as e:
+        raise SystemExit(f"❌ app.py failed to start: {e}")
+    print(f"{'stage':>22} {'median ms':>10}")
+    for key, label in (('import', 'import app'), ('first_webhook', 'first webhook served'),
+                       ('warm_up', 'warm-up finished')):
+        print(f"{label:>22} {statistics.median(r[key] for r in results) * 1000:>10.0f}")
+    print(f"first webhook status: {results[-1]['status']}, "
+          f"heavy modules loaded by then: {results[-1]['loaded'] or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Lookup latency of the translation cache: memory hit, disk hit after a restart, miss.
+
+Uses a throwaway SQLite file; the "restart" is a second TranslationCache
+opened on the same file with an empty memory tier.
+
+    python -m benchmarks.bench_translation_cache --entries 2000 --iterations 20
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from services.translation_cache import TranslationCache
+
+
+def per_lookup_us(cache, texts, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for text in texts:
+            cache.get(text, 'en', 'hi')
+    return (time.perf_counter() - started) / (iterations * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=2000)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    texts = [f"Clean the pool filter and check chlorine levels (task {i})" for i in range(args.entries)]
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'translations.sqlite3')
+
+        cache = TranslationCache(max_entries=args.entries, db_path=db_path)
+        started = time.perf_counter()
+        for text in texts:
+            cache.put(text, 'en', 'hi', text.upper())
+        store_us = (time.perf_counter() - started) / len(texts) * 1e6
+        memory_us = per_lookup_us(cache, texts, args.iterations)
+        miss_us = per_lookup_us(cache, [text + '!' for text in texts], 1)
+
+        # Fresh process: memory tier empty, every first lookup comes from disk
+        restarted = TranslationCache(max_entries=args.entries, db_path=db_path)
+        disk_us = per_lookup_us(restarted, texts, 1)
+        warm_us = per_lookup_us(restarted, texts, args.iterations)
+
+        print(f"{'operation':>22} {'us/op':>9}")
+        print(f"{'store (memory+disk)':>22} {store_us:>9.1f}")
+        print(f"{'memory hit':>22} {memory_us:>9.1f}")
+        print(f"{'miss (both tiers)':>22} {miss_us:>9.1f}")
+        print(f"{'disk hit after restart':>22} {disk_us:>9.1f}")
+        print(f"{'memory hit after warm':>22} {warm_us:>9.1f}")
+        print(f"hit rate after restart: {restarted.get_stats()['hit_rate']:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Translation tail latency: serial fallback vs hedged racing, on stub providers.
+
+The stub "google" answers in ~--fast seconds but stalls for --stall seconds
+(or fails) on a fraction of calls; the stub "mymemory" is steady at
+--steady seconds. "serial" is the old code path: google, then mymemory
+only after google gave up.
+
+    python -m benchmarks.bench_translation_hedging --requests 200
+"""
+import argparse
+import random
+import time
+
+from services.translation_providers import HedgedTranslator
+
+
+class StubProvider:
+    def __init__(self, name, latency, stall=0.0, stall_rate=0.0, fail_rate=0.0, seed=0):
+        self.name = name
+        self.latency = latency
+        self.stall = stall
+        self.stall_rate = stall_rate
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+
+    def translate(self, text, source_language, target_language, timeout):
+        roll = self.random.random()
+        if roll < self.stall_rate:
+            time.sleep(min(self.stall, timeout))
+            return None
+        time.sleep(self.latency * self.random.uniform(0.8, 1.2))
+        if roll < self.stall_rate + self.fail_rate:
+            raise RuntimeError("stub failure")
+        return f"[{self.name}:{target_language}] {text}"
+
+
+def serial(providers, text, deadline):
+    for provider in providers:
+        try:
+            translated = provider.translate(text, 'en', 'hi', deadline)
+            if translated:
+                return translated
+        except Exception:
+            pass
+    return None
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return [samples[min(len(samples) - 1, int(len(samples) * p))] * 1000 for p in (0.5, 0.95, 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--fast', type=float, default=0.02)
+    parser.add_argument('--stall', type=float, default=1.0)
+    parser.add_argument('--stall-rate', type=float, default=0.1)
+    parser.add_argument('--fail-rate', type=float, default=0.05)
+    parser.add_argument('--steady', type=float, default=0.08)
+    parser.add_argument('--hedge-delay', type=float, default=0.15)
+    parser.add_argument('--deadline', type=float, default=2.0)
+    args = parser.parse_args()
+
+    def providers():
+        return [
+            StubProvider('google', args.fast, args.stall, args.stall_rate, args.fail_rate, seed=1),
+            StubProvider('mymemory', args.steady, seed=2),
+        ]
+
+    hedged = HedgedTranslator(providers(), deadline=args.deadline, hedge_delay=args.hedge_delay)
+    serial_providers = providers()
+
+    print(f"{'mode':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'answered':>9}")
+    for label, translate in (
+        ('serial', lambda text: serial(serial_providers, text, args.deadline)),
+        ('hedged', lambda text: hedged.translate(text, 'en', 'hi')),
+    ):
+        timings, answered = [], 0
+        for i in range(args.requests):
+            started = time.perf_counter()
+            answered += translate(f"task {i}") is not None
+            timings.append(time.perf_counter() - started)
+        p50, p95, p99 = percentiles(timings)
+        print(f"{label:>8} {p50:>8.0f} {p95:>8.0f} {p99:>8.0f} {answered / args.requests:>8.0%}")
+
+    stats = hedged.get_stats()
+    print(f"hedged order now: {stats['order']}, hedges fired: {stats['counters']['hedged']}")
+    hedged.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Pretranslate the English message catalog into every supported language.
+
+Reads i18n/messages/en.json (the master) and any hand-written translations
+next to it, translates the missing strings and writes a new version:
+
+    i18n/catalogs/<version>/<lang>.json   messages + English source hashes
+    i18n/catalogs/manifest.json           the version MessageCatalog loads
+
+Hand-written strings are copied as-is. Strings already translated in the
+previous build are reused while their English source is unchanged, so a
+rebuild only translates what changed. ``{}`` fields are swapped for
+placeholders before translation; a result that loses or gains fields is
+discarded and the key stays English (and is retried on the next build).
+
+    python -m i18n.build_catalogs                       # via FreeTranslationService
+    python -m i18n.build_catalogs --translator stub --build-dir /tmp/catalogs  # offline dry run
+    python -m i18n.build_catalogs --languages de it
+"""
+import argparse
+import json
+import os
+import re
+import string
+import time
+from datetime import datetime
+
+from services.free_translation_service import SUPPORTED_LANGUAGES
+from services.message_catalog import BUILD_DIR, CATALOG_DIR, DEFAULT_LANGUAGE, MANIFEST, source_hash
+
+FIELD_PATTERN = re.compile(r'\{[^{}]*\}')
+PLACEHOLDER_PATTERN = re.compile(r'__F(\d+)__')
+LETTERS = re.compile(r'[^\W\d_]')
+
+
+def fields(text):
+    return sorted(name for _, name, _, _ in string.Formatter().parse(text) if name is not None)
+
+
+class StubTranslator:
+    """Marks text instead of translating it, for builds without network access"""
+
+    name = 'stub'
+
+    def translate(self, text, target_language):
+        return f"[{target_language}] {text}"
+
+
+class ServiceTranslator:
+    """FreeTranslationService, so builds share its cache and provider racing"""
+
+    name = 'service'
+
+    def __init__(self):
+        from services.free_translation_service import FreeTranslationService
+        self.service = FreeTranslationService()
+
+    def translate(self, text, target_language):
+        translated = self.service.translate_text(text, target_language, DEFAULT_LANGUAGE)
+        return translated if translated != text else None
+
+
+def translate_message(translator, text, language):
+    """Translate one catalog string line by line, keeping its {} fields intact"""
+    originals = FIELD_PATTERN.findall(text)
+    protected = text
+    for index, original in enumerate(originals):
+        protected = protected.replace(original, f"__F{index}__", 1)
+
+    lines = []
+    for line in protected.split('\n'):
+        if not LETTERS.search(PLACEHOLDER_PATTERN.sub('', line)):
+            lines.append(line)  # blank, emoji-only or just a field
+            continue
+        translated = translator.translate(line, language)
+        if not translated:
+            return None
+        lines.append(translated)
+
+    try:
+        restored = PLACEHOLDER_PATTERN.sub(lambda m: originals[int(m.group(1))], '\n'.join(lines))
+    except IndexError:
+        return None
+    return restored if fields(restored) == fields(text) else None
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def previous_build(build_dir):
+    """(manifest, {language: data}) of the current build, or (None, {})"""
+    manifest = load_json(os.path.join(build_dir, MANIFEST))
+    if not manifest:
+        return None, {}
+    version_dir = os.path.join(build_dir, manifest['version'])
+    return manifest, {
+        language: load_json(os.path.join(version_dir, f"{language}.json")) or {}
+        for language in manifest['languages']
+    }
+
+
+def build_language(translator, language, master, hand_written, previous):
+    messages, hashes = {}, {}
+    reused = translated = failed = 0
+    old_messages = previous.get('messages', {})
+    old_hashes = previous.get('source_hashes', {})
+
+    for key, english in master.items():
+        current = source_hash(english)
+        if key in hand_written:
+            text = hand_written[key]
+        elif key in old_messages and old_hashes.get(key) == current:
+            text = old_messages[key]
+            reused += 1
+        else:
+            text = translate_message(translator, english, language)
+            if text is None:
+                failed += 1
+                continue
+            translated += 1
+        messages[key] = text
+        hashes[key] = current
+
+    data = {"language": language, "messages": messages, "source_hashes": hashes}
+    return data, reused, translated, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--translator', choices=['service', 'stub'], default='service')
+    parser.add_argument('--languages', nargs='*', help="Default: every supported language")
+    parser.add_argument('--source-dir', default=CATALOG_DIR)
+    parser.add_argument('--build-dir', help=f"Default: {BUILD_DIR}")
+    args = parser.parse_args()
+
+    if args.translator == 'stub' and not args.build_dir:
+        parser.error("--translator stub needs an explicit --build-dir, it must not replace the real build")
+    build_dir = args.build_dir or BUILD_DIR
+    translator = StubTranslator() if args.translator == 'stub' else ServiceTranslator()
+    master = load_json(os.path.join(args.source_dir, f"{DEFAULT_LANGUAGE}.json"))
+    languages = [code for code in (args.languages or SUPPORTED_LANGUAGES) if code != DEFAULT_LANGUAGE]
+
+    manifest, previous = previous_build(build_dir)
+    number = int(manifest['version'].lstrip('v').split('-')[0]) + 1 if manifest else 1
+    version = f"v{number}-{source_hash(json.dumps(master, sort_keys=True))}"
+    version_dir = os.path.join(build_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    # Languages not rebuilt this time carry over unchanged
+    carried = [code for code in previous if code not in languages]
+    for language in carried:
+        write_json(os.path.join(version_dir, f"{language}.json"), dict(previous[language], version=version))
+
+    print(f"🌐 Building catalog {version} for {len(languages)} languages ({translator.name}), "
+          f"{len(carried)} carried over")
+    started = time.perf_counter()
+    for language in languages:
+        hand_written = load_json(os.path.join(args.source_dir, f"{language}.json")) or {}
+        data, reused, translated, failed = build_language(
+            translator, language, master, hand_written, previous.get(language, {})
+        )
+        data["version"] = version
+        write_json(os.path.join(version_dir, f"{language}.json"), data)
+        status = "✅" if not failed else "⚠️"
+        print(f"   {status} {language}: {len(hand_written)} hand-written, {reused} reused, "
+              f"{translated} translated, {failed} left in English")
+
+    # Switch the runtime over only once every language file is written
+    write_json(os.path.join(build_dir, MANIFEST), {
+        "version": version,
+        "languages": sorted(set(languages) | set(carried)),
+        "source_hash": source_hash(json.dumps(master, sort_keys=True)),
+        "translator": translator.name,
+        "built_at": datetime.now().isoformat(timespec='seconds'),
+    })
+    print(f"✅ Wrote {version_dir} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
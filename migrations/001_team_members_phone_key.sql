@@ -0,0 +1,17 @@
+-- Normalized phone lookup key for team_members.
+--
+-- phone_key holds the last 10 digits of phone with every non-digit stripped,
+-- the same value utils.helpers.normalize_phone_key() computes in the bot
+-- (REGEXP_REPLACE needs MySQL 8.0). It is
+-- a STORED generated column, so MySQL backfills every existing row when the
+-- column is added and keeps it in sync on every insert/update, including
+-- writes made by the Node backend.
+--
+-- Run once:  mysql -h $DB_HOST -u $DB_USER -p $DB_NAME < migrations/001_team_members_phone_key.sql
+
+ALTER TABLE team_members
+    ADD COLUMN phone_key VARCHAR(10)
+        GENERATED ALWAYS AS (
+            RIGHT(REGEXP_REPLACE(phone, '[^0-9]', ''), 10)
+        ) STORED,
+    ADD INDEX idx_team_members_phone_key_status (phone_key, status);
@@ -0,0 +1,10 @@
+-- Index for the bot's member cache watermark poll.
+--
+-- Every MEMBER_CACHE_WATERMARK_INTERVAL seconds each bot process runs
+-- SELECT ... FROM team_members WHERE settings_updated_at >= ?, which scans
+-- the whole table without this index.
+--
+-- Run once:  mysql -h $DB_HOST -u $DB_USER -p $DB_NAME < migrations/002_team_members_settings_updated_at.sql
+
+ALTER TABLE team_members
+    ADD INDEX idx_team_members_settings_updated_at (settings_updated_at);
@@ -0,0 +1,177 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.metrics import Counters, LatencyStats
+
+# mysql.connector.pooling.CNX_POOL_MAXSIZE; the driver itself is imported on first use
+CNX_POOL_MAXSIZE = 32
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became free in time"""
+
+
+class _PooledConnection:
+    """Proxy that hands the connection back to the pool on close()"""
+
+    def __init__(self, connection, release):
+        self._connection = connection
+        self._release = release
+        self._closed = False
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._connection.close()
+        finally:
+            self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class ConnectionPool:
+    """Sized, health-checked MySQL connection pool shared by all models.
+
+    ``get_connection()`` blocks up to ``timeout`` seconds for a free
+    connection, pings it (reconnecting if the server dropped it) and returns
+    a connection whose ``close()`` puts it back. A size of 0 disables
+    pooling and opens a fresh connection every time, as before.
+    """
+
+    def __init__(self, db_config, size=10, timeout=10, name="team_bot_pool", reset_session=True):
+        self.db_config = db_config
+        self.size = max(0, min(int(size), CNX_POOL_MAXSIZE))
+        self.timeout = timeout
+        self.name = name
+        self.reset_session = reset_session
+        self.logger = logging.getLogger(__name__)
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size) if self.size else None
+        self._in_use = 0
+        self._state_lock = threading.Lock()
+
+        self.counters = Counters('checkouts', 'connects', 'reconnects', 'failures', 'timeouts')
+        self.wait_time = LatencyStats()
+
+    def get_connection(self):
+        """Check out a healthy connection; close() returns it to the pool"""
+        if not self.size:
+            import mysql.connector
+
+            self.counters.incr('checkouts')
+            self.counters.incr('connects')
+            return _PooledConnection(mysql.connector.connect(**self.db_config), self._release_unpooled)
+
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            self.counters.incr('timeouts')
+            raise PoolTimeout(f"No database connection free after {self.timeout}s")
+        self.wait_time.record(time.perf_counter() - started)
+
+        try:
+            connection = self._get_pool().get_connection()
+            self._ensure_alive(connection)
+        except Exception:
+            self.counters.incr('failures')
+            self._slots.release()
+            raise
+
+        with self._state_lock:
+            self._in_use += 1
+        self.counters.incr('checkouts')
+        return _PooledConnection(connection, self._release)
+
+    @contextmanager
+    def connection(self):
+        """Context manager around get_connection()"""
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get_stats(self):
+        with self._state_lock:
+            in_use = self._in_use
+        return {
+            "size": self.size,
+            "in_use": in_use,
+            "counters": self.counters.snapshot(),
+            "wait_time": self.wait_time.snapshot(),
+        }
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    from mysql.connector import pooling
+
+                    self._pool = pooling.MySQLConnectionPool(
+                        pool_name=self.name,
+                        pool_size=self.size,
+                        pool_reset_session=self.reset_session,
+                        **self.db_config
+                    )
+                    # The pool opens all its connections up front
+                    self.counters.incr('connects', self.size)
+                    self.logger.info(f"✅ MySQL pool '{self.name}' created with {self.size} connections")
+        return self._pool
+
+    def _ensure_alive(self, connection):
+        """Ping the connection and reconnect it if the server dropped it"""
+        import mysql.connector
+
+        try:
+            connection.ping(reconnect=False)
+        except mysql.connector.Error:
+            self.counters.incr('reconnects')
+            connection.ping(reconnect=True, attempts=3, delay=1)
+
+    def _release(self):
+        with self._state_lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    def _release_unpooled(self):
+        pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_config):
+    """Return the process-wide pool for this database configuration"""
+    key = tuple(sorted((k, str(v)) for k, v in db_config.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                db_config,
+                size=int(os.getenv('DB_POOL_SIZE', 10)),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+                name=f"team_bot_pool_{len(_pools) + 1}",
+                reset_session=os.getenv('DB_POOL_RESET_SESSION', 'true').lower() == 'true'
+            )
+            _pools[key] = pool
+        return pool
+
+
+def get_all_pool_stats():
+    with _pools_lock:
+        return [pool.get_stats() for pool in _pools.values()]
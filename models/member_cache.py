@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.metrics import Counters
+
+
+class MemberCache:
+    """Process-wide TTL + LRU cache of team member rows keyed by phone_key.
+
+    Rows include the preference columns, so a hit serves both the member and
+    preference lookups. Entries are copied in and out so callers can mutate
+    the dicts they get back. Numbers that turned out not to be members are
+    remembered separately (for ``negative_ttl_seconds``) so repeat messages
+    from strangers do not hit MySQL again.
+    """
+
+    def __init__(self, ttl_seconds=300, max_size=10000, negative_ttl_seconds=60, negative_max_size=10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max(1, int(max_size))
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.negative_max_size = max(1, int(negative_max_size))
+        self._entries = OrderedDict()
+        self._missing = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = Counters(
+            'hits', 'misses', 'evictions', 'invalidations', 'negative_hits', 'negative_evictions'
+        )
+
+    def get(self, key):
+        """Cached member for this key, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters.incr('misses')
+                return None
+
+            expires_at, member = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.counters.incr('misses')
+                return None
+
+            self._entries.move_to_end(key)
+            self.counters.incr('hits')
+            return dict(member)
+
+    def put(self, key, member):
+        if not key or not member:
+            return
+        with self._lock:
+            self._missing.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(member))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.counters.incr('evictions')
+
+    def is_missing(self, key):
+        """True if this key was recently looked up and is not a member"""
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._missing.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= now:
+                del self._missing[key]
+                return False
+            self.counters.incr('negative_hits')
+            return True
+
+    def put_missing(self, key):
+        if not key or not self.negative_ttl_seconds:
+            return
+        with self._lock:
+            self._missing[key] = time.monotonic() + self.negative_ttl_seconds
+            self._missing.move_to_end(key)
+            while len(self._missing) > self.negative_max_size:
+                self._missing.popitem(last=False)
+                self.counters.incr('negative_evictions')
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._missing.pop(key, None)
+                if self._entries.pop(key, None) is not None:
+                    self.counters.incr('invalidations')
+
+    def clear_missing(self):
+        """Forget every negative entry, e.g. once new members may have been added"""
+        with self._lock:
+            count = len(self._missing)
+            self._missing.clear()
+        return count
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._missing.clear()
+
+    def get_stats(self):
+        counters = self.counters.snapshot()
+        lookups = counters['hits'] + counters['misses']
+        with self._lock:
+            size = len(self._entries)
+            negative_size = len(self._missing)
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "negative_size": negative_size,
+            "negative_ttl_seconds": self.negative_ttl_seconds,
+            "hit_rate": round(counters['hits'] / lookups, 4) if lookups else 0.0,
+            "counters": counters,
+        }
+
+
+_member_cache = None
+_member_cache_lock = threading.Lock()
+
+
+def get_member_cache():
+    """The shared member cache, sized from the MEMBER_CACHE_* / MEMBER_NEGATIVE_* settings"""
+    global _member_cache
+    with _member_cache_lock:
+        if _member_cache is None:
+            _member_cache = MemberCache(
+                ttl_seconds=int(os.getenv('MEMBER_CACHE_TTL', 300)),
+                max_size=int(os.getenv('MEMBER_CACHE_SIZE', 10000)),
+                negative_ttl_seconds=int(os.getenv('MEMBER_NEGATIVE_TTL', 60)),
+                negative_max_size=int(os.getenv('MEMBER_NEGATIVE_SIZE', 10000))
+            )
+        return _member_cache
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+
+from models.db_pool import get_pool
+from models.member_cache import get_member_cache
+from utils.bloom_filter import BloomFilter
+from utils.helpers import normalize_phone_key
+from utils.metrics import Counters
+
+
+class MemberPrefilter:
+    """Bloom filter of active members' phone keys, rebuilt in the background.
+
+    Lets TeamMember reject numbers that are certainly not registered without
+    touching MySQL. Every ``refresh_interval`` seconds a signature query
+    (count, max id and an XOR of per-row id/phone checksums) decides whether
+    the filter needs rebuilding, so a changed phone or a swapped active
+    member is picked up too. Regardless of the signature the filter is
+    rebuilt every ``full_rebuild_interval`` seconds. Until the first build
+    finishes every number is treated as a possible member.
+
+    Rejections end up in the member cache's negative entries, so every
+    rebuild also clears those: a member added since the last build is
+    recognised once the next signature check (at most ``refresh_interval``
+    seconds later) sees the new row, not a negative TTL after that.
+    """
+
+    def __init__(self, db_config, refresh_interval=60, error_rate=0.001, full_rebuild_interval=3600, cache=None):
+        self.db_config = db_config
+        self.cache = cache
+        self.refresh_interval = refresh_interval
+        self.error_rate = error_rate
+        self.full_rebuild_interval = full_rebuild_interval
+
+        self._bloom = None
+        self._signature = None
+        self._built_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.counters = Counters('rejected', 'passed', 'rebuilds', 'errors')
+
+    def start(self):
+        """Build the filter now-ish and keep it fresh on a daemon thread"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._refresh_loop, name="member-prefilter", daemon=True
+            )
+            self._thread.start()
+
+    def might_be_member(self, phone_key):
+        """False only when the number is certainly not an active member"""
+        bloom = self._bloom
+        if bloom is None or phone_key in bloom:
+            self.counters.incr('passed')
+            return True
+        self.counters.incr('rejected')
+        return False
+
+    def add(self, phone_number):
+        """Admit a number immediately (e.g. a member created by the bot)"""
+        bloom = self._bloom
+        if bloom is not None:
+            bloom.add(normalize_phone_key(phone_number))
+
+    def refresh(self, force=False):
+        """Rebuild the filter if the set of active members changed"""
+        if self._built_at and time.time() - self._built_at >= self.full_rebuild_interval:
+            force = True
+
+        with get_pool(self.db_config).connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    "SELECT COUNT(*), MAX(id), BIT_XOR(CRC32(CONCAT(id, ':', COALESCE(phone, '')))) "
+                    "FROM team_members WHERE status = 'active'"
+                )
+                signature = tuple(cursor.fetchone())
+                if not force and signature == self._signature:
+                    return False
+
+                cursor.execute("SELECT phone FROM team_members WHERE status = 'active'")
+                phones = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+        bloom = BloomFilter(capacity=max(1000, len(phones) * 2), error_rate=self.error_rate)
+        for phone in phones:
+            phone_key = normalize_phone_key(phone)
+            if phone_key:
+                bloom.add(phone_key)
+
+        self._bloom = bloom
+        self._signature = signature
+        self._built_at = time.time()
+        self.counters.incr('rebuilds')
+        if self.cache is not None:
+            # Numbers rejected by the old filter may be members now
+            self.cache.clear_missing()
+        print(f"✅ Member prefilter rebuilt with {bloom.count} phone keys ({bloom.size_bytes} bytes)")
+        return True
+
+    def get_stats(self):
+        bloom = self._bloom
+        return {
+            "ready": bloom is not None,
+            "members": bloom.count if bloom else 0,
+            "size_bytes": bloom.size_bytes if bloom else 0,
+            "built_at": self._built_at,
+            "counters": self.counters.snapshot(),
+        }
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.counters.incr('errors')
+                print(f"❌ Error refreshing member prefilter: {e}")
+            time.sleep(self.refresh_interval)
+
+
+_prefilter = None
+_prefilter_lock = threading.Lock()
+
+
+def get_member_prefilter(db_config):
+    """The shared prefilter, or None when MEMBER_PREFILTER_ENABLED is false"""
+    global _prefilter
+    if os.getenv('MEMBER_PREFILTER_ENABLED', 'true').lower() != 'true':
+        return None
+    with _prefilter_lock:
+        if _prefilter is None:
+            _prefilter = MemberPrefilter(
+                db_config,
+                refresh_interval=int(os.getenv('MEMBER_PREFILTER_REFRESH', 60)),
+                full_rebuild_interval=int(os.getenv('MEMBER_PREFILTER_FULL_REBUILD', 3600)),
+                cache=get_member_cache()
+            )
+            _prefilter.start()
+        return _prefilter
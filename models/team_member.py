@@ -1,66 +1,335 @@
-import mysql.connector
+import os
 import re
+import threading
+import time
+from datetime import datetime
+
+from models.db_pool import get_pool
+from models.member_cache import get_member_cache
+from models.member_prefilter import get_member_prefilter
+from utils.helpers import normalize_phone_key
+
+# Columns the bot reads from team_members (member row + user preferences)
+MEMBER_COLUMNS = (
+    "id, client_id, name, role, phone, status, preferred_language, "
+    "last_selected_property_id, notification_preferences, settings_updated_at"
+)
+
+# MySQL error for a column that does not exist (phone_key not migrated yet)
+ER_BAD_FIELD_ERROR = 1054
+
 
 class TeamMember:
+    # Shared by all instances: flips to False once we learn the migration is missing
+    phone_key_available = True
+
+    # settings_updated_at watermark used to notice changes made by the Node backend
+    _watermark = None
+    # ids already handled at the watermark second (DATETIME has 1s resolution)
+    _watermark_ids = set()
+    _watermark_checked_at = 0.0
+    _watermark_lock = threading.Lock()
+
     def __init__(self, db_config):
         self.db_config = db_config
+        self.cache = get_member_cache()
+        self.prefilter = get_member_prefilter(db_config)
+        self.watermark_interval = int(os.getenv('MEMBER_CACHE_WATERMARK_INTERVAL', 30))
 
     def get_connection(self):
-        return mysql.connector.connect(**self.db_config)
+        return get_pool(self.db_config).get_connection()
+
+    def connection(self):
+        """Pooled connection as a context manager"""
+        return get_pool(self.db_config).connection()
 
     def create_team_member(self, client_id, name, role, phone, status="active"):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+        
+            try:
+                query = """
+                    INSERT INTO team_members (client_id, name, role, phone, status)
+                    VALUES (%s, %s, %s, %s, %s)
+                """
+                cursor.execute(query, (client_id, name, role, phone, status))
+                conn.commit()
+                if self.prefilter:
+                    self.prefilter.add(phone)
+                self.cache.invalidate(normalize_phone_key(phone))
+                return cursor.lastrowid
+            finally:
+                cursor.close()
+
+    def find_by_phone(self, phone_number):
+        """Find an active member, from the cache or with one indexed lookup"""
+        phone_key = normalize_phone_key(phone_number)
+        if not phone_key:
+            return None
+        
+        self._check_settings_watermark()
+        member = self.cache.get(phone_key)
+        if member:
+            return member
+        if self._known_non_member(phone_key):
+            return None
+        
+        member = self._query_by_phone(phone_number, phone_key)
+        if member:
+            self.cache.put(phone_key, member)
+        else:
+            self.cache.put_missing(phone_key)
+        return member
+
+    def find_by_phones(self, phone_numbers):
+        """Resolve several phone numbers at once, returns {phone_number: member}"""
+        self._check_settings_watermark()
+        
+        members = {}
+        misses = []
+        for number in set(phone_numbers):
+            phone_key = normalize_phone_key(number)
+            if not phone_key:
+                continue
+            member = self.cache.get(phone_key)
+            if member:
+                members[number] = member
+            elif not self._known_non_member(phone_key):
+                misses.append(number)
+        
+        if misses:
+            found = self._query_by_phones(misses)
+            for number in misses:
+                member = found.get(number)
+                if member:
+                    self.cache.put(normalize_phone_key(number), member)
+                    members[number] = member
+                else:
+                    self.cache.put_missing(normalize_phone_key(number))
+        return members
+
+    def _known_non_member(self, phone_key):
+        """True when the negative cache or the prefilter rules the number out"""
+        if self.cache.is_missing(phone_key):
+            return True
+        if self.prefilter and not self.prefilter.might_be_member(phone_key):
+            self.cache.put_missing(phone_key)
+            return True
+        return False
+
+    def cache_member(self, member):
+        """Refresh the cached row after the bot itself changed it"""
+        if member and member.get('phone'):
+            self.cache.put(normalize_phone_key(member['phone']), member)
+
+    def invalidate_phone(self, phone_number):
+        self.cache.invalidate(normalize_phone_key(phone_number))
+
+    def _check_settings_watermark(self):
+        """Drop cached rows whose settings changed elsewhere (e.g. the Node backend)"""
+        if not self.watermark_interval:
+            return
+        
+        now = time.monotonic()
+        if now - TeamMember._watermark_checked_at < self.watermark_interval:
+            return
+        # Only one thread polls; the others keep serving from the cache
+        if not TeamMember._watermark_lock.acquire(blocking=False):
+            return
         
         try:
-            query = """
-                INSERT INTO team_members (client_id, name, role, phone, status)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (client_id, name, role, phone, status))
-            conn.commit()
-            return cursor.lastrowid
+            TeamMember._watermark_checked_at = now
+            with self.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    if TeamMember._watermark is None:
+                        cursor.execute("SELECT MAX(settings_updated_at) AS watermark FROM team_members")
+                        TeamMember._watermark = cursor.fetchone()['watermark'] or datetime(1970, 1, 1)
+                        return
+                    
+                    # >= so a row written later in the watermark's own second is not missed
+                    cursor.execute(
+                        "SELECT id, phone, settings_updated_at FROM team_members WHERE settings_updated_at >= %s",
+                        (TeamMember._watermark,)
+                    )
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+            
+            changed = [
+                row for row in rows
+                if row['settings_updated_at'] > TeamMember._watermark or row['id'] not in TeamMember._watermark_ids
+            ]
+            if changed:
+                self.cache.invalidate(*[normalize_phone_key(row['phone']) for row in changed])
+                watermark = max(row['settings_updated_at'] for row in rows)
+                TeamMember._watermark_ids = {row['id'] for row in rows if row['settings_updated_at'] == watermark}
+                TeamMember._watermark = watermark
+        except Exception as e:
+            print(f"❌ Error checking member settings watermark: {e}")
         finally:
-            cursor.close()
-            conn.close()
+            TeamMember._watermark_lock.release()
 
-    def find_by_phone(self, phone_number):
+    def _query_by_phone(self, phone_number, phone_key):
+        """One indexed lookup on phone_key (format sweep if not migrated)"""
+        if TeamMember.phone_key_available:
+            try:
+                with self.connection() as conn:
+                    cursor = conn.cursor(dictionary=True)
+                    try:
+                        query = f"""
+                            SELECT {MEMBER_COLUMNS} FROM team_members
+                            WHERE phone_key = %s AND status = 'active'
+                            LIMIT 1
+                        """
+                        cursor.execute(query, (phone_key,))
+                        return cursor.fetchone()
+                    finally:
+                        cursor.close()
+            except Exception as e:
+                if not self._is_missing_phone_key(e):
+                    raise
+                self._disable_phone_key()
+        
+        return self._find_by_phone_formats(phone_number)
+
+    def _query_by_phones(self, phone_numbers):
+        """One IN query on phone_key for several numbers (format sweep if not migrated)"""
+        keys_by_number = {
+            number: normalize_phone_key(number)
+            for number in set(phone_numbers) if number
+        }
+        keys = list({key for key in keys_by_number.values() if key})
+        
+        members = {}
+        if not keys:
+            return members
+        
+        if TeamMember.phone_key_available:
+            try:
+                with self.connection() as conn:
+                    cursor = conn.cursor(dictionary=True)
+                    try:
+                        placeholders = ', '.join(['%s'] * len(keys))
+                        query = f"""
+                            SELECT {MEMBER_COLUMNS}, phone_key FROM team_members
+                            WHERE phone_key IN ({placeholders}) AND status = 'active'
+                        """
+                        cursor.execute(query, keys)
+                        rows_by_key = {}
+                        for row in cursor.fetchall():
+                            rows_by_key.setdefault(row.pop('phone_key'), row)
+                    finally:
+                        cursor.close()
+                
+                for number, key in keys_by_number.items():
+                    if key in rows_by_key:
+                        members[number] = rows_by_key[key]
+                return members
+            except Exception as e:
+                if not self._is_missing_phone_key(e):
+                    raise
+                self._disable_phone_key()
+        
+        return self._find_by_phones_formats(phone_numbers)
+
+    @staticmethod
+    def _is_missing_phone_key(error):
+        """True for the 1054 error about phone_key itself, not any other unknown column"""
+        # mysql.connector.Error, checked by errno so the driver loads lazily
+        return getattr(error, 'errno', None) == ER_BAD_FIELD_ERROR and 'phone_key' in str(error)
+
+    def _disable_phone_key(self):
+        TeamMember.phone_key_available = False
+        print("⚠️ team_members.phone_key is missing, run migrations/001_team_members_phone_key.sql. "
+              "Falling back to multi-format phone lookups.")
+
+    def _find_by_phone_formats(self, phone_number):
+        """Legacy lookup trying every phone format, used until phone_key exists"""
         # Try multiple phone number formats
         possible_numbers = self.get_possible_phone_formats(phone_number)
         
-        conn = self.get_connection()
-        cursor = conn.cursor(dictionary=True)
+        with self.connection() as conn:
+            cursor = conn.cursor(dictionary=True)
         
-        try:
-            # Try exact match first
-            for possible_number in possible_numbers:
-                query = "SELECT * FROM team_members WHERE phone = %s AND status = 'active'"
-                cursor.execute(query, (possible_number,))
-                member = cursor.fetchone()
+            try:
+                # Try exact match first
+                for possible_number in possible_numbers:
+                    query = f"SELECT {MEMBER_COLUMNS} FROM team_members WHERE phone = %s AND status = 'active'"
+                    cursor.execute(query, (possible_number,))
+                    member = cursor.fetchone()
                 
-                if member:
-                    print(f"✅ Team member found with phone: {possible_number}")
-                    return member
+                    if member:
+                        print(f"✅ Team member found with phone: {possible_number}")
+                        return member
             
-            # If exact match fails, try partial match (last 10 digits)
-            for possible_number in possible_numbers:
-                clean_number = self.clean_phone_number(possible_number)
-                if len(clean_number) >= 10:
-                    last_10_digits = clean_number[-10:]
+                # If exact match fails, try partial match (last 10 digits)
+                for possible_number in possible_numbers:
+                    clean_number = self.clean_phone_number(possible_number)
+                    if len(clean_number) >= 10:
+                        last_10_digits = clean_number[-10:]
                     
-                    query = "SELECT * FROM team_members WHERE phone LIKE %s AND status = 'active'"
-                    cursor.execute(query, (f'%{last_10_digits}',))
-                    member = cursor.fetchone()
+                        query = f"SELECT {MEMBER_COLUMNS} FROM team_members WHERE phone LIKE %s AND status = 'active'"
+                        cursor.execute(query, (f'%{last_10_digits}',))
+                        member = cursor.fetchone()
                     
+                        if member:
+                            print(f"✅ Team member found with partial phone match: {last_10_digits}")
+                            return member
+            
+                print(f"❌ Team member not found. Tried formats: {possible_numbers}")
+                return None
+            finally:
+                cursor.close()
+
+    def _find_by_phones_formats(self, phone_numbers):
+        """Legacy batch lookup over every phone format, used until phone_key exists"""
+        formats_by_number = {
+            number: self.get_possible_phone_formats(number)
+            for number in set(phone_numbers) if number
+        }
+        all_formats = list({fmt for formats in formats_by_number.values() for fmt in formats})
+        
+        members = {}
+        if not all_formats:
+            return members
+        
+        with self.connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+        
+            try:
+                # One exact-match query for every format of every sender
+                placeholders = ', '.join(['%s'] * len(all_formats))
+                query = f"SELECT {MEMBER_COLUMNS} FROM team_members WHERE phone IN ({placeholders}) AND status = 'active'"
+                cursor.execute(query, all_formats)
+                rows_by_phone = {}
+                for row in cursor.fetchall():
+                    rows_by_phone.setdefault(row['phone'], row)
+            
+                missing = {}
+                for number, formats in formats_by_number.items():
+                    member = next((rows_by_phone[fmt] for fmt in formats if fmt in rows_by_phone), None)
                     if member:
-                        print(f"✅ Team member found with partial phone match: {last_10_digits}")
-                        return member
+                        members[number] = member
+                    else:
+                        last_10_digits = self.clean_phone_number(number)[-10:]
+                        if len(last_10_digits) == 10:
+                            missing.setdefault(last_10_digits, []).append(number)
             
-            print(f"❌ Team member not found. Tried formats: {possible_numbers}")
-            return None
-        finally:
-            cursor.close()
-            conn.close()
+                # Partial match (last 10 digits) for the senders still unresolved
+                if missing:
+                    conditions = ' OR '.join(['phone LIKE %s'] * len(missing))
+                    query = f"SELECT {MEMBER_COLUMNS} FROM team_members WHERE ({conditions}) AND status = 'active'"
+                    cursor.execute(query, [f'%{digits}' for digits in missing])
+                    for row in cursor.fetchall():
+                        digits = self.clean_phone_number(row['phone'])[-10:]
+                        for number in missing.pop(digits, []):
+                            members[number] = row
+            
+                print(f"✅ Resolved {len(members)}/{len(formats_by_number)} senders in one batch")
+                return members
+            finally:
+                cursor.close()
 
     def clean_phone_number(self, phone_number):
         """Clean phone number - remove all non-digit characters"""
@@ -107,5 +376,5 @@ class TeamMember:
             possible_formats.append('0' + digits_only)
         
         print(f"🔍 Phone lookup formats for '{phone_number}': {possible_formats}")
-        # Remove duplicates and return
-        return list(set([fmt for fmt in possible_formats if fmt]))
\ No newline at end of file
+        # Remove duplicates (keeping the preferred order) and return
+        return list(dict.fromkeys(fmt for fmt in possible_formats if fmt))
\ No newline at end of file
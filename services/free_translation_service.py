@@ -1,121 +1,175 @@
-import requests
-from deep_translator import GoogleTranslator
 import logging
-from typing import Optional
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.language_detector import Detection, LanguageDetector
+from services.translation_cache import get_translation_cache
+from services.translation_providers import get_hedged_translator
+from utils.metrics import Counters, LatencyStats
+
+SUPPORTED_LANGUAGES = {
+    'en': 'English',
+    'hi': 'Hindi',
+    'es': 'Spanish',
+    'fr': 'French',
+    'de': 'German',
+    'it': 'Italian',
+    'pt': 'Portuguese',
+    'ru': 'Russian',
+    'ja': 'Japanese',
+    'ko': 'Korean',
+    'ar': 'Arabic',
+    'zh': 'Chinese',
+    'mr': 'Marathi',
+    'ta': 'Tamil',
+    'te': 'Telugu',
+    'kn': 'Kannada',
+    'ml': 'Malayalam',
+    'bn': 'Bengali',
+    'gu': 'Gujarati',
+    'pa': 'Punjabi',
+    'ur': 'Urdu'
+}
+
+# langdetect codes that differ from ours
+LANGDETECT_CODES = {'zh-cn': 'zh', 'zh-tw': 'zh'}
+
+# Shared by every FreeTranslationService instance
+detection_latency = {'local': LatencyStats(), 'langdetect': LatencyStats(), 'remote': LatencyStats()}
+detection_counters = Counters('local', 'langdetect', 'default', 'remote_refinements', 'remote_changed', 'remote_errors')
+
+_langdetect = None  # (detect_langs, LangDetectException) once profiles are loaded
+_langdetect_lock = threading.Lock()
+_langdetect_loader = None
+_remote_executor = None
+_remote_lock = threading.Lock()
+
+
+def load_langdetect_profiles():
+    """Import langdetect and load its profiles once per process, returns False if not installed"""
+    global _langdetect
+    with _langdetect_lock:
+        if _langdetect is None:
+            try:
+                from langdetect import DetectorFactory, detect_langs, detector_factory
+                from langdetect.lang_detect_exception import LangDetectException
+            except ImportError:  # offline statistical detection is optional
+                return False
+            started = time.perf_counter()
+            DetectorFactory.seed = 0  # deterministic results
+            detector_factory.init_factory()
+            _langdetect = (detect_langs, LangDetectException)
+            print(f"✅ langdetect profiles loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return True
+
+
+def start_langdetect_loading():
+    """Load langdetect in the background; detection skips it until it is ready"""
+    global _langdetect_loader
+    with _langdetect_lock:
+        if _langdetect_loader is None:
+            _langdetect_loader = threading.Thread(
+                target=load_langdetect_profiles, name="langdetect-loader", daemon=True
+            )
+            _langdetect_loader.start()
+
+
+def get_detection_stats():
+    return {
+        "counters": detection_counters.snapshot(),
+        "latency": {method: stats.snapshot() for method, stats in detection_latency.items()},
+    }
+
 
 class FreeTranslationService:
     def __init__(self):
-        self.supported_languages = {
-            'en': 'English',
-            'hi': 'Hindi', 
-            'es': 'Spanish',
-            'fr': 'French',
-            'de': 'German',
-            'it': 'Italian',
-            'pt': 'Portuguese',
-            'ru': 'Russian',
-            'ja': 'Japanese',
-            'ko': 'Korean',
-            'ar': 'Arabic',
-            'zh': 'Chinese',
-            'mr': 'Marathi',
-            'ta': 'Tamil',
-            'te': 'Telugu',
-            'kn': 'Kannada',
-            'ml': 'Malayalam',
-            'bn': 'Bengali',
-            'gu': 'Gujarati',
-            'pa': 'Punjabi',
-            'ur': 'Urdu'
-        }
+        self.supported_languages = SUPPORTED_LANGUAGES
         self.logger = logging.getLogger(__name__)
+        self.detector = LanguageDetector()
+        self.min_confidence = float(os.getenv('LANGUAGE_DETECT_MIN_CONFIDENCE', 0.6))
+        # GoogleTranslator().detect is a network call: never on the request path,
+        # only as an opt-in refinement in the background
+        self.remote_detection = os.getenv('LANGUAGE_REMOTE_DETECTION', 'false').lower() == 'true'
+        start_langdetect_loading()
+        self.cache = get_translation_cache()
+        self.providers = get_hedged_translator()
         
-    def detect_language(self, text: str) -> str:
+    def detect_language(self, text: str, on_refined=None) -> str:
         """
-        Detect language using multiple free methods
+        Detect language locally, without any network call.
+
+        ``on_refined(language)`` is called later from a background thread if
+        LANGUAGE_REMOTE_DETECTION is on and the remote detector disagrees
+        with an uncertain local answer.
         """
+        detection = Detection(None, 0.0)
         try:
-            text_lower = text.lower().strip()
-            
-            # Method 1: Keyword-based detection
-            detected = self._keyword_detection(text_lower)
-            if detected:
-                return detected
+            # Method 1: Compiled keyword + script detection
+            with detection_latency['local'].time():
+                detection = self.detect_language_with_confidence(text)
+            if detection.language and detection.confidence >= self.min_confidence:
+                detection_counters.incr('local')
+                return detection.language
                 
-            # Method 2: Try deep-translator library
-            try:
-                detected = GoogleTranslator().detect(text)
-                if detected in self.supported_languages:
-                    return detected
-            except:
-                pass
-                
-            # Method 3: Character range detection
-            detected = self._character_based_detection(text)
-            if detected:
-                return detected
+            # Method 2: langdetect's statistical profiles (offline)
+            if _langdetect is not None:
+                with detection_latency['langdetect'].time():
+                    offline = self._detect_langdetect(text)
+                if offline.language and offline.confidence >= self.min_confidence:
+                    detection_counters.incr('langdetect')
+                    return offline.language
                 
         except Exception as e:
             self.logger.error(f"Language detection error: {e}")
             
-        return 'en'  # Default to English
-    
-    def _keyword_detection(self, text: str) -> Optional[str]:
-        """Keyword-based language detection"""
-        language_keywords = {
-            'hi': ['नमस्ते', 'धन्यवाद', 'कैसे', 'हैं', 'में', 'का', 'की', 'से', 'है', 'और', 'क्या', 'कर', 'यह', 'वह', 'तो'],
-            'es': ['hola', 'gracias', 'por favor', 'cómo', 'estás', 'buenos', 'días', 'noche', 'adiós', 'sí', 'no'],
-            'fr': ['bonjour', 'merci', 's\'il vous plaît', 'comment', 'ça va', 'oui', 'non', 'au revoir', 'madame', 'monsieur'],
-            'de': ['hallo', 'guten tag', 'danke', 'bitte', 'wie', 'geht', 'es', 'ihnen', 'ja', 'nein', 'tschüss'],
-            'it': ['ciao', 'buongiorno', 'grazie', 'per favore', 'come', 'sta', 'si', 'no', 'arrivederci'],
-            'pt': ['olá', 'bom dia', 'obrigado', 'por favor', 'como', 'está', 'sim', 'não', 'adeus'],
-            'ru': ['привет', 'здравствуйте', 'спасибо', 'пожалуйста', 'как', 'дела', 'да', 'нет', 'до свидания'],
-            'ja': ['こんにちは', 'ありがとう', 'お願いします', 'はい', 'いいえ', 'さようなら', 'おはよう'],
-            'ko': ['안녕하세요', '감사합니다', '부탁합니다', '네', '아니요', '안녕히 가세요'],
-            'ar': ['مرحبا', 'شكرا', 'من فضلك', 'كيف', 'الحال', 'نعم', 'لا', 'مع السلامة'],
-            'zh': ['你好', '谢谢', '请', '是的', '不是', '再见', '早上好'],
-            'mr': ['नमस्कार', 'धन्यवाद', 'कसे', 'आहे', 'मध्ये', 'चा', 'ची', 'पासून'],
-            'ta': ['வணக்கம்', 'நன்றி', 'தயவு செய்து', 'எப்படி', 'உள்ளது', 'ஆம்', 'இல்லை'],
-            'te': ['నమస్కారం', 'ధన్యవాదాలు', 'దయచేసి', 'ఎలా', 'ఉంది', 'అవును', 'కాదు'],
-            'kn': ['ನಮಸ್ಕಾರ', 'ಧನ್ಯವಾದ', 'ದಯವಿಟ್ಟು', 'ಹೇಗೆ', 'ಇದೆ', 'ಹೌದು', 'ಇಲ್ಲ'],
-            'ml': ['നമസ്കാരം', 'നന്ദി', 'ദയവായി', 'എങ്ങനെ', 'ആണ്', 'അതെ', 'ഇല്ല'],
-            'bn': ['নমস্কার', 'ধন্যবাদ', 'দয়া করে', 'কেমন', 'আছে', 'হ্যাঁ', 'না'],
-            'gu': ['નમસ્તે', 'આભાર', 'કૃપા કરીને', 'કેવી રીતે', 'છે', 'હા', 'ના'],
-            'pa': ['ਸਤ ਸ੍ਰੀ ਅਕਾਲ', 'ਧੰਨਵਾਦ', 'ਕ੍ਰਿਪਾ ਕਰਕੇ', 'ਕਿਵੇਂ', 'ਹੈ', 'ਹਾਂ', 'ਨਹੀਂ'],
-            'ur': ['سلام', 'شکریہ', 'براہ کرم', 'کیسے', 'ہے', 'جی ہاں', 'نہیں']
-        }
-        
-        for lang_code, keywords in language_keywords.items():
-            for keyword in keywords:
-                if keyword in text:
-                    return lang_code
-        return None
-    
-    def _character_based_detection(self, text: str) -> Optional[str]:
-        """Detect language based on character ranges"""
-        # Hindi, Marathi, Sanskrit, etc. (Devanagari script)
-        if any('\u0900' <= char <= '\u097F' for char in text):
-            return 'hi'
-        
-        # Arabic script (Arabic, Urdu, Persian)
-        if any('\u0600' <= char <= '\u06FF' for char in text):
-            return 'ar'
+        # Method 3: Low-confidence local guess, else English
+        language = detection.language or 'en'
+        detection_counters.incr('default')
+        if self.remote_detection and on_refined and text:
+            self._refine_remotely(text, language, on_refined)
+        return language
+
+    def detect_language_with_confidence(self, text: str) -> Detection:
+        """Local detection only: Detection(language or None, confidence 0..1)"""
+        return self.detector.detect(text.strip() if text else text)
+
+    def _detect_langdetect(self, text: str) -> Detection:
+        """langdetect's best guess among our supported languages"""
+        if not text or len(text.strip()) < 3:
+            return Detection(None, 0.0)
+        detect_langs, LangDetectException = _langdetect
+        try:
+            for guess in detect_langs(text):
+                language = LANGDETECT_CODES.get(guess.lang, guess.lang)
+                if language in self.supported_languages:
+                    return Detection(language, round(guess.prob, 3))
+        except LangDetectException:
+            pass
+        return Detection(None, 0.0)
+
+    def _refine_remotely(self, text: str, local_language: str, on_refined):
+        """Ask GoogleTranslator in the background; report only a different answer"""
+        global _remote_executor
+        with _remote_lock:
+            if _remote_executor is None:
+                _remote_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lang-refine")
         
-        # Chinese, Japanese, Korean characters
-        if any('\u4E00' <= char <= '\u9FFF' for char in text):  # CJK Unified Ideographs
-            return 'zh'
-        if any('\u3040' <= char <= '\u309F' for char in text):  # Hiragana
-            return 'ja'
-        if any('\u30A0' <= char <= '\u30FF' for char in text):  # Katakana
-            return 'ja'
-        if any('\uAC00' <= char <= '\uD7AF' for char in text):  # Hangul
-            return 'ko'
+        def refine():
+            from deep_translator import GoogleTranslator
+            try:
+                with detection_latency['remote'].time():
+                    detected = GoogleTranslator().detect(text)
+                detection_counters.incr('remote_refinements')
+                if detected in self.supported_languages and detected != local_language:
+                    detection_counters.incr('remote_changed')
+                    on_refined(detected)
+            except Exception as e:
+                detection_counters.incr('remote_errors')
+                self.logger.warning(f"Remote language detection failed: {e}")
         
-        # Cyrillic (Russian, Ukrainian, etc.)
-        if any('\u0400' <= char <= '\u04FF' for char in text):
-            return 'ru'
-            
-        return None
+        _remote_executor.submit(refine)
     
     def translate_text(self, text: str, target_language: str = 'en', source_language: str = 'auto') -> str:
         """
@@ -123,58 +177,24 @@ class FreeTranslationService:
         """
         try:
             # If same language, return original
-            if source_language == target_language:
+            if source_language == target_language or not text:
                 return text
                 
-            # Try deep-translator (free library)
-            try:
-                if source_language == 'auto':
-                    translator = GoogleTranslator(source='auto', target=target_language)
-                else:
-                    translator = GoogleTranslator(source=source_language, target=target_language)
+            cached = self.cache.get(text, source_language, target_language)
+            if cached is not None:
+                return cached
                 
-                translated = translator.translate(text)
-                if translated and translated != text:
-                    return translated
-            except Exception as e:
-                self.logger.warning(f"Deep-translator failed: {e}")
-                
-            # Fallback: Try MyMemory Translation API (free)
-            try:
-                translated = self._translate_mymemory(text, target_language, source_language)
-                if translated:
-                    return translated
-            except Exception as e:
-                self.logger.warning(f"MyMemory translation failed: {e}")
+            # Google and MyMemory raced within one deadline
+            translated = self.providers.translate(text, source_language, target_language)
+            if translated:
+                self.cache.put(text, source_language, target_language, translated)
+                return translated
                 
         except Exception as e:
             self.logger.error(f"Translation error: {e}")
             
         return text  # Return original text if translation fails
     
-    def _translate_mymemory(self, text: str, target_lang: str, source_lang: str = 'auto') -> Optional[str]:
-        """Use MyMemory Translation API (free)"""
-        try:
-            if source_lang == 'auto':
-                source_lang = 'auto'
-                
-            url = "https://api.mymemory.translated.net/get"
-            params = {
-                'q': text,
-                'langpair': f'{source_lang}|{target_lang}'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if data['responseStatus'] == 200:
-                    return data['responseData']['translatedText']
-                    
-        except Exception as e:
-            self.logger.warning(f"MyMemory API error: {e}")
-            
-        return None
-    
     def get_language_name(self, language_code: str) -> str:
         """Get full language name from code"""
         return self.supported_languages.get(language_code, 'English')
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+
+from utils.metrics import Counters, LatencyStats
+
+
+class HttpClient:
+    """Shared keep-alive HTTP session with per-endpoint latency stats.
+
+    One ``requests.Session`` per client keeps TCP+TLS connections to each
+    host open between calls. Every request gets explicit (connect, read)
+    timeouts unless the caller passes its own, and its wall time is
+    recorded under the ``endpoint`` label it was made with. ``requests`` is
+    only imported when the first request is made, keeping it off import time.
+    """
+
+    def __init__(self, name, pool_connections=10, pool_maxsize=20, connect_timeout=3.05, read_timeout=20):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._session = None
+        self._session_lock = threading.Lock()
+
+        self.counters = Counters('requests', 'errors')
+        self._latency = {}
+        self._latency_lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize, max_retries=0
+                    )
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    def request(self, method, url, endpoint=None, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        stats = self._endpoint_stats(endpoint or method.upper())
+
+        self.counters.incr('requests')
+        started = time.perf_counter()
+        try:
+            return self.session.request(method, url, **kwargs)
+        except Exception:
+            self.counters.incr('errors')
+            raise
+        finally:
+            stats.record(time.perf_counter() - started)
+
+    def get(self, url, endpoint=None, **kwargs):
+        return self.request('GET', url, endpoint=endpoint, **kwargs)
+
+    def post(self, url, endpoint=None, **kwargs):
+        return self.request('POST', url, endpoint=endpoint, **kwargs)
+
+    def put(self, url, endpoint=None, **kwargs):
+        return self.request('PUT', url, endpoint=endpoint, **kwargs)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+    def get_stats(self):
+        with self._latency_lock:
+            endpoints = dict(self._latency)
+        return {
+            "name": self.name,
+            "pool_maxsize": self.pool_maxsize,
+            "timeout": list(self.timeout),
+            "counters": self.counters.snapshot(),
+            "endpoints": {label: stats.snapshot() for label, stats in endpoints.items()},
+        }
+
+    def _endpoint_stats(self, label):
+        stats = self._latency.get(label)
+        if stats is None:
+            with self._latency_lock:
+                stats = self._latency.setdefault(label, LatencyStats())
+        return stats
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_http_client(name='graph'):
+    """The process-wide client for one upstream (graph, backend, ...).
+
+    Sized from HTTP_POOL_CONNECTIONS / HTTP_POOL_MAXSIZE and timed out by
+    HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT.
+    """
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = HttpClient(
+                name,
+                pool_connections=int(os.getenv('HTTP_POOL_CONNECTIONS', 10)),
+                pool_maxsize=int(os.getenv('HTTP_POOL_MAXSIZE', 20)),
+                connect_timeout=float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05)),
+                read_timeout=float(os.getenv('HTTP_READ_TIMEOUT', 20))
+            )
+            _clients[name] = client
+        return client
+
+
+def get_all_http_stats():
+    with _clients_lock:
+        return [client.get_stats() for client in _clients.values()]
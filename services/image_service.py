@@ -1,8 +1,12 @@
-import requests
 import os
 from dotenv import load_dotenv
 import mimetypes
 import json
+import hashlib
+
+from services.http_client import get_http_client
+from services.multipart import MultipartFile
+from services.proof_store import get_proof_store
 
 load_dotenv()
 
@@ -11,20 +15,27 @@ class ImageService:
     def __init__(self):
         self.meta_access_token = os.getenv("META_ACCESS_TOKEN")
         self.api_version = os.getenv("META_API_VERSION", "v19.0")
-        self.image_storage_path = "task_images"
+        self.graph_api_base = os.getenv("META_GRAPH_URL", "https://graph.facebook.com")
+        # Photos are stored once per content hash, see ProofStore
+        self.proof_store = get_proof_store()
+        self.image_storage_path = self.proof_store.root
         self.backend_api_url = os.getenv("BACKEND_API_URL")
         self.api_auth_token = os.getenv("API_AUTH_TOKEN")
-        os.makedirs(self.image_storage_path, exist_ok=True)
+        self.graph_http = get_http_client("graph")
+        self.backend_http = get_http_client("backend")
+        # Photos are streamed to disk in chunks, never held whole in memory
+        self.max_media_bytes = int(os.getenv("MEDIA_MAX_BYTES", 16 * 1024 * 1024))
+        self.download_chunk_size = int(os.getenv("MEDIA_CHUNK_SIZE", 64 * 1024))
 
     def download_meta_media(self, media_id, task_id, user_id):
         """Download media from Meta WhatsApp API"""
         try:
             # First, get the media URL
             headers = {"Authorization": f"Bearer {self.meta_access_token}"}
-            media_url = f"https://graph.facebook.com/{self.api_version}/{media_id}"
+            media_url = f"{self.graph_api_base}/{self.api_version}/{media_id}"
 
             # Get media information
-            response = requests.get(media_url, headers=headers)
+            response = self.graph_http.get(media_url, endpoint="media_info", headers=headers)
 
             if response.status_code != 200:
                 print(f"❌ Failed to get media info. Status: {response.status_code}")
@@ -37,71 +48,117 @@ class ImageService:
                 print(f"❌ No download URL in response: {media_info}")
                 return None
 
-            # Download the actual media
-            download_response = requests.get(download_url, headers=headers)
-
-            if download_response.status_code != 200:
-                print(
-                    f"❌ Failed to download media. Status: {download_response.status_code}"
-                )
+            file_size = media_info.get("file_size")
+            if file_size and int(file_size) > self.max_media_bytes:
+                print(f"❌ Media too large: {file_size} bytes (limit {self.max_media_bytes})")
                 return None
 
             # Determine file extension
             mime_type = media_info.get("mime_type", "image/jpeg")
             extension = mimetypes.guess_extension(mime_type) or ".jpg"
 
-            # Create filename
-            import datetime
+            # Download the actual media, streamed straight to disk
+            download_response = self.graph_http.get(
+                download_url, endpoint="media_download", headers=headers, stream=True
+            )
 
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"task_{task_id}_{timestamp}{extension}"
-            filepath = os.path.join(self.image_storage_path, filename)
+            try:
+                if download_response.status_code != 200:
+                    print(
+                        f"❌ Failed to download media. Status: {download_response.status_code}"
+                    )
+                    return None
 
-            # Save image locally
-            with open(filepath, "wb") as f:
-                f.write(download_response.content)
+                filepath = self._stream_to_store(download_response, extension)
+                if filepath is None:
+                    return None
+            finally:
+                download_response.close()
 
-            print(f"✅ Image saved: {filepath}")
+            print(f"✅ Image saved for task {task_id}: {filepath}")
             return filepath
 
         except Exception as e:
             print(f"❌ Error downloading Meta media: {e}")
             return None
 
-    def upload_to_backend(self, image_path, task_id, client_id):
+    def _stream_to_store(self, response, extension):
+        """Write a streamed response to the proof store via a temp file, returns the path or None if over the cap"""
+        content_length = response.headers.get("Content-Length")
+        if content_length and int(content_length) > self.max_media_bytes:
+            print(f"❌ Media too large: {content_length} bytes (limit {self.max_media_bytes})")
+            return None
+
+        fd, tmp_path = self.proof_store.temp_file()
+        digest = hashlib.sha256()
+        size = 0
+        too_large = False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=self.download_chunk_size):
+                    size += len(chunk)
+                    if size > self.max_media_bytes:
+                        too_large = True
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            if too_large:
+                print(f"❌ Media exceeded {self.max_media_bytes} bytes while downloading")
+                os.remove(tmp_path)
+                return None
+
+            # Named after the bytes, so a resent photo lands on the same file
+            return self.proof_store.commit(tmp_path, digest.hexdigest(), extension, size)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def upload_to_backend(self, image_path, task_id, client_id, mime_type=None, idempotency_key=None):
         """Upload image to your Node.js backend API"""
         try:
             print(f"📤 Uploading image to backend API for task {task_id}")
 
-            # Read image file
-            with open(image_path, "rb") as f:
-                image_data = f.read()
-
             # Get filename
             filename = os.path.basename(image_path)
 
-            # Prepare multipart form data - SIMPLIFIED version
-            files = {"task_completion_images": (filename, image_data, "image/jpeg")}
+            # The extension was chosen from the mime type Meta reported for the download
+            mime_type = mime_type or mimetypes.guess_type(image_path)[0] or "application/octet-stream"
+
+            # Multipart body streamed from the file, never read into memory
+            body = MultipartFile(
+                {"status": "completed"},  # Auto-complete the task
+                "task_completion_images",
+                image_path,
+                filename=filename,
+                content_type=mime_type,
+                chunk_size=self.download_chunk_size,
+            )
 
             # Headers for API authentication
             headers = {
                 "Authorization": f"Bearer {self.api_auth_token}",
                 "Client-ID": str(client_id),
+                "Content-Type": body.content_type,
             }
+            if idempotency_key:
+                # Same key on every retry of this photo for this task
+                headers["Idempotency-Key"] = idempotency_key
 
             # API endpoint for updating task
             api_url = f"{self.backend_api_url}/team/active-tasks/{task_id}"
 
             print(f"📤 Sending to API: {api_url}")
             print(f"📤 Headers: {headers}")
-            print(f"📤 File: {filename}")
+            print(f"📤 File: {filename} ({mime_type}, {body.file_size} bytes)")
 
             # Send to your Node.js backend
-            response = requests.put(
+            response = self.backend_http.put(
                 api_url,
-                files=files,
+                endpoint="task_upload",
+                data=body,
                 headers=headers,
-                data={"status": "completed"},  # Auto-complete the task
             )
 
             print(f"📤 Backend API response status: {response.status_code}")
@@ -0,0 +1,150 @@
+import re
+from collections import namedtuple
+
+Detection = namedtuple('Detection', ['language', 'confidence'])
+
+# Greeting/common-word vocabulary per language (was FreeTranslationService._keyword_detection)
+LANGUAGE_KEYWORDS = {
+    'hi': ['नमस्ते', 'धन्यवाद', 'कैसे', 'हैं', 'में', 'का', 'की', 'से', 'है', 'और', 'क्या', 'कर', 'यह', 'वह', 'तो'],
+    'es': ['hola', 'gracias', 'por favor', 'cómo', 'estás', 'buenos', 'días', 'noche', 'adiós', 'sí', 'no'],
+    'fr': ['bonjour', 'merci', 's\'il vous plaît', 'comment', 'ça va', 'oui', 'non', 'au revoir', 'madame', 'monsieur'],
+    'de': ['hallo', 'guten tag', 'danke', 'bitte', 'wie', 'geht', 'es', 'ihnen', 'ja', 'nein', 'tschüss'],
+    'it': ['ciao', 'buongiorno', 'grazie', 'per favore', 'come', 'sta', 'si', 'no', 'arrivederci'],
+    'pt': ['olá', 'bom dia', 'obrigado', 'por favor', 'como', 'está', 'sim', 'não', 'adeus'],
+    'ru': ['привет', 'здравствуйте', 'спасибо', 'пожалуйста', 'как', 'дела', 'да', 'нет', 'до свидания'],
+    'ja': ['こんにちは', 'ありがとう', 'お願いします', 'はい', 'いいえ', 'さようなら', 'おはよう'],
+    'ko': ['안녕하세요', '감사합니다', '부탁합니다', '네', '아니요', '안녕히 가세요'],
+    'ar': ['مرحبا', 'شكرا', 'من فضلك', 'كيف', 'الحال', 'نعم', 'لا', 'مع السلامة'],
+    'zh': ['你好', '谢谢', '请', '是的', '不是', '再见', '早上好'],
+    'mr': ['नमस्कार', 'धन्यवाद', 'कसे', 'आहे', 'मध्ये', 'चा', 'ची', 'पासून'],
+    'ta': ['வணக்கம்', 'நன்றி', 'தயவு செய்து', 'எப்படி', 'உள்ளது', 'ஆம்', 'இல்லை'],
+    'te': ['నమస్కారం', 'ధన్యవాదాలు', 'దయచేసి', 'ఎలా', 'ఉంది', 'అవును', 'కాదు'],
+    'kn': ['ನಮಸ್ಕಾರ', 'ಧನ್ಯವಾದ', 'ದಯವಿಟ್ಟು', 'ಹೇಗೆ', 'ಇದೆ', 'ಹೌದು', 'ಇಲ್ಲ'],
+    'ml': ['നമസ്കാരം', 'നന്ദി', 'ദയവായി', 'എങ്ങനെ', 'ആണ്', 'അതെ', 'ഇല്ല'],
+    'bn': ['নমস্কার', 'ধন্যবাদ', 'দয়া করে', 'কেমন', 'আছে', 'হ্যাঁ', 'না'],
+    'gu': ['નમસ્તે', 'આભાર', 'કૃપા કરીને', 'કેવી રીતે', 'છે', 'હા', 'ના'],
+    'pa': ['ਸਤ ਸ੍ਰੀ ਅਕਾਲ', 'ਧੰਨਵਾਦ', 'ਕ੍ਰਿਪਾ ਕਰਕੇ', 'ਕਿਵੇਂ', 'ਹੈ', 'ਹਾਂ', 'ਨਹੀਂ'],
+    'ur': ['سلام', 'شکریہ', 'براہ کرم', 'کیسے', 'ہے', 'جی ہاں', 'نہیں']
+}
+
+# Letter ranges per script; each run of one script is a single regex match
+SCRIPT_CLASSES = [
+    ('latin', 'a-zA-Z\u00c0-\u024f'),
+    ('cyrillic', '\u0400-\u04ff'),
+    ('arabic', '\u0600-\u06ff'),
+    ('devanagari', '\u0900-\u097f'),
+    ('bengali', '\u0980-\u09ff'),
+    ('gurmukhi', '\u0a00-\u0a7f'),
+    ('gujarati', '\u0a80-\u0aff'),
+    ('tamil', '\u0b80-\u0bff'),
+    ('telugu', '\u0c00-\u0c7f'),
+    ('kannada', '\u0c80-\u0cff'),
+    ('malayalam', '\u0d00-\u0d7f'),
+    ('kana', '\u3040-\u30ff'),
+    ('han', '\u4e00-\u9fff'),
+    ('hangul', '\uac00-\ud7af'),
+]
+SCRIPT_NAMES = [name for name, _ in SCRIPT_CLASSES]
+SCRIPT_RUNS = re.compile('|'.join(f"([{chars}]+)" for _, chars in SCRIPT_CLASSES))
+
+# Scripts that identify a single language on their own
+SCRIPT_LANGUAGES = {
+    'bengali': 'bn', 'gurmukhi': 'pa', 'gujarati': 'gu', 'tamil': 'ta', 'telugu': 'te',
+    'kannada': 'kn', 'malayalam': 'ml', 'cyrillic': 'ru', 'hangul': 'ko', 'kana': 'ja',
+}
+# Scripts shared by several languages: keywords decide, else the first one
+SHARED_SCRIPTS = {'devanagari': ['hi', 'mr'], 'arabic': ['ar', 'ur'], 'han': ['zh', 'ja']}
+
+# Letters used by Urdu but not Arabic (ٹ ڈ ڑ ں ھ ہ ۃ ی ے)
+URDU_LETTERS = frozenset('ٹڈڑںھہۃیے')
+
+# Indic and Arabic vowel signs are not \w, so they need to count as "inside a word" too
+_WORD_CHARS = r'\w\u0900-\u0DFF\u064B-\u065F\u0670'
+
+
+class LanguageDetector:
+    """Single-pass keyword + script detector with a confidence score.
+
+    All keywords are compiled into one alternation with word-boundary
+    lookarounds, so 'no' no longer matches inside 'now' and the cost does
+    not grow with the vocabulary. A keyword shared by several languages
+    splits its weight between them, and one- or two-letter keywords only
+    count for a quarter. Non-Latin text is classified from a histogram of
+    the scripts its letters belong to.
+    """
+
+    SHORT_KEYWORD_WEIGHT = 0.25
+
+    def __init__(self, keywords=LANGUAGE_KEYWORDS):
+        owners = {}
+        for language, words in keywords.items():
+            for word in words:
+                owners.setdefault(word.lower(), []).append(language)
+
+        self._weights = {}
+        for word, languages in owners.items():
+            weight = 1.0 / len(languages)
+            if len(word) <= 2:
+                weight *= self.SHORT_KEYWORD_WEIGHT
+            self._weights[word] = [(language, weight) for language in languages]
+
+        alternation = '|'.join(re.escape(word) for word in sorted(owners, key=len, reverse=True))
+        self._pattern = re.compile(f"(?<![{_WORD_CHARS}])(?:{alternation})(?![{_WORD_CHARS}])")
+
+    def detect(self, text):
+        """Detection(language, confidence); language is None if nothing matched"""
+        if not text:
+            return Detection(None, 0.0)
+        text = text.lower()
+
+        scores = {}
+        for word in self._pattern.findall(text):
+            for language, weight in self._weights[word]:
+                scores[language] = scores.get(language, 0.0) + weight
+
+        script, share = self._dominant_script(text)
+
+        if script in SCRIPT_LANGUAGES:
+            return Detection(SCRIPT_LANGUAGES[script], round(share, 3))
+
+        if script in SHARED_SCRIPTS:
+            candidates = SHARED_SCRIPTS[script]
+            if script == 'arabic' and not URDU_LETTERS.isdisjoint(text):
+                scores['ur'] = scores.get('ur', 0.0) + 1.0
+            # Ties go to the first (most common) language of the script
+            language = max(candidates, key=lambda code: (scores.get(code, 0.0), -candidates.index(code)))
+            return Detection(language, round(share * self._keyword_confidence(scores, candidates), 3))
+
+        # Latin or no letters: only keywords can tell
+        latin = [code for code in scores if code in ('es', 'fr', 'de', 'it', 'pt')]
+        if not latin:
+            return Detection(None, 0.0)
+        language = max(latin, key=scores.get)
+        return Detection(language, round(self._keyword_confidence(scores, latin), 3))
+
+    @staticmethod
+    def _keyword_confidence(scores, candidates):
+        """Best score against the runner-up, with a prior so one weak hit stays unsure"""
+        ranked = sorted((scores.get(code, 0.0) for code in candidates), reverse=True) + [0.0, 0.0]
+        best, second = ranked[0], ranked[1]
+        return 0.5 + 0.5 * best / (best + second + 0.5) if best else 0.5
+
+    @staticmethod
+    def _dominant_script(text):
+        """(script, share of letters) from one pass over the text"""
+        histogram = {}
+        for run in SCRIPT_RUNS.finditer(text):
+            script = SCRIPT_NAMES[run.lastindex - 1]
+            histogram[script] = histogram.get(script, 0) + run.end() - run.start()
+        if not histogram:
+            return None, 0.0
+
+        letters = sum(histogram.values())
+        # Kanji next to kana is Japanese, not Chinese
+        if 'kana' in histogram and 'han' in histogram:
+            histogram['kana'] += histogram.pop('han')
+        non_latin = [(count, script) for script, count in histogram.items() if script != 'latin']
+        if non_latin:
+            count, script = max(non_latin)
+            return script, count / letters
+        return 'latin', 1.0
@@ -1,14 +1,19 @@
 from services.free_translation_service import FreeTranslationService
 import logging
+import threading
 
 class LanguageService:
     def __init__(self):
         self.translation_service = FreeTranslationService()
         self.logger = logging.getLogger(__name__)
 
-    def detect_language(self, text):
-        """Detect language of the input text"""
-        return self.translation_service.detect_language(text)
+    def detect_language(self, text, on_refined=None):
+        """Detect language of the input text (locally; see FreeTranslationService)"""
+        return self.translation_service.detect_language(text, on_refined)
+
+    def detect_language_with_confidence(self, text):
+        """Local-only detection returning (language, confidence)"""
+        return self.translation_service.detect_language_with_confidence(text)
 
     def translate_text(self, text, target_language='en', source_language='auto'):
         """Translate text using free services"""
@@ -20,4 +25,17 @@ class LanguageService:
 
     def is_language_supported(self, language_code):
         """Check if language is supported"""
-        return self.translation_service.is_language_supported(language_code)
\ No newline at end of file
+        return self.translation_service.is_language_supported(language_code)
+
+
+_language_service = None
+_language_service_lock = threading.Lock()
+
+
+def get_language_service():
+    """The LanguageService shared by every other service"""
+    global _language_service
+    with _language_service_lock:
+        if _language_service is None:
+            _language_service = LanguageService()
+        return _language_service
@@ -0,0 +1,336 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+from utils.metrics import Counters, LatencyStats
+
+# Job stages, in order; a job resumes from the one it reached before a restart
+QUEUED = 'queued'
+DOWNLOADED = 'downloaded'
+DONE = 'done'
+FAILED = 'failed'
+
+STAGES = ('download', 'upload', 'attach', 'notify')
+
+JOB_FIELDS = ('id', 'media_id', 'task_id', 'member_id', 'client_id', 'phone_number', 'language',
+              'stage', 'image_path', 'outcome', 'error', 'created_at', 'updated_at')
+
+
+class MediaPipeline:
+    """Background download -> upload -> attach -> notify for task photos.
+
+    ``submit(job)`` records the job in a SQLite table and hands it to a
+    bounded worker pool, so the webhook thread can acknowledge the photo
+    straight away. The stage callables get the job dict:
+
+    - ``download(job)`` returns the local image path or None
+    - ``upload(job)`` returns the backend filename or None; it sets
+      ``job['spooled']`` when the upload was queued for a later retry
+    - ``attach(job)`` (fallback when the upload failed and was not
+      spooled) returns True/False
+    - ``notify(job)`` sends the final confirmation; ``job['outcome']`` is
+      'uploaded', 'spooled', 'attached', 'download_failed',
+      'attach_failed' or 'error'
+
+    The stage reached is saved after each step. Jobs that were queued or
+    downloaded when the process stopped are resumed on ``start()``; a
+    downloaded photo is not fetched from Meta again. Each job row records
+    the pid and a per-start token of the run that owns it, and ``start()``
+    only takes over rows whose owner is gone, so two processes sharing the
+    table (e.g. under the Werkzeug reloader) never run the same job, while
+    a restart that gets the same pid (pid 1 in a container) still resumes
+    its own unfinished jobs. Unfinished jobs not touched for
+    ``max_job_age`` seconds are failed as 'expired' instead. The same
+    media id is only accepted once.
+    """
+
+    def __init__(self, download, upload, attach, notify, num_workers=2, max_queue=100,
+                 db_path='data/media_jobs.sqlite3', retention_seconds=7 * 86400, max_job_age=86400):
+        self.stages = {'download': download, 'upload': upload, 'attach': attach, 'notify': notify}
+        self.num_workers = max(1, int(num_workers))
+        self.max_queue = max(1, int(max_queue))
+        self.db_path = db_path
+        self.retention_seconds = retention_seconds
+        self.max_job_age = max_job_age
+        self.logger = logging.getLogger(__name__)
+
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._threads = []
+        self._running = False
+        self._db = None
+        self._db_lock = threading.Lock()
+        # Owner token of this run, set by start()
+        self._owner = None
+
+        self.counters = Counters('submitted', 'duplicates', 'rejected', 'resumed', 'expired', 'done', 'failed')
+        self.stage_counters = {stage: Counters('ok', 'failed') for stage in STAGES}
+        self.stage_latency = {stage: LatencyStats() for stage in STAGES}
+        self.job_latency = LatencyStats()
+
+    def start(self):
+        """Open the job table, start the workers and resume unfinished jobs"""
+        if self._running:
+            return
+        self._open_db()
+        self._owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        self._running = True
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker, name=f"media-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._resume()
+        self.logger.info(f"✅ Media pipeline started with {self.num_workers} workers")
+
+    def stop(self, timeout=5):
+        """Stop the workers; unfinished jobs stay in the table for the next start"""
+        self._running = False
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def submit(self, job):
+        """Record and queue a job. False if not running or full; a repeated media id counts as queued."""
+        if not self._running:
+            return False
+        if self._queue.full():
+            self.counters.incr('rejected')
+            return False
+
+        job = dict(job, stage=QUEUED, image_path=None, outcome=None, error=None)
+        if not self._insert(job):
+            self.counters.incr('duplicates')
+            self.logger.info(f"🔁 Media {job['media_id']} already in the pipeline")
+            return True
+
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._delete(job['id'])
+            self.counters.incr('rejected')
+            return False
+        self.counters.incr('submitted')
+        return True
+
+    def run_inline(self, job):
+        """Run every stage on the calling thread (pipeline disabled or full)"""
+        self._process(dict(job, stage=QUEUED, image_path=None, outcome=None, error=None, id=None))
+
+    def get_stats(self):
+        with self._db_lock:
+            by_stage = dict(self._db.execute(
+                "SELECT stage, COUNT(*) FROM media_jobs GROUP BY stage"
+            ).fetchall()) if self._db is not None else {}
+        return {
+            "running": self._running,
+            "workers": self.num_workers,
+            "depth": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "jobs_by_stage": by_stage,
+            "counters": self.counters.snapshot(),
+            "stages": {
+                stage: {"counters": self.stage_counters[stage].snapshot(),
+                        "latency": self.stage_latency[stage].snapshot()}
+                for stage in STAGES
+            },
+            "job_latency": self.job_latency.snapshot(),
+        }
+
+    def _worker(self):
+        while self._running:
+            job = self._queue.get()
+            if job is None:
+                break
+            try:
+                self._process(job)
+            except Exception as e:
+                self.logger.error(f"❌ Media job {job.get('id')} crashed: {e}")
+                job['outcome'] = 'error'
+                self._run_stage('notify', job)
+                self._save(job, stage=FAILED, error=str(e))
+                self.counters.incr('failed')
+
+    def _process(self, job):
+        started = time.perf_counter()
+
+        if job['stage'] == QUEUED:
+            image_path = self._run_stage('download', job)
+            if not image_path:
+                self._finish(job, 'download_failed', started)
+                return
+            self._save(job, stage=DOWNLOADED, image_path=image_path)
+
+        if job.get('client_id') and self._run_stage('upload', job):
+            self._finish(job, 'uploaded', started)
+        elif job.get('spooled'):
+            # The spool delivers it; a direct attach now would give the task a second proof row
+            self._finish(job, 'spooled', started)
+        elif self._run_stage('attach', job):
+            self._finish(job, 'attached', started)
+        else:
+            self._finish(job, 'attach_failed', started)
+
+    def _run_stage(self, stage, job):
+        started = time.perf_counter()
+        try:
+            result = self.stages[stage](job)
+        except Exception as e:
+            self.logger.error(f"❌ Media stage {stage} failed for job {job.get('id')}: {e}")
+            job['error'] = f"{stage}: {e}"
+            result = None
+        self.stage_latency[stage].record(time.perf_counter() - started)
+        self.stage_counters[stage].incr('ok' if result else 'failed')
+        return result
+
+    def _finish(self, job, outcome, started):
+        job['outcome'] = outcome
+        self._run_stage('notify', job)
+        ok = outcome in ('uploaded', 'spooled', 'attached')
+        self._save(job, stage=DONE if ok else FAILED, outcome=outcome)
+        self.counters.incr('done' if ok else 'failed')
+        self.job_latency.record(time.perf_counter() - started)
+
+    def _open_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Shared with other processes (reloader parent/child) that may be writing
+        self._db = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS media_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                media_id TEXT NOT NULL UNIQUE,
+                task_id INTEGER NOT NULL,
+                member_id INTEGER,
+                client_id TEXT,
+                phone_number TEXT NOT NULL,
+                language TEXT,
+                stage TEXT NOT NULL,
+                image_path TEXT,
+                outcome TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(media_jobs)")}
+        if 'owner_pid' not in columns:
+            self._db.execute("ALTER TABLE media_jobs ADD COLUMN owner_pid INTEGER")
+        if 'owner' not in columns:
+            self._db.execute("ALTER TABLE media_jobs ADD COLUMN owner TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_media_jobs_stage ON media_jobs (stage)")
+        # Finished jobs are only kept for inspection
+        self._db.execute(
+            "DELETE FROM media_jobs WHERE stage IN (?, ?) AND updated_at < ?",
+            (DONE, FAILED, time.time() - self.retention_seconds),
+        )
+        self._db.commit()
+
+    def _resume(self):
+        self._expire()
+        with self._db_lock:
+            rows = self._db.execute(
+                f"SELECT owner_pid, owner, {', '.join(JOB_FIELDS)} FROM media_jobs "
+                "WHERE stage IN (?, ?) ORDER BY id",
+                (QUEUED, DOWNLOADED),
+            ).fetchall()
+        for row in rows:
+            owner_pid, owner, job = row[0], row[1], dict(zip(JOB_FIELDS, row[2:]))
+            # Submitted by this run since start(): already queued
+            if owner == self._owner:
+                continue
+            # Our own pid with another token is an earlier run of this process;
+            # any other live pid is another process still working on the job
+            if owner_pid is not None and owner_pid != os.getpid() and _pid_alive(owner_pid):
+                continue
+            if self._queue.full():
+                # Left in the table for the next start
+                self.logger.warning("Media pipeline full while resuming jobs")
+                break
+            if not self._claim(job['id'], owner):
+                continue
+            self._queue.put_nowait(job)
+            self.counters.incr('resumed')
+        if rows:
+            self.logger.info(f"🔁 Resumed {self.counters.get('resumed')} media jobs")
+
+    def _expire(self):
+        """Fail unfinished jobs nobody has worked on for max_job_age seconds"""
+        if not self.max_job_age:
+            return
+        now = time.time()
+        with self._db_lock:
+            cursor = self._db.execute(
+                "UPDATE media_jobs SET stage = ?, outcome = 'expired', error = 'not finished in time', "
+                "updated_at = ? WHERE stage IN (?, ?) AND updated_at < ?",
+                (FAILED, now, QUEUED, DOWNLOADED, now - self.max_job_age),
+            )
+            self._db.commit()
+        if cursor.rowcount:
+            self.counters.incr('expired', cursor.rowcount)
+            self.logger.warning(f"⚠️ Expired {cursor.rowcount} unfinished media jobs")
+
+    def _claim(self, job_id, previous_owner):
+        """Take over a job row unless another process claimed it first"""
+        with self._db_lock:
+            cursor = self._db.execute(
+                "UPDATE media_jobs SET owner_pid = ?, owner = ? WHERE id = ? AND owner IS ?",
+                (os.getpid(), self._owner, job_id, previous_owner),
+            )
+            self._db.commit()
+        return cursor.rowcount == 1
+
+    def _insert(self, job):
+        """Store a new job and set job['id']; False if the media id is already known"""
+        now = time.time()
+        with self._db_lock:
+            try:
+                cursor = self._db.execute(
+                    "INSERT INTO media_jobs (media_id, task_id, member_id, client_id, phone_number, language, "
+                    "stage, owner_pid, owner, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job['media_id'], job['task_id'], job.get('member_id'), job.get('client_id'),
+                     job['phone_number'], job.get('language'), QUEUED, os.getpid(), self._owner, now, now),
+                )
+            except sqlite3.IntegrityError:
+                return False
+            self._db.commit()
+        job['id'] = cursor.lastrowid
+        job['created_at'] = job['updated_at'] = now
+        return True
+
+    def _save(self, job, **changes):
+        job.update(changes)
+        if job.get('id') is None or self._db is None:
+            return
+        job['updated_at'] = time.time()
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE media_jobs SET stage = ?, image_path = ?, outcome = ?, error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (job['stage'], job.get('image_path'), job.get('outcome'), job.get('error'),
+                 job['updated_at'], job['id']),
+            )
+            self._db.commit()
+
+    def _delete(self, job_id):
+        with self._db_lock:
+            self._db.execute("DELETE FROM media_jobs WHERE id = ?", (job_id,))
+            self._db.commit()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import string
+
+DEFAULT_LANGUAGE = 'en'
+I18N_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'i18n')
+CATALOG_DIR = os.path.join(I18N_DIR, 'messages')
+# Output of ``python -m i18n.build_catalogs``: manifest.json + <version>/<lang>.json
+BUILD_DIR = os.path.join(I18N_DIR, 'catalogs')
+MANIFEST = 'manifest.json'
+
+
+def source_hash(text):
+    """Fingerprint of an English source string, to spot stale translations"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class MessageCatalog:
+    """All canned bot messages, loaded once from ``i18n/messages/<lang>.json``.
+
+    English is the master catalog. Every other language is merged over it at
+    load time, so a key missing from a translation already resolves to the
+    English text and lookups never need an ``or "..."`` fallback. Templates
+    with ``{}`` fields keep a bound ``str.format``; plain strings are
+    returned as-is.
+
+    Pretranslated catalogs from ``build_dir`` sit between the two layers:
+    hand-written messages win over them, and a built string whose English
+    source has changed since the build is dropped in favour of English.
+    """
+
+    def __init__(self, directory=CATALOG_DIR, default_language=DEFAULT_LANGUAGE, build_dir=BUILD_DIR):
+        self.directory = directory
+        self.default_language = default_language
+        self.build_dir = build_dir
+        self.version = None
+        self.logger = logging.getLogger(__name__)
+        self._messages = {}
+        self._formatters = {}
+        self.load()
+
+    def load(self):
+        raw = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith('.json'):
+                with open(os.path.join(self.directory, filename), encoding='utf-8') as f:
+                    raw[filename[:-len('.json')]] = json.load(f)
+
+        if self.default_language not in raw:
+            raise ValueError(f"Missing master catalog {self.default_language}.json in {self.directory}")
+
+        master = raw[self.default_language]
+        built = self._load_build(master)
+        messages = {}
+        formatters = {}
+        for language in sorted(set(raw) | set(built), key=lambda code: code != self.default_language):
+            entries = {**built.get(language, {}), **raw.get(language, {})}
+            unknown = set(entries) - set(master)
+            if unknown:
+                self.logger.warning(f"⚠️ Catalog {language} has keys not in {self.default_language}: {sorted(unknown)}")
+            missing = set(master) - set(entries)
+            if missing:
+                self.logger.info(f"Catalog {language} falls back to {self.default_language} for {len(missing)} keys")
+
+            resolved = {**master, **entries}
+            messages[language] = resolved
+            formatters[language] = {
+                key: text.format for key, text in resolved.items() if self._has_fields(text)
+            }
+
+        self._messages = messages
+        self._formatters = formatters
+
+    def _load_build(self, master):
+        """{language: entries} from the current pretranslated build, if any"""
+        manifest_path = os.path.join(self.build_dir or '', MANIFEST)
+        if not self.build_dir or not os.path.exists(manifest_path):
+            return {}
+        built = {}
+        stale = 0
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            version_dir = os.path.join(self.build_dir, manifest['version'])
+            for language in manifest['languages']:
+                with open(os.path.join(version_dir, f"{language}.json"), encoding='utf-8') as f:
+                    data = json.load(f)
+                hashes = data['source_hashes']
+                entries = {}
+                for key, text in data['messages'].items():
+                    if key in master and hashes.get(key) == source_hash(master[key]):
+                        entries[key] = text
+                    else:
+                        stale += 1
+                built[language] = entries
+        except (OSError, ValueError, KeyError) as e:
+            # Hand-written catalogs still work, don't take the bot down
+            self.logger.error(f"❌ Could not load catalog build from {self.build_dir}: {e}")
+            return {}
+
+        self.version = manifest['version']
+        if stale:
+            self.logger.warning(f"⚠️ Catalog build {self.version} has {stale} stale strings, rerun i18n.build_catalogs")
+        return built
+
+    @property
+    def languages(self):
+        return list(self._messages)
+
+    def fallback_languages(self, languages):
+        """Codes among ``languages`` with no catalog, whose messages are sent in English"""
+        return sorted(code for code in languages if code not in self._messages)
+
+    def report_fallbacks(self, languages):
+        """Log the languages that have neither a hand-written nor a built catalog"""
+        fallback = self.fallback_languages(languages)
+        if fallback:
+            self.logger.warning(
+                f"⚠️ No message catalog for {', '.join(fallback)}: members using these languages get "
+                f"{self.default_language} messages. Run python -m i18n.build_catalogs to pretranslate them."
+            )
+        else:
+            self.logger.info(f"Message catalogs loaded for {', '.join(self.languages)} (build {self.version})")
+        return fallback
+
+    def get_stats(self, languages=()):
+        return {
+            "version": self.version,
+            "languages": self.languages,
+            "fallback_languages": self.fallback_languages(languages),
+        }
+
+    def get(self, key, language=DEFAULT_LANGUAGE, default=None):
+        """Message text for a key, in the language or the default one"""
+        messages = self._messages.get(language) or self._messages[self.default_language]
+        text = messages.get(key)
+        if text is None:
+            if default is not None:
+                return default
+            self.logger.error(f"❌ Unknown message key: {key}")
+            return key
+        return text
+
+    def format(self, key, language=DEFAULT_LANGUAGE, *args, **kwargs):
+        """Message text with its ``{}`` fields filled in"""
+        formatters = self._formatters.get(language)
+        if formatters is None:
+            formatters = self._formatters[self.default_language]
+        formatter = formatters.get(key)
+        if formatter is None:
+            return self.get(key, language)
+        return formatter(*args, **kwargs)
+
+    @staticmethod
+    def _has_fields(text):
+        return any(field is not None for _, field, _, _ in string.Formatter().parse(text))
+
+
+catalog = MessageCatalog()
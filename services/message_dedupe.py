@@ -0,0 +1,125 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.metrics import Counters
+
+
+class MessageDeduplicator:
+    """Remembers inbound WhatsApp message ids to drop Meta redeliveries.
+
+    Ids live in a bounded in-memory TTL set. When ``db_path`` is given they
+    are also recorded in a local SQLite table, so a redelivery arriving after
+    a restart (or after the id was evicted from memory) is still caught.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, ttl_seconds=86400, max_entries=100000, db_path=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._db = None
+
+        self.counters = Counters('hits', 'misses', 'evicted')
+
+        if db_path:
+            self._open_db()
+
+    def is_duplicate(self, message_id):
+        """Return True if this id was already seen, otherwise record it"""
+        if not message_id:
+            return False
+
+        now = time.time()
+        with self._lock:
+            expires_at = self._seen.get(message_id)
+            if expires_at is not None and expires_at > now:
+                self.counters.incr('hits')
+                return True
+
+            if self._db is not None and not self._db_insert(message_id, now):
+                self._remember(message_id, now)
+                self.counters.incr('hits')
+                return True
+
+            self._remember(message_id, now)
+            self.counters.incr('misses')
+            return False
+
+    def get_stats(self):
+        counters = self.counters.snapshot()
+        lookups = counters['hits'] + counters['misses']
+        return {
+            "entries": len(self._seen),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "durable": self._db is not None,
+            "hit_rate": round(counters['hits'] / lookups, 4) if lookups else 0.0,
+            "counters": counters,
+        }
+
+    def _remember(self, message_id, now):
+        self._seen[message_id] = now + self.ttl_seconds
+        self._seen.move_to_end(message_id)
+
+        # Drop expired ids from the front, then enforce the size bound
+        while self._seen:
+            _, oldest_expiry = next(iter(self._seen.items()))
+            if oldest_expiry > now and len(self._seen) <= self.max_entries:
+                break
+            self._seen.popitem(last=False)
+            self.counters.incr('evicted')
+
+    def _open_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS processed_messages (
+                message_id TEXT PRIMARY KEY,
+                seen_at REAL NOT NULL
+            )
+        """)
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_processed_messages_seen_at ON processed_messages (seen_at)"
+        )
+        self._db.commit()
+        self._purge_db(time.time())
+
+    def _db_insert(self, message_id, now):
+        """Record the id on disk. Returns False if it was already there."""
+        try:
+            row = self._db.execute(
+                "SELECT seen_at FROM processed_messages WHERE message_id = ?", (message_id,)
+            ).fetchone()
+            if row and row[0] > now - self.ttl_seconds:
+                return False
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO processed_messages (message_id, seen_at) VALUES (?, ?)",
+                (message_id, now),
+            )
+            self._inserts += 1
+            if self._inserts % self.PURGE_EVERY == 0:
+                self._purge_db(now)
+            self._db.commit()
+        except sqlite3.Error as e:
+            # The in-memory set still protects us, don't block processing
+            self.logger.error(f"Dedupe store error: {e}")
+        return True
+
+    def _purge_db(self, now):
+        self._db.execute(
+            "DELETE FROM processed_messages WHERE seen_at < ?", (now - self.ttl_seconds,)
+        )
+        self._db.commit()
@@ -0,0 +1,58 @@
+import os
+import uuid
+
+
+class MultipartFile:
+    """``multipart/form-data`` body that streams one file from disk.
+
+    Only the part headers are built in memory; the file is read in
+    ``chunk_size`` pieces into one reused buffer while the request is being
+    sent. ``len()`` is the exact body size, so requests sends a
+    Content-Length header instead of chunked encoding. Iterate it once per
+    request; a retry needs a new instance.
+    """
+
+    def __init__(self, fields, file_field, file_path, filename=None,
+                 content_type="application/octet-stream", chunk_size=64 * 1024):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex
+        self.file_size = os.path.getsize(file_path)
+
+        filename = filename or os.path.basename(file_path)
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f'{value}\r\n'
+            )
+        parts.append(
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        )
+        self._head = ''.join(parts).encode('utf-8')
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return len(self._head) + self.file_size + len(self._tail)
+
+    def __iter__(self):
+        yield self._head
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        remaining = self.file_size
+        with open(self.file_path, 'rb') as f:
+            while remaining:
+                read = f.readinto(view[:min(self.chunk_size, remaining)])
+                if not read:
+                    raise IOError(f"{self.file_path} shrank while uploading, {remaining} bytes missing")
+                remaining -= read
+                # The socket write finishes before the next readinto reuses the buffer
+                yield view[:read]
+        yield self._tail
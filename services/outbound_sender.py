@@ -0,0 +1,326 @@
+import heapq
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+
+from services.http_client import get_http_client
+from utils.metrics import Counters, LatencyStats
+
+# Graph API answers that mean "try again later" rather than "this message is bad"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Outbound lanes: replies to someone using the bot vs reminder fan-out
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+LANES = (INTERACTIVE, BULK)
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, up to ``capacity``"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, reserve=0):
+        """Take one token, sleeping until one is available.
+
+        With ``reserve`` the caller only gets a token while more than
+        ``reserve`` tokens are left, keeping that headroom for others.
+        """
+        needed = 1 + reserve
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= 1
+                    return
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _OutboundMessage:
+    def __init__(self, sender_id, url, headers, body, lane):
+        self.sender_id = sender_id
+        self.lane = lane
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.future = Future()
+        self.attempts = 0
+        self.enqueued_at = time.perf_counter()
+
+
+class OutboundSender:
+    """Rate-limited worker pool for Graph API message sends.
+
+    Each sending phone number id gets its own token bucket so we stay under
+    Meta's per-number throughput. 429 and 5xx answers (and network errors)
+    are retried with exponential backoff plus jitter, honouring Retry-After
+    when Meta sends one. ``submit()`` returns a Future resolving to the final
+    ``requests.Response``, or None if the message was dropped.
+
+    Messages go to the interactive or the bulk lane. Interactive messages
+    are always taken first, ``reserved_workers`` workers never touch bulk
+    messages, and bulk sends leave ``reserved_tokens`` in each bucket, so a
+    reminder blast cannot delay the reply to someone tapping a button.
+
+    A caller that stops waiting may cancel the future; a cancelled message
+    still queued or waiting for a retry is dropped instead of sent late.
+    ``stop()`` resolves every message it did not send to None.
+    """
+
+    def __init__(self, rate_per_second=20, burst=20, num_workers=4, max_queue=1000,
+                 max_retries=4, backoff_base=0.5, backoff_max=30,
+                 reserved_workers=1, reserved_tokens=4, bulk_max_queue=5000):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.num_workers = num_workers
+        self.reserved_workers = max(0, min(reserved_workers, num_workers - 1))
+        self.reserved_tokens = max(0, min(reserved_tokens, burst - 1))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http = get_http_client('graph')
+        self.logger = logging.getLogger(__name__)
+
+        self._lanes = {INTERACTIVE: deque(), BULK: deque()}
+        self._lane_limits = {INTERACTIVE: max_queue, BULK: bulk_max_queue}
+        self._lanes_cond = threading.Condition()
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+
+        self._retries = []  # heap of (due_at, sequence, message)
+        self._retry_sequence = 0
+        self._retry_cond = threading.Condition()
+
+        self._threads = []
+        self._running = False
+        self._stopped = False
+
+        self.counters = Counters('queued', 'sent', 'failed', 'retried', 'dropped', 'throttled', 'abandoned')
+        self.latency = {lane: LatencyStats() for lane in LANES}
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._stopped = False
+        for i in range(self.num_workers):
+            # The first reserved_workers only ever send interactive messages
+            take_bulk = i >= self.reserved_workers
+            thread = threading.Thread(
+                target=self._worker, args=(take_bulk,), name=f"outbound-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        retry_thread = threading.Thread(target=self._retry_loop, name="outbound-retry", daemon=True)
+        retry_thread.start()
+        self._threads.append(retry_thread)
+        self.logger.info(f"✅ Outbound sender started with {self.num_workers} workers "
+                         f"({self.reserved_workers} reserved for interactive)")
+
+    def stop(self):
+        """Stop the workers and resolve every unsent message to None"""
+        self._running = False
+        with self._retry_cond:
+            self._retry_cond.notify_all()
+        with self._lanes_cond:
+            self._stopped = True
+            self._lanes_cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+        with self._lanes_cond:
+            unsent = [message for items in self._lanes.values() for message in items]
+            for items in self._lanes.values():
+                items.clear()
+        with self._retry_cond:
+            unsent += [message for _, _, message in self._retries]
+            self._retries = []
+        for message in unsent:
+            self._resolve(message, None)
+        if unsent:
+            self.counters.incr('dropped', len(unsent))
+            self.logger.warning(f"⚠️ Outbound sender stopped with {len(unsent)} unsent messages")
+
+    def submit(self, sender_id, url, headers, body, lane=INTERACTIVE):
+        """Queue one Graph API POST; returns a Future of the final response"""
+        message = _OutboundMessage(sender_id, url, headers, body, lane)
+        if not self._enqueue(message):
+            self.logger.error(f"❌ Outbound {lane} lane full or sender stopped, dropping message")
+            return message.future
+        self.counters.incr('queued')
+        return message.future
+
+    def get_stats(self):
+        with self._retry_cond:
+            retrying = len(self._retries)
+        with self._lanes_cond:
+            depths = {lane: len(items) for lane, items in self._lanes.items()}
+        return {
+            "workers": self.num_workers,
+            "reserved_workers": self.reserved_workers,
+            "rate_per_second": self.rate_per_second,
+            "reserved_tokens": self.reserved_tokens,
+            "retrying": retrying,
+            "counters": self.counters.snapshot(),
+            "lanes": {
+                lane: {"depth": depths[lane], "latency": self.latency[lane].snapshot()}
+                for lane in LANES
+            },
+        }
+
+    def _enqueue(self, message):
+        with self._lanes_cond:
+            items = self._lanes[message.lane]
+            if self._stopped or len(items) >= self._lane_limits[message.lane]:
+                self.counters.incr('dropped')
+                self._resolve(message, None)
+                return False
+            items.append(message)
+            # Wake everyone: a bulk message is useless to an interactive-only worker
+            self._lanes_cond.notify_all()
+            return True
+
+    def _next_message(self, take_bulk):
+        """Block for the next message, interactive lane first"""
+        with self._lanes_cond:
+            while self._running:
+                if self._lanes[INTERACTIVE]:
+                    return self._lanes[INTERACTIVE].popleft()
+                if take_bulk and self._lanes[BULK]:
+                    return self._lanes[BULK].popleft()
+                self._lanes_cond.wait()
+            return None
+
+    def _bucket(self, sender_id):
+        bucket = self._buckets.get(sender_id)
+        if bucket is None:
+            with self._buckets_lock:
+                bucket = self._buckets.setdefault(sender_id, TokenBucket(self.rate_per_second, self.burst))
+        return bucket
+
+    def _worker(self, take_bulk):
+        while self._running:
+            message = self._next_message(take_bulk)
+            if message is None:
+                break
+            if message.future.cancelled():
+                # The caller gave up waiting; sending now would only arrive late
+                self.counters.incr('abandoned')
+                continue
+            try:
+                self._send(message)
+            except Exception as e:
+                self.logger.error(f"❌ Outbound worker error: {e}")
+                self._resolve(message, None)
+
+    def _send(self, message):
+        import requests  # lazy like HttpClient; a dict lookup after the first send
+
+        reserve = self.reserved_tokens if message.lane == BULK else 0
+        self._bucket(message.sender_id).acquire(reserve)
+        message.attempts += 1
+
+        try:
+            if isinstance(message.body, bytes):
+                # Pre-encoded template payload, already JSON
+                response = self.http.post(message.url, endpoint='messages', headers=message.headers, data=message.body)
+            else:
+                response = self.http.post(message.url, endpoint='messages', headers=message.headers, json=message.body)
+        except requests.RequestException as e:
+            self.logger.warning(f"⚠️ Graph send failed ({e}), attempt {message.attempts}")
+            self._retry_or_fail(message, None, None)
+            return
+
+        if response.status_code in RETRYABLE_STATUS:
+            if response.status_code == 429:
+                self.counters.incr('throttled')
+            self._retry_or_fail(message, response, response.headers.get('Retry-After'))
+            return
+
+        self.counters.incr('sent' if response.status_code == 200 else 'failed')
+        self._finish(message, response)
+
+    def _retry_or_fail(self, message, response, retry_after):
+        if message.attempts > self.max_retries or not self._running:
+            self.counters.incr('failed')
+            self._finish(message, response)
+            return
+
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (message.attempts - 1)))
+        delay = random.uniform(0, delay)  # full jitter
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+
+        self.counters.incr('retried')
+        with self._retry_cond:
+            self._retry_sequence += 1
+            heapq.heappush(self._retries, (time.monotonic() + delay, self._retry_sequence, message))
+            self._retry_cond.notify()
+
+    def _retry_loop(self):
+        """Move messages whose backoff expired back onto the send queue"""
+        with self._retry_cond:
+            while self._running:
+                if not self._retries:
+                    self._retry_cond.wait()
+                    continue
+                due_at, _, message = self._retries[0]
+                wait = due_at - time.monotonic()
+                if wait > 0:
+                    self._retry_cond.wait(wait)
+                    continue
+                heapq.heappop(self._retries)
+                self._enqueue(message)
+
+    def _finish(self, message, response):
+        self.latency[message.lane].record(time.perf_counter() - message.enqueued_at)
+        self._resolve(message, response)
+
+    @staticmethod
+    def _resolve(message, response):
+        """Set the message's result unless it is already resolved or cancelled"""
+        try:
+            message.future.set_result(response)
+        except InvalidStateError:
+            # Cancelled by a caller that stopped waiting
+            pass
+
+
+_outbound_sender = None
+_outbound_sender_lock = threading.Lock()
+
+
+def get_outbound_sender():
+    """The shared, started outbound sender configured from OUTBOUND_* settings"""
+    global _outbound_sender
+    with _outbound_sender_lock:
+        if _outbound_sender is None:
+            _outbound_sender = OutboundSender(
+                rate_per_second=float(os.getenv('OUTBOUND_RATE_PER_SECOND', 20)),
+                burst=int(os.getenv('OUTBOUND_BURST', 20)),
+                num_workers=int(os.getenv('OUTBOUND_WORKERS', 4)),
+                max_queue=int(os.getenv('OUTBOUND_QUEUE_SIZE', 1000)),
+                max_retries=int(os.getenv('OUTBOUND_MAX_RETRIES', 4)),
+                backoff_base=float(os.getenv('OUTBOUND_BACKOFF_BASE', 0.5)),
+                backoff_max=float(os.getenv('OUTBOUND_BACKOFF_MAX', 30)),
+                reserved_workers=int(os.getenv('OUTBOUND_RESERVED_WORKERS', 1)),
+                reserved_tokens=int(os.getenv('OUTBOUND_RESERVED_TOKENS', 4)),
+                bulk_max_queue=int(os.getenv('OUTBOUND_BULK_QUEUE_SIZE', 5000))
+            )
+            _outbound_sender.start()
+        return _outbound_sender
@@ -0,0 +1,94 @@
+import json
+import re
+import threading
+from json.encoder import encode_basestring
+
+from services.message_catalog import catalog
+
+# Placeholder for a dynamic field inside a template, e.g. "@@to@@"
+FIELD_PATTERN = re.compile(r'@@(\w+)@@')
+
+BUTTONS = 'button'
+LIST = 'list'
+
+
+def field(name):
+    return f"@@{name}@@"
+
+
+def _escape(value):
+    """JSON string content (no quotes) for a spliced-in value"""
+    return encode_basestring(str(value))[1:-1].encode('utf-8')
+
+
+class PayloadTemplate:
+    """A Graph API message body encoded to JSON bytes once.
+
+    Dynamic values are ``@@name@@`` placeholders inside string values; the
+    encoded bytes are split around them so ``render()`` only escapes the
+    values and joins byte strings.
+    """
+
+    def __init__(self, payload):
+        encoded = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+        pieces = FIELD_PATTERN.split(encoded)
+        self._literals = [piece.encode('utf-8') for piece in pieces[0::2]]
+        self.fields = pieces[1::2]
+
+    def render(self, **values):
+        out = [self._literals[0]]
+        for name, literal in zip(self.fields, self._literals[1:]):
+            out.append(_escape(values[name]))
+            out.append(literal)
+        return b''.join(out)
+
+
+def interactive_payload(kind, action):
+    """Message envelope shared by every interactive template"""
+    return {
+        "messaging_product": "whatsapp",
+        "recipient_type": "individual",
+        "to": field('to'),
+        "type": "interactive",
+        "interactive": {
+            "type": kind,
+            "body": {"text": field('body')},
+            "action": action
+        }
+    }
+
+
+class TemplateRegistry:
+    """Named interactive payloads, built and encoded once per language.
+
+    ``register(name, kind, builder)`` takes ``builder(language)`` returning
+    the ``action`` part of the message (buttons or list sections), written
+    with ``field()`` placeholders for per-message values such as task ids.
+    """
+
+    def __init__(self):
+        self._builders = {}
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, kind, builder):
+        with self._lock:
+            self._builders.setdefault(name, (kind, builder))
+
+    def kind(self, name):
+        return self._builders[name][0]
+
+    def render(self, name, language, **values):
+        """Encoded payload bytes for one recipient"""
+        if language not in catalog.languages:
+            language = catalog.default_language
+        template = self._templates.get((name, language))
+        if template is None:
+            kind, builder = self._builders[name]
+            template = PayloadTemplate(interactive_payload(kind, builder(language)))
+            with self._lock:
+                self._templates[(name, language)] = template
+        return template.render(**values)
+
+
+templates = TemplateRegistry()
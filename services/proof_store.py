@@ -0,0 +1,157 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from utils.metrics import Counters
+
+
+class ProofStore:
+    """Content-addressed store for task proof photos.
+
+    A photo is kept once under its sha256, sharded two levels deep
+    (``root/ab/cd/abcd....jpg``), so the same bytes sent again, for the same
+    or another task, share one file. Writes go through a temp file in the
+    root and ``os.replace``; storing a duplicate replaces the file with the
+    identical copy, which also refreshes its mtime.
+
+    ``gc(reclaimable, referenced)`` deletes stored files the backend already
+    has: the digests returned by ``reclaimable(cutoff)`` whose file was not
+    written since ``cutoff`` (``retention_seconds`` ago), minus the file
+    names ``referenced(names)`` reports as still in use (a direct-attach
+    ``task_proofs`` row names the local file). Files outside the shards
+    (older ``task_<id>_<timestamp>`` names) are never touched.
+    """
+
+    def __init__(self, root='task_images', retention_seconds=86400, shard_depth=2):
+        self.root = root
+        self.retention_seconds = retention_seconds
+        self.shard_depth = shard_depth
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(self.root, exist_ok=True)
+
+        self._gc_thread = None
+        self._gc_stop = threading.Event()
+        self._last_gc = None
+
+        self.counters = Counters('stored', 'duplicates', 'bytes_stored', 'bytes_deduplicated',
+                                 'reclaimed_files', 'reclaimed_bytes')
+
+    def path_for(self, digest, extension=''):
+        shards = [digest[i * 2:i * 2 + 2] for i in range(self.shard_depth)]
+        return os.path.join(self.root, *shards, f"{digest}{extension}")
+
+    def digest_of(self, path):
+        """The digest a stored path is named after, None for paths outside the store"""
+        digest = os.path.splitext(os.path.basename(path))[0]
+        if path == self.path_for(digest, os.path.splitext(path)[1]):
+            return digest
+        return None
+
+    def temp_file(self):
+        """(fd, path) of a new temp file on the store's filesystem"""
+        return tempfile.mkstemp(dir=self.root, prefix=".download_", suffix=".part")
+
+    def commit(self, tmp_path, digest, extension, size):
+        """Move a fully written temp file to its content address and return the path"""
+        path = self.path_for(digest, extension)
+        duplicate = os.path.exists(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+
+        if duplicate:
+            self.counters.incr('duplicates')
+            self.counters.incr('bytes_deduplicated', size)
+            print(f"🔁 Same photo already stored: {path}")
+        else:
+            self.counters.incr('stored')
+            self.counters.incr('bytes_stored', size)
+        return path
+
+    def gc(self, reclaimable, referenced=None):
+        """Delete stored files whose digest is reclaimable; returns (files, bytes)"""
+        cutoff = time.time() - self.retention_seconds
+        digests = reclaimable(cutoff)
+        candidates = {}
+        if digests:
+            for directory, _, names in os.walk(self.root):
+                if directory == self.root:
+                    continue
+                for name in names:
+                    if os.path.splitext(name)[0] in digests:
+                        candidates[name] = os.path.join(directory, name)
+
+        if candidates and referenced:
+            # Raises when the check fails, so nothing is deleted blind
+            for name in referenced(candidates):
+                candidates.pop(name, None)
+
+        files = reclaimed = 0
+        for path in candidates.values():
+            try:
+                stat = os.stat(path)
+                # Written again since the cutoff: a new job may be using it
+                if stat.st_mtime >= cutoff:
+                    continue
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            files += 1
+            reclaimed += stat.st_size
+
+        self.counters.incr('reclaimed_files', files)
+        self.counters.incr('reclaimed_bytes', reclaimed)
+        self._last_gc = time.time()
+        if files:
+            self.logger.info(f"🧹 Reclaimed {files} uploaded proof photos ({reclaimed} bytes)")
+        return files, reclaimed
+
+    def start_gc(self, reclaimable, referenced=None, interval=3600):
+        """Run ``gc(reclaimable, referenced)`` every ``interval`` seconds on a daemon thread"""
+        if self._gc_thread is not None:
+            return
+
+        def run():
+            while not self._gc_stop.wait(interval):
+                try:
+                    self.gc(reclaimable, referenced)
+                except Exception as e:
+                    self.logger.error(f"❌ Proof store GC failed: {e}")
+
+        self._gc_stop.clear()
+        self._gc_thread = threading.Thread(target=run, name="proof-gc", daemon=True)
+        self._gc_thread.start()
+
+    def stop_gc(self, timeout=5):
+        self._gc_stop.set()
+        if self._gc_thread is not None:
+            self._gc_thread.join(timeout=timeout)
+            self._gc_thread = None
+
+    def get_stats(self):
+        counters = self.counters.snapshot()
+        received = counters['stored'] + counters['duplicates']
+        return {
+            "root": self.root,
+            "retention_seconds": self.retention_seconds,
+            "dedupe_rate": round(counters['duplicates'] / received, 4) if received else 0.0,
+            "last_gc_age_s": round(time.time() - self._last_gc, 1) if self._last_gc else None,
+            "counters": counters,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_proof_store():
+    """Process-wide proof store configured from the environment"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProofStore(
+                root=os.getenv('PROOF_STORE_DIR', 'task_images'),
+                retention_seconds=int(os.getenv('PROOF_RETENTION_SECONDS', 86400)),
+            )
+        return _store
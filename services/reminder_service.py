@@ -1,56 +1,26 @@
+import os
 import schedule
 import time
 import threading
 from datetime import datetime
 from models.task import Task
-from services.whatsapp_service import WhatsAppService
-from services.language_service import LanguageService
+from services.whatsapp_service import get_whatsapp_service
+from services.language_service import get_language_service
+from services.message_catalog import catalog
 import logging
 
 class ReminderService:
     def __init__(self, db_config):
         self.db_config = db_config
         self.task_model = Task(db_config)
-        self.whatsapp_service = WhatsAppService()
-        self.language_service = LanguageService()
+        self.whatsapp_service = get_whatsapp_service()
+        self.language_service = get_language_service()
+        # The scheduler thread can wait out a throttled bulk lane; replies use the shorter OUTBOUND_SEND_TIMEOUT
+        self.send_timeout = float(os.getenv('REMINDER_SEND_TIMEOUT', 60))
         self.logger = logging.getLogger(__name__)
         self.is_running = False
         self.reminder_thread = None
 
-    def _send_individual_reminder(self, task):
-        """Send reminder for an individual recurring task"""
-        try:
-            phone_number = task['phone']
-            if not phone_number:
-                self.logger.warning(f"No phone number found for team member {task['team_member_name']}")
-                return False
-
-            self.logger.info(f"Attempting to send reminder to {task['team_member_name']} at {phone_number}")
-
-            # Detect language preference (default to English)
-            language = 'en'
-            
-            # Format reminder message
-            reminder_message = self._format_reminder_message(task, language)
-            
-            self.logger.info(f"Formatted reminder message: {reminder_message[:100]}...")
-            
-            # Send WhatsApp message
-            success = self.whatsapp_service.send_message(phone_number, reminder_message, language)
-            
-            if success:
-                self.logger.info(f"✅ Reminder sent to {task['team_member_name']} for task: {task['title']}")
-                # Update reminder tracking
-                self.task_model.update_task_reminder(task['id'], task['assigned_to'])
-                return True
-            else:
-                self.logger.error(f"❌ Failed to send reminder to {task['team_member_name']}")
-                return False
-                
-        except Exception as e:
-            self.logger.error(f"Error sending individual reminder to {task.get('team_member_name', 'unknown')}: {e}")
-            return False
-
     def start_reminder_scheduler(self):
         """Start the reminder scheduler in a separate thread"""
         if self.is_running:
@@ -94,19 +64,29 @@ class ReminderService:
 
             self.logger.info(f"Found {len(recurring_tasks)} recurring tasks due for reminders")
             
-            for task in recurring_tasks:
-                self._send_individual_reminder(task)
+            # Queue every reminder first so the outbound workers send them in
+            # parallel (within the rate limit), then record the results
+            queued = [(task, self._queue_individual_reminder(task)) for task in recurring_tasks]
+            for task, future in queued:
+                if future is not None:
+                    self._finish_individual_reminder(task, future)
                 
         except Exception as e:
             self.logger.error(f"Error sending daily reminders: {e}")
 
     def _send_individual_reminder(self, task):
         """Send reminder for an individual recurring task"""
+        future = self._queue_individual_reminder(task)
+        if future is not None:
+            self._finish_individual_reminder(task, future)
+
+    def _queue_individual_reminder(self, task):
+        """Queue the reminder message, returns a Future of bool (None if not queued)"""
         try:
             phone_number = task['phone']
             if not phone_number:
                 self.logger.warning(f"No phone number found for team member {task['team_member_name']}")
-                return
+                return None
 
             # Detect language preference (default to English)
             language = 'en'  # You can enhance this by storing user language preferences
@@ -114,8 +94,17 @@ class ReminderService:
             # Format reminder message
             reminder_message = self._format_reminder_message(task, language)
             
-            # Send WhatsApp message
-            success = self.whatsapp_service.send_message(phone_number, reminder_message, language)
+            # Queue WhatsApp message on the outbound sender
+            return self.whatsapp_service.queue_message(phone_number, reminder_message, language)
+                
+        except Exception as e:
+            self.logger.error(f"Error sending individual reminder: {e}")
+            return None
+
+    def _finish_individual_reminder(self, task, future):
+        """Wait for Meta's answer and update reminder tracking"""
+        try:
+            success = future.result(timeout=self.send_timeout)
             
             if success:
                 self.logger.info(f"✅ Reminder sent to {task['team_member_name']} for task: {task['title']}")
@@ -129,71 +118,22 @@ class ReminderService:
 
     def _format_reminder_message(self, task, language='en'):
         """Format the reminder message based on language"""
-        messages = {
-            'en': {
-                'reminder_header': "🔔 *Recurring Task Reminder*\n\n",
-                'task_title': "Task: *{}*",
-                'recurrence': "Frequency: {}",
-                'property': "Property: {}",
-                'description': "Description: {}",
-                'action_required': "\n\nThis is a {} task. Please complete it and update the status.",
-                'update_instruction': "\n\nTo update status, reply: *status [task-number] [status]*",
-                'recurrence_daily': "Daily",
-                'recurrence_weekly': "Weekly", 
-                'recurrence_monthly': "Monthly",
-                'recurrence_quarterly': "Quarterly",
-                'recurrence_yearly': "Yearly"
-            },
-            'hi': {
-                'reminder_header': "🔔 *आवर्ती कार्य अनुस्मारक*\n\n",
-                'task_title': "कार्य: *{}*",
-                'recurrence': "आवृत्ति: {}",
-                'property': "संपत्ति: {}",
-                'description': "विवरण: {}",
-                'action_required': "\n\nयह एक {} कार्य है। कृपया इसे पूरा करें और स्थिति अपडेट करें।",
-                'update_instruction': "\n\nस्थिति अपडेट करने के लिए, जवाब दें: *status [संख्या] [स्थिति]*",
-                'recurrence_daily': "दैनिक",
-                'recurrence_weekly': "साप्ताहिक",
-                'recurrence_monthly': "मासिक", 
-                'recurrence_quarterly': "त्रैमासिक",
-                'recurrence_yearly': "वार्षिक"
-            },
-            'es': {
-                'reminder_header': "🔔 *Recordatorio de Tarea Recurrente*\n\n",
-                'task_title': "Tarea: *{}*",
-                'recurrence': "Frecuencia: {}",
-                'property': "Propiedad: {}",
-                'description': "Descripción: {}",
-                'action_required': "\n\nEsta es una tarea {}. Por favor complétala y actualiza el estado.",
-                'update_instruction': "\n\nPara actualizar el estado, responde: *status [número] [estado]*",
-                'recurrence_daily': "Diaria",
-                'recurrence_weekly': "Semanal",
-                'recurrence_monthly': "Mensual",
-                'recurrence_quarterly': "Trimestral", 
-                'recurrence_yearly': "Anual"
-            }
-        }
-        
-        # Get messages for the specified language, default to English
-        lang_messages = messages.get(language, messages['en'])
-        
         # Get recurrence text
-        recurrence_key = f"recurrence_{task['recurrence']}"
-        recurrence_text = lang_messages.get(recurrence_key, task['recurrence'])
+        recurrence_text = catalog.get(f"recurrence_{task['recurrence']}", language, default=task['recurrence'])
         
         # Build message
-        message = lang_messages['reminder_header']
-        message += lang_messages['task_title'].format(task['title']) + "\n"
-        message += lang_messages['recurrence'].format(recurrence_text) + "\n"
+        message = catalog.get('reminder_header', language)
+        message += catalog.format('reminder_task_title', language, task['title']) + "\n"
+        message += catalog.format('reminder_recurrence', language, recurrence_text) + "\n"
         
         if task.get('property_name'):
-            message += lang_messages['property'].format(task['property_name']) + "\n"
+            message += catalog.format('reminder_property', language, task['property_name']) + "\n"
         
         if task.get('description'):
-            message += lang_messages['description'].format(task['description']) + "\n"
+            message += catalog.format('reminder_description', language, task['description']) + "\n"
         
-        message += lang_messages['action_required'].format(recurrence_text.lower())
-        message += lang_messages['update_instruction']
+        message += catalog.format('reminder_action_required', language, recurrence_text.lower())
+        message += catalog.get('reminder_update_instruction', language)
         
         return message
 
@@ -0,0 +1,67 @@
+import json
+
+
+class RequestContext:
+    """The sender of one inbound message, loaded once and passed to handlers.
+
+    The member row already carries the preference columns
+    (preferred_language, last_selected_property_id, notification_preferences),
+    so a single team_members lookup serves the whole request.
+    """
+
+    def __init__(self, phone_number, member):
+        self.phone_number = phone_number.replace('whatsapp:', '') if phone_number else ''
+        self.member = member
+
+    @classmethod
+    def load(cls, team_member_model, phone_number):
+        clean_phone = phone_number.replace('whatsapp:', '')
+        return cls(clean_phone, team_member_model.find_by_phone(clean_phone))
+
+    @property
+    def is_member(self):
+        return bool(self.member)
+
+    @property
+    def preferred_language(self):
+        return self.member.get('preferred_language') if self.member else None
+
+    @property
+    def last_selected_property_id(self):
+        return self.member.get('last_selected_property_id') if self.member else None
+
+    @property
+    def notification_preferences(self):
+        value = self.member.get('notification_preferences') if self.member else None
+        if isinstance(value, (str, bytes)):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                value = {}
+        return value
+
+    @property
+    def preferences(self):
+        """Same shape as TaskService.get_user_preferences()"""
+        if not self.member:
+            return None
+        return {
+            'preferred_language': self.preferred_language,
+            'last_selected_property_id': self.last_selected_property_id,
+            'notification_preferences': self.notification_preferences,
+            'settings_updated_at': self.member.get('settings_updated_at'),
+        }
+
+    def apply_preferences(self, preferences):
+        """Reflect preferences that were just saved to the database"""
+        if not self.member:
+            return
+        if 'preferred_language' in preferences:
+            self.member['preferred_language'] = preferences['preferred_language']
+        if 'last_selected_property_id' in preferences:
+            try:
+                self.member['last_selected_property_id'] = int(preferences['last_selected_property_id'])
+            except (ValueError, TypeError):
+                pass
+        if 'notification_preferences' in preferences:
+            self.member['notification_preferences'] = preferences['notification_preferences']
@@ -0,0 +1,193 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from utils.metrics import Counters, LatencyStats
+
+
+class _Lane:
+    __slots__ = ('items', 'scheduled', 'last_active')
+
+    def __init__(self):
+        self.items = deque()
+        self.scheduled = False
+        self.last_active = time.monotonic()
+
+
+class SenderDispatcher:
+    """Runs ``handler(item)`` on a thread pool, serially per key.
+
+    Items submitted under the same key (a normalized phone number) form a
+    lane and are handled strictly in submission order, one at a time.
+    Different lanes are handled concurrently. A lane is only ever on the
+    ready queue once, so a busy sender cannot occupy more than one worker.
+    Lanes left empty for ``idle_timeout`` seconds are evicted.
+    """
+
+    def __init__(self, handler, num_workers=4, max_pending=1000, idle_timeout=300):
+        self.handler = handler
+        self.num_workers = max(1, int(num_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.idle_timeout = idle_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._lanes = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._ready = queue.Queue()
+        self._anonymous_keys = itertools.count()
+
+        self._threads = []
+        self._running = False
+        self._started_at = None
+        self._busy_workers = 0
+        self._busy_seconds = 0.0
+
+        self.counters = Counters('submitted', 'processed', 'failed', 'rejected', 'evicted')
+        self.wait_time = LatencyStats()
+        self.process_time = LatencyStats()
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def start(self):
+        """Start the worker threads and the idle lane sweeper"""
+        if self._running:
+            return
+
+        self._running = True
+        self._started_at = time.monotonic()
+
+        for i in range(self.num_workers):
+            thread = threading.Thread(
+                target=self._worker_loop, name=f"sender-worker-{i + 1}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        sweeper = threading.Thread(target=self._sweep_loop, name="sender-lane-sweeper", daemon=True)
+        sweeper.start()
+        self._threads.append(sweeper)
+
+    def stop(self, timeout=5):
+        """Stop the workers after the items they are currently handling"""
+        self._running = False
+        for _ in range(self.num_workers):
+            self._ready.put(None)
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def submit(self, key, item):
+        """Append an item to the lane for ``key``. Returns False when full."""
+        if key is None:
+            key = ('anonymous', next(self._anonymous_keys))
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.counters.incr('rejected')
+                return False
+
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = _Lane()
+
+            lane.items.append((item, time.monotonic()))
+            self._pending += 1
+
+            if not lane.scheduled:
+                lane.scheduled = True
+                self._ready.put(key)
+
+        self.counters.incr('submitted')
+        return True
+
+    def get_stats(self):
+        """Lane counts, pending items, latencies and worker utilisation"""
+        with self._lock:
+            lanes = len(self._lanes)
+            active_lanes = sum(1 for lane in self._lanes.values() if lane.scheduled)
+            pending = self._pending
+            busy_workers = self._busy_workers
+            busy_seconds = self._busy_seconds
+
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        capacity = uptime * self.num_workers
+        utilization = round(busy_seconds / capacity, 4) if capacity else 0.0
+
+        return {
+            "running": self._running,
+            "workers": self.num_workers,
+            "busy_workers": busy_workers,
+            "utilization": utilization,
+            "lanes": lanes,
+            "active_lanes": active_lanes,
+            "pending": pending,
+            "max_pending": self.max_pending,
+            "counters": self.counters.snapshot(),
+            "wait_time": self.wait_time.snapshot(),
+            "process_time": self.process_time.snapshot(),
+        }
+
+    def _worker_loop(self):
+        while True:
+            key = self._ready.get()
+            if key is None:
+                break
+
+            with self._lock:
+                lane = self._lanes[key]
+                item, submitted_at = lane.items.popleft()
+                self._busy_workers += 1
+
+            started = time.monotonic()
+            self.wait_time.record(started - submitted_at)
+
+            try:
+                self.handler(item)
+                self.counters.incr('processed')
+            except Exception as e:
+                self.counters.incr('failed')
+                self.logger.error(f"Error handling item for lane {key}: {e}")
+            finally:
+                elapsed = time.monotonic() - started
+                self.process_time.record(elapsed)
+
+                with self._lock:
+                    self._busy_workers -= 1
+                    self._busy_seconds += elapsed
+                    self._pending -= 1
+                    lane.last_active = time.monotonic()
+
+                    if lane.items:
+                        # Requeue behind other senders to keep lanes fair
+                        self._ready.put(key)
+                    else:
+                        lane.scheduled = False
+                        if isinstance(key, tuple) and key[0] == 'anonymous':
+                            del self._lanes[key]
+
+    def _sweep_loop(self):
+        interval = max(1, min(60, self.idle_timeout / 2))
+        while self._running:
+            time.sleep(interval)
+            self.evict_idle_lanes()
+
+    def evict_idle_lanes(self):
+        """Drop lanes that have been empty for longer than ``idle_timeout``"""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [
+                key for key, lane in self._lanes.items()
+                if not lane.scheduled and not lane.items and lane.last_active < cutoff
+            ]
+            for key in idle:
+                del self._lanes[key]
+
+        if idle:
+            self.counters.incr('evicted', len(idle))
+        return len(idle)
@@ -1,11 +1,18 @@
 from email.mime import message
 from models.team_member import TeamMember
 from models.task import Task
-from services.whatsapp_service import WhatsAppService
+from services.whatsapp_service import get_whatsapp_service
 from services.image_service import ImageService
-from services.language_service import LanguageService
+from services.language_service import get_language_service
+from services.request_context import RequestContext
+from services.message_catalog import catalog
+from services.payload_templates import templates, field, BUTTONS, LIST
+from services.message_dedupe import MessageDeduplicator
+from services.media_pipeline import MediaPipeline
+from services.upload_spool import file_hash, get_upload_spool
 import os
 import json
+import time
 
 
 class TaskService:
@@ -13,38 +20,204 @@ class TaskService:
         self.db_config = db_config
         self.team_member_model = TeamMember(db_config)
         self.task_model = Task(db_config)
-        self.whatsapp_service = WhatsAppService()
+        self.whatsapp_service = get_whatsapp_service()
         self.image_service = ImageService()
-        self.language_service = LanguageService()
+        self.language_service = get_language_service()
+        self._register_templates()
         self.user_languages = {}  # Store user language preferences
         self.user_property_selections = {}  # Store user property selections
+        # Strangers get one no_access reply per window, however often they write
+        self.no_access_replies = MessageDeduplicator(
+            ttl_seconds=int(os.getenv('NO_ACCESS_REPLY_INTERVAL', 3600)),
+            max_entries=int(os.getenv('NO_ACCESS_REPLY_MAX_ENTRIES', 10000))
+        )
+        # Uploads the backend did not accept are retried from a durable spool
+        self.upload_spool = get_upload_spool(self.image_service.upload_to_backend)
+        # Photos are downloaded, uploaded and attached off the webhook thread
+        self.media_pipeline = MediaPipeline(
+            self._download_job_media,
+            self._upload_job_media,
+            self._attach_job_media,
+            self._notify_image_job,
+            num_workers=int(os.getenv('MEDIA_WORKERS', 2)),
+            max_queue=int(os.getenv('MEDIA_QUEUE_SIZE', 100)),
+            db_path=os.getenv('MEDIA_JOBS_PATH', 'data/media_jobs.sqlite3'),
+            max_job_age=int(os.getenv('MEDIA_JOB_MAX_AGE', 86400))
+        )
 
+        # The schema check runs from app.py's warm-up thread (ensure_database_structure)
 
-        # Check database structure on initialization
-        print("🔍 Checking database structure...")
-        self.check_database_structure()
+    def _register_templates(self):
+        """Static menus, encoded once per language by the template registry"""
+        templates.register('settings_list', LIST, lambda language: {
+            "button": "Select an option",
+            "sections": self._settings_sections()
+        })
+        templates.register('language_list', LIST, lambda language: {
+            "button": "Select Language",
+            "sections": self._language_sections()
+        })
+        templates.register('task_status_list', LIST, lambda language: {
+            "button": "Select Status",
+            "sections": self._status_sections(field('task_id'))
+        })
+        templates.register('main_menu_button', BUTTONS, lambda language: {
+            "buttons": [
+                {
+                    "type": "reply",
+                    "reply": {
+                        "id": "main_menu",
+                        "title": "🏠 Main Menu"
+                    }
+                }
+            ]
+        })
+
+    def _settings_sections(self):
+        """Rows of the settings menu list"""
+        return [
+            {
+                "title": "Property Settings",
+                "rows": [
+                    {
+                        "id": "property_change",
+                        "title": "🏠 Change Property",
+                        "description": "Select which property you're working on"
+                    },
+                    {
+                        "id": "property_info",
+                        "title": "📋 View Property Info",
+                        "description": "See details of your current property"
+                    }
+                ]
+            },
+            {
+                "title": "Account Settings",
+                "rows": [
+                    {
+                        "id": "language_change",
+                        "title": "🌐 Change Language",
+                        "description": "Set your preferred language"
+                    }
+                ]
+            },
+            {
+                "title": "Other",
+                "rows": [
+                    {
+                        "id": "back_main",
+                        "title": "⬅️ Main Menu",
+                        "description": "Return to the main menu"
+                    }
+                ]
+            }
+        ]
+
+    def _language_sections(self):
+        """Rows of the language picker list"""
+        return [
+            {
+                "title": "Available Languages",
+                "rows": [
+                    {
+                        "id": "lang_en",
+                        "title": "🇺🇸 English",
+                        "description": "Switch to English"
+                    },
+                    {
+                        "id": "lang_hi",
+                        "title": "🇮🇳 Hindi",
+                        "description": "हिंदी में बदलें"
+                    },
+                    {
+                        "id": "lang_es",
+                        "title": "🇪🇸 Spanish",
+                        "description": "Cambiar a Español"
+                    }
+                ]
+            },
+            {
+                "title": "Navigation",
+                "rows": [
+                    {
+                        "id": "back_settings",
+                        "title": "⬅️ Back to Settings",
+                        "description": "Return to settings menu"
+                    }
+                ]
+            }
+        ]
+
+    def _status_sections(self, task_id):
+        """Rows of the status picker list for one task"""
+        return [
+            {
+                "title": "Change Status",
+                "rows": [
+                    {
+                        "id": f"status_pending_{task_id}",
+                        "title": "⏳ Pending",
+                        "description": "Mark as pending"
+                    },
+                    {
+                        "id": f"status_inprogress_{task_id}",
+                        "title": "🔄 In Progress",
+                        "description": "Mark as in progress"
+                    },
+                    {
+                        "id": f"status_complete_{task_id}",
+                        "title": "✅ Complete",
+                        "description": "Mark as completed"
+                    },
+                    {
+                        "id": f"status_skipped_{task_id}",
+                        "title": "⏭️ Skipped",
+                        "description": "Mark as skipped"
+                    }
+                ]
+            },
+            {
+                "title": "Navigation",
+                "rows": [
+                    {
+                        "id": f"back_task_{task_id}",
+                        "title": "⬅️ Back to Task",
+                        "description": "Return to task options"
+                    }
+                ]
+            }
+        ]
 
     def get_connection(self):
         """Get database connection"""
         return self.task_model.get_connection()    
 
-    def handle_message(self, phone_number, message, media_url=None):
+    def connection(self):
+        """Pooled database connection as a context manager"""
+        return self.task_model.connection()
+
+    def handle_message(self, phone_number, message, media_url=None, context=None):
         # Clean phone number (remove 'whatsapp:' prefix if present)
         clean_phone = phone_number.replace('whatsapp:', '')
         
-        print(f"🔍 Looking up team member with phone: {clean_phone}")
-        member = self.team_member_model.find_by_phone(clean_phone)
+        # One member + preferences lookup per request, reused by every handler
+        if context is None:
+            print(f"🔍 Looking up team member with phone: {clean_phone}")
+            context = RequestContext.load(self.team_member_model, clean_phone)
+        member = context.member
         
         if not member:
+            if self.no_access_replies.is_duplicate(clean_phone):
+                print(f"🔇 Skipping repeat no_access reply to {clean_phone}")
+                return
+            
             # Detect language for unknown user
             if message:
                 detected_lang = self.language_service.detect_language(message)
             else:
                 detected_lang = 'en'
                 
-            no_access_msg = self.whatsapp_service._get_translated_message(
-                'no_access', detected_lang
-            ) or "❌ Sorry, you are not registered in our system as an active team member.\n\nPlease contact your administrator to get added to the team."
+            no_access_msg = self.whatsapp_service._get_translated_message('no_access', detected_lang)
             
             self.whatsapp_service.send_message(clean_phone, no_access_msg, detected_lang)
             return
@@ -52,7 +225,7 @@ class TaskService:
         print(f"✅ Found team member: {member['name']} (ID: {member['id']})")
         
         # Get user language
-        user_language = self._get_user_language(clean_phone, message)
+        user_language = self._get_user_language(clean_phone, message, context)
         
         # Handle button clicks by exact title match FIRST
         print(f"🔘 Processing button click: '{message}'")
@@ -223,14 +396,10 @@ class TaskService:
 
     def show_main_menu(self, member, phone_number, language):
         """Show the main menu with interactive buttons"""
-        welcome_msg = self.whatsapp_service._get_translated_message('welcome', language)
-        welcome_message = f"{welcome_msg.format(member['name'])} 👋\n\nI'm your team management assistant. Please select an option:"
+        welcome_message = f"{catalog.format('welcome', language, member['name'])} 👋\n\nI'm your team management assistant. Please select an option:"
         
-        # Create properly formatted interactive buttons
-        buttons = self.whatsapp_service._create_welcome_buttons(language)
-        
-        # Send with buttons
-        success = self.whatsapp_service.send_message(phone_number, welcome_message, language, buttons)
+        # Send with the pre-encoded welcome buttons
+        success = self.whatsapp_service.send_template(phone_number, 'welcome_buttons', welcome_message, language)
         
         if not success:
             # If buttons fail, show simple text menu
@@ -241,53 +410,8 @@ class TaskService:
         """Show settings menu with interactive list"""
         settings_message = "⚙️ *Settings*\n\nPlease select an option from the list below:"
         
-        # Create interactive list message for settings
-        sections = [
-            {
-                "title": "Property Settings",
-                "rows": [
-                    {
-                        "id": "property_change",
-                        "title": "🏠 Change Property",
-                        "description": "Select which property you're working on"
-                    },
-                    {
-                        "id": "property_info",
-                        "title": "📋 View Property Info",
-                        "description": "See details of your current property"
-                    }
-                ]
-            },
-            {
-                "title": "Account Settings",
-                "rows": [
-                    {
-                        "id": "language_change",
-                        "title": "🌐 Change Language",
-                        "description": "Set your preferred language"
-                    }
-                ]
-            },
-            {
-                "title": "Other",
-                "rows": [
-                    {
-                        "id": "back_main",
-                        "title": "⬅️ Main Menu",
-                        "description": "Return to the main menu"
-                    }
-                ]
-            }
-        ]
-        
-        # Send interactive list message
-        success = self.whatsapp_service.send_interactive_list(
-            phone_number, 
-            settings_message, 
-            "Select an option", 
-            sections,
-            language
-        )
+        # Send the pre-encoded settings list
+        success = self.whatsapp_service.send_template(phone_number, 'settings_list', settings_message, language)
         
         # Fallback to buttons if list fails
         if not success:
@@ -309,26 +433,26 @@ class TaskService:
             ]
             self.whatsapp_service.send_message(phone_number, settings_message, language, buttons)
 
-    def handle_property_selection(self, member, phone_number, selection_id, language):
+    def handle_property_selection(self, member, phone_number, selection_id, language, context=None):
         """Handle property-related selections from settings menu"""
         if selection_id == "property_change":
             # Show property selection list
             self.show_property_selection_menu(member, phone_number, language)
         elif selection_id == "property_info":
             # Show current property info
-            self.show_current_property_info(member, phone_number, language)
+            self.show_current_property_info(member, phone_number, language, context)
         elif selection_id.startswith("property_"):
             # Handle actual property selection
             property_id = selection_id.replace("property_", "")
             # Find the property name
             properties = self.get_user_properties(member['id'])
             property_name = next((prop['name'] for prop in properties if str(prop['id']) == property_id), "Unknown Property")
-            self.handle_property_selection_result(phone_number, property_id, property_name)
+            self.handle_property_selection_result(phone_number, property_id, property_name, context)
 
-    def show_current_property_info(self, member, phone_number, language):
+    def show_current_property_info(self, member, phone_number, language, context=None):
         """Show current property information for the user"""
         # First check database for saved property
-        preferences = self.get_user_preferences(phone_number)
+        preferences = self.get_user_preferences(phone_number, context)
         current_property_id = None
         
         if preferences and preferences.get('last_selected_property_id'):
@@ -372,9 +496,6 @@ class TaskService:
         
         # Get property details from database
         try:
-            conn = self.task_model.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
             query = """
                 SELECT p.id, p.name, p.address, p.google_map_link, p.image,
                        p.created_at, p.updated_at,
@@ -385,11 +506,13 @@ class TaskService:
                 FROM properties p
                 WHERE p.id = %s
             """
-            cursor.execute(query, (current_property_id,))
-            property_details = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    cursor.execute(query, (current_property_id,))
+                    property_details = cursor.fetchone()
+                finally:
+                    cursor.close()
             
             if property_details:
                 # Format property information
@@ -439,12 +562,14 @@ class TaskService:
         
         self.whatsapp_service.send_message(phone_number, info_message, language, buttons)        
 
-    def handle_property_selection_result(self, phone_number, property_id, property_name):
+    def handle_property_selection_result(self, phone_number, property_id, property_name, context=None):
         """Handle property selection from interactive list and save to DB"""
         print(f"🎯 Property selection: phone={phone_number}, property_id={property_id}, property_name={property_name}")
         
         # Get member to verify property exists
-        member = self.team_member_model.find_by_phone(phone_number.replace('whatsapp:', ''))
+        if context is None:
+            context = RequestContext.load(self.team_member_model, phone_number)
+        member = context.member
         if member:
             # Get actual property from database to ensure it exists
             properties = self.get_user_properties(member['id'])
@@ -473,7 +598,7 @@ class TaskService:
             # Save to database
             success = self.save_user_preferences(phone_number, {
                 'last_selected_property_id': property_id
-            })
+            }, context)
             
             if success:
                 print(f"✅ Property '{property_name}' (ID: {property_id}) saved to database for {phone_number}")
@@ -593,40 +718,30 @@ class TaskService:
     def get_user_properties(self, user_id):
         """Get properties assigned to the user from the actual database"""
         try:
-            conn = self.task_model.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            # First, get the user's client_id
-            cursor.execute("SELECT client_id FROM team_members WHERE id = %s", (user_id,))
-            user = cursor.fetchone()
-            
-            if not user:
-                cursor.close()
-                conn.close()
-                return []
-            
-            client_id = user['client_id']
-            
-            # Get properties for this client
-            # Since there's no property_assignments table, get all properties for the client
-            # If you have a different way to assign properties to users, update this query
-            query = """
-                SELECT p.id, p.name, p.address, p.google_map_link, p.image,
-                       p.created_at, p.updated_at
-                FROM properties p
-                WHERE p.client_id = %s
-                ORDER BY p.name
-            """
-            cursor.execute(query, (client_id,))
-            properties = cursor.fetchall()
-            
+            with self.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    # Properties of the user's client, looked up in one query
+                    # Since there's no property_assignments table, get all properties for the client
+                    # If you have a different way to assign properties to users, update this query
+                    query = """
+                        SELECT p.id, p.name, p.address, p.google_map_link, p.image,
+                               p.created_at, p.updated_at, p.client_id
+                        FROM team_members tm
+                        JOIN properties p ON p.client_id = tm.client_id
+                        WHERE tm.id = %s
+                        ORDER BY p.name
+                    """
+                    cursor.execute(query, (user_id,))
+                    properties = cursor.fetchall()
+                finally:
+                    cursor.close()
+            
+            client_id = properties[0]['client_id'] if properties else None
             print(f"📊 Found {len(properties)} properties for client_id {client_id}:")
             for prop in properties:
                 print(f"  - ID: {prop['id']}, Name: {prop['name']}")
             
-            cursor.close()
-            conn.close()
-            
             return properties
             
         except Exception as e:
@@ -735,52 +850,9 @@ class TaskService:
         
         message = f"*Select status for:*\n{task['title']}\n\nCurrent: {self.whatsapp_service.get_status_emoji(task['status'])} {task['status']}"
         
-        # Create interactive list sections for status selection
-        sections = [
-            {
-                "title": "Change Status",
-                "rows": [
-                    {
-                        "id": f"status_pending_{task_id}",
-                        "title": "⏳ Pending",
-                        "description": "Mark as pending"
-                    },
-                    {
-                        "id": f"status_inprogress_{task_id}",
-                        "title": "🔄 In Progress",
-                        "description": "Mark as in progress"
-                    },
-                    {
-                        "id": f"status_complete_{task_id}",
-                        "title": "✅ Complete",
-                        "description": "Mark as completed"
-                    },
-                    {
-                        "id": f"status_skipped_{task_id}",
-                        "title": "⏭️ Skipped",
-                        "description": "Mark as skipped"
-                    }
-                ]
-            },
-            {
-                "title": "Navigation",
-                "rows": [
-                    {
-                        "id": f"back_task_{task_id}",
-                        "title": "⬅️ Back to Task",
-                        "description": "Return to task options"
-                    }
-                ]
-            }
-        ]
-        
-        # Send interactive list (can have more than 3 options)
-        success = self.whatsapp_service.send_interactive_list(
-            phone_number,
-            message,
-            "Select Status",
-            sections,
-            language
+        # Send the pre-encoded status list (can have more than 3 options)
+        success = self.whatsapp_service.send_template(
+            phone_number, 'task_status_list', message, language, task_id=task_id
         )
         
         if not success:
@@ -829,14 +901,13 @@ class TaskService:
         
         self.whatsapp_service.send_message(phone_number, message, language, buttons)
 
-    def save_user_preferences(self, phone_number, preferences):
+    def save_user_preferences(self, phone_number, preferences, context=None):
         """Save user preferences to database"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
             # Get team member ID
-            member = self.team_member_model.find_by_phone(phone_number.replace('whatsapp:', ''))
+            if context is None:
+                context = RequestContext.load(self.team_member_model, phone_number)
+            member = context.member
             if not member:
                 return False
             
@@ -876,17 +947,20 @@ class TaskService:
                 print(f"📝 Executing query: {query}")
                 print(f"📝 With values: {values}")
                 
-                cursor.execute(query, values)
-                conn.commit()
+                with self.connection() as conn:
+                    cursor = conn.cursor()
+                    try:
+                        cursor.execute(query, values)
+                        conn.commit()
+                    finally:
+                        cursor.close()
                 
                 print(f"✅ Preferences saved successfully for user ID: {member['id']}")
-                
-                cursor.close()
-                conn.close()
+                context.apply_preferences(preferences)
+                # Keep the shared member cache in step with what we just wrote
+                self.team_member_model.cache_member(context.member)
                 return True
             
-            cursor.close()
-            conn.close()
             return False
             
         except Exception as e:
@@ -895,78 +969,85 @@ class TaskService:
             traceback.print_exc()
             return False
         
+    def ensure_database_structure(self):
+        """check_database_structure at most once per SCHEMA_CHECK_TTL, remembered on disk"""
+        cache_path = os.getenv('SCHEMA_CHECK_CACHE', 'data/schema_check.json')
+        ttl = int(os.getenv('SCHEMA_CHECK_TTL', 86400))
+        database = f"{self.db_config.get('host')}:{self.db_config.get('port')}/{self.db_config.get('database')}"
+        
+        cached = {}
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            pass
+        
+        entry = cached.get(database)
+        if entry and time.time() - entry['checked_at'] < ttl:
+            print(f"📊 Database structure checked {(time.time() - entry['checked_at']) / 3600:.1f}h ago, skipping")
+            return entry['columns']
+        
+        print("🔍 Checking database structure...")
+        columns = self.check_database_structure()
+        if columns is not None:
+            cached[database] = {
+                "checked_at": time.time(),
+                "columns": [{key: str(value) if value is not None else None for key, value in col.items()}
+                            for col in columns]
+            }
+            try:
+                directory = os.path.dirname(cache_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(cache_path, 'w', encoding='utf-8') as f:
+                    json.dump(cached, f, indent=2)
+            except OSError as e:
+                print(f"⚠️ Could not cache database structure check: {e}")
+        return columns
+    
     def check_database_structure(self):
         """Check if the required columns exist in the database"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            # Check team_members table structure
-            cursor.execute("""
-                SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE, COLUMN_DEFAULT
-                FROM INFORMATION_SCHEMA.COLUMNS 
-                WHERE TABLE_SCHEMA = DATABASE() 
-                AND TABLE_NAME = 'team_members'
-                AND COLUMN_NAME IN ('preferred_language', 'last_selected_property_id', 'notification_preferences', 'settings_updated_at')
-            """)
+            with self.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    # Check team_members table structure
+                    cursor.execute("""
+                        SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE, COLUMN_DEFAULT
+                        FROM INFORMATION_SCHEMA.COLUMNS 
+                        WHERE TABLE_SCHEMA = DATABASE() 
+                        AND TABLE_NAME = 'team_members'
+                        AND COLUMN_NAME IN ('preferred_language', 'last_selected_property_id', 'notification_preferences', 'settings_updated_at')
+                    """)
+                    columns = cursor.fetchall()
+                finally:
+                    cursor.close()
             
-            columns = cursor.fetchall()
             print("📊 Database columns found:")
             for col in columns:
                 print(f"  - {col['COLUMN_NAME']}: {col['DATA_TYPE']} (Nullable: {col['IS_NULLABLE']})")
             
-            cursor.close()
-            conn.close()
-            
             return columns
             
         except Exception as e:
             print(f"❌ Error checking database structure: {e}")
             return None    
     
-    def get_user_preferences(self, phone_number):
-        """Get user preferences from database"""
+    def get_user_preferences(self, phone_number, context=None):
+        """Get user preferences (loaded with the member row, no extra query)"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get team member ID
-            member = self.team_member_model.find_by_phone(phone_number.replace('whatsapp:', ''))
-            if not member:
-                return None
-            
-            query = """
-                SELECT 
-                    preferred_language,
-                    last_selected_property_id,
-                    notification_preferences,
-                    settings_updated_at
-                FROM team_members 
-                WHERE id = %s
-            """
-            cursor.execute(query, (member['id'],))
-            preferences = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
-            
-            # Parse JSON if exists
-            if preferences and preferences.get('notification_preferences'):
-                try:
-                    preferences['notification_preferences'] = json.loads(preferences['notification_preferences'])
-                except:
-                    preferences['notification_preferences'] = {}
-            
-            return preferences
+            if context is None:
+                context = RequestContext.load(self.team_member_model, phone_number)
+            return context.preferences
             
         except Exception as e:
             print(f"Error getting user preferences: {e}")
             return None
     
-    def _get_user_language(self, phone_number, message):
+    def _get_user_language(self, phone_number, message, context=None):
         """Get user's language preference, check DB first, then detect from message"""
         # Check database first
-        preferences = self.get_user_preferences(phone_number)
+        preferences = self.get_user_preferences(phone_number, context)
         if preferences and preferences.get('preferred_language'):
             db_language = preferences['preferred_language']
             self.user_languages[phone_number] = db_language
@@ -976,12 +1057,16 @@ class TaskService:
         if phone_number in self.user_languages:
             return self.user_languages[phone_number]
         
-        # Detect language from message
-        detected_lang = self.language_service.detect_language(message)
+        # Detect language from message (local only; an opt-in remote
+        # refinement may correct it for the next message)
+        def refined(language):
+            self.user_languages[phone_number] = language
+        
+        detected_lang = self.language_service.detect_language(message, on_refined=refined)
         self.user_languages[phone_number] = detected_lang
         return detected_lang
     
-    def save_language_preference(self, phone_number, language_code, language_name):
+    def save_language_preference(self, phone_number, language_code, language_name, context=None):
         """Save language preference to database"""
         # Update in-memory language preference
         self.user_languages[phone_number] = language_code
@@ -989,7 +1074,7 @@ class TaskService:
         # Save to database
         success = self.save_user_preferences(phone_number, {
             'preferred_language': language_code
-        })
+        }, context)
         
         if success:
             confirmation_message = f"✅ *Language Updated*\n\nYour preferred language has been set to: *{language_name}*"
@@ -1024,8 +1109,7 @@ class TaskService:
         tasks = self.task_model.get_tasks_by_user(member['id'])
         if not tasks:
             no_tasks_msg = self.whatsapp_service._get_translated_message('no_tasks', language)
-            buttons = self.whatsapp_service._create_welcome_buttons(language)
-            self.whatsapp_service.send_message(phone_number, no_tasks_msg, language, buttons)
+            self.whatsapp_service.send_template(phone_number, 'welcome_buttons', no_tasks_msg, language)
             return
         
         # Format task list
@@ -1110,9 +1194,9 @@ class TaskService:
         )
         
         # Create action buttons
-        buttons = self.whatsapp_service._create_task_completion_buttons(task_id, language)
-        
-        self.whatsapp_service.send_message(phone_number, message, language, buttons)
+        self.whatsapp_service.send_template(
+            phone_number, 'task_completion_buttons', message, language, task_id=task_id
+        )
 
     def mark_task_complete(self, member, phone_number, task_id, language):
         """Mark a task as complete via button"""
@@ -1158,8 +1242,7 @@ class TaskService:
         else:
             message = "❌ Failed to update task status."
         
-        buttons = self.whatsapp_service._create_welcome_buttons(language)
-        self.whatsapp_service.send_message(phone_number, message, language, buttons)
+        self.whatsapp_service.send_template(phone_number, 'welcome_buttons', message, language)
 
     def update_task_from_button(self, member, phone_number, task_id, status, language):
         """Update task status from button selection"""
@@ -1208,14 +1291,14 @@ class TaskService:
             return
 
         if new_status not in ['pending', 'in_progress', 'completed', 'skipped']:
-            status_error_msg = self.whatsapp_service._get_translated_message('invalid_status', language) or "❌ Invalid status. Use: pending, in_progress, completed, or skipped"
+            status_error_msg = self.whatsapp_service._get_translated_message('invalid_status', language)
             self.whatsapp_service.send_message(phone_number, status_error_msg, language)
             return
 
         tasks = self.task_model.get_tasks_by_user(member['id'])
         
         if task_index < 0 or task_index >= len(tasks):
-            task_error_msg = self.whatsapp_service._get_translated_message('invalid_task', language) or "❌ Invalid task number. Use *tasks* to see your task list."
+            task_error_msg = self.whatsapp_service._get_translated_message('invalid_task', language)
             self.whatsapp_service.send_message(phone_number, task_error_msg, language)
             return
 
@@ -1245,11 +1328,10 @@ class TaskService:
         success = self.task_model.update_task_status(task['id'], new_status, member['id'])
 
         if success:
-            status_updated_msg = self.whatsapp_service._get_translated_message('status_updated', language) or "✅ Status updated"
+            status_updated_msg = self.whatsapp_service._get_translated_message('status_updated', language)
             response_message = f"{status_updated_msg}: {task['title']} → {new_status}"
             # After status update, show action buttons
-            buttons = self.whatsapp_service._create_task_action_buttons(language)
-            self.whatsapp_service.send_message(phone_number, response_message, language, buttons)
+            self.whatsapp_service.send_template(phone_number, 'task_action_buttons', response_message, language)
         else:
             response_message = "❌ Failed to update task status."
             self.whatsapp_service.send_message(phone_number, response_message, language)
@@ -1280,57 +1362,84 @@ class TaskService:
             
             print(f"📋 Found task to attach image: Task ID: {task_id}")
             
-            # Download the image from WhatsApp Meta API
-            image_path = self.image_service.download_meta_media(
-                media_id, 
-                task_id, 
-                member['id']
-            )
-
-            if not image_path:
-                download_error_msg = self.whatsapp_service._get_translated_message('download_error', language)
-                self.whatsapp_service.send_message(phone_number, download_error_msg, language)
-                return
-
-            print(f"✅ Image downloaded: {image_path}")
+            job = {
+                'media_id': media_id,
+                'task_id': task_id,
+                'member_id': member['id'],
+                'client_id': member.get('client_id'),
+                'phone_number': phone_number,
+                'language': language
+            }
             
-            # Upload to backend API
-            client_id = member.get('client_id')
-            uploaded_filename = self.image_service.upload_to_backend(
-                image_path, 
-                task_id, 
-                client_id
-            ) if client_id else None
+            # Acknowledge first (send_message waits for the send), so the ack
+            # always arrives before the pipeline's final confirmation
+            photo_received_msg = self.whatsapp_service._get_translated_message('photo_received', language)
+            self.whatsapp_service.send_message(phone_number, photo_received_msg, language)
             
-            if uploaded_filename:
-                # Successfully uploaded via API
-                task_completed_msg = self.whatsapp_service._get_translated_message('task_completed', language)
-                
-                message = (
-                    f"{task_completed_msg} 🎉\n\n"
-                    f"✅ Photo attached successfully!\n"
-                    f"✅ Task marked as completed automatically!\n\n"
-                    f"{self.whatsapp_service._get_translated_message('thank_you', language)} 📸"
-                )
-            else:
-                # Fallback to direct database update
-                filename = os.path.basename(image_path)
-                success = self.task_model.add_completion_images_direct(task_id, filename, member['id'])
-                
-                if success:
-                    message = f"✅ Photo attached and task marked as completed!"
-                else:
-                    message = "❌ Error saving image to task."
-
-            # Send success message with welcome buttons
-            buttons = self.whatsapp_service._create_welcome_buttons(language)
-            self.whatsapp_service.send_message(phone_number, message, language, buttons)
+            # Download, upload and attach continue in the background
+            if not self.media_pipeline.submit(job):
+                # Pipeline stopped or full: do the work here, as before
+                self.media_pipeline.run_inline(job)
 
         except Exception as e:
             print(f"❌ Error in image upload: {e}")
             error_msg = self.whatsapp_service._get_translated_message('upload_error', language)
             self.whatsapp_service.send_message(phone_number, error_msg, language)
 
+    def _download_job_media(self, job):
+        """Media pipeline stage: download the image from WhatsApp Meta API"""
+        image_path = self.image_service.download_meta_media(job['media_id'], job['task_id'], job['member_id'])
+        if image_path:
+            print(f"✅ Image downloaded: {image_path}")
+        return image_path
+
+    def _upload_job_media(self, job):
+        """Media pipeline stage: upload to backend API, spooled for retry if it fails"""
+        image_hash = self.image_service.proof_store.digest_of(job['image_path']) or file_hash(job['image_path'])
+        filename = self.upload_spool.submit(
+            job['image_path'], job['task_id'], job['client_id'], job['member_id'], image_hash=image_hash
+        )
+        if not filename and self.upload_spool.is_queued(job['task_id'], image_hash):
+            # Left to the spool: no direct attach, the backend adds the proof on delivery
+            job['spooled'] = True
+        return filename
+
+    def _attach_job_media(self, job):
+        """Media pipeline stage: fallback to direct database update when the upload was not spooled"""
+        filename = os.path.basename(job['image_path'])
+        return self.task_model.add_completion_images_direct(job['task_id'], filename, job['member_id'])
+
+    def _notify_image_job(self, job):
+        """Media pipeline stage: tell the worker how the photo ended up"""
+        phone_number, language, outcome = job['phone_number'], job['language'], job['outcome']
+        
+        if outcome == 'download_failed':
+            download_error_msg = self.whatsapp_service._get_translated_message('download_error', language)
+            return self.whatsapp_service.send_message(phone_number, download_error_msg, language)
+        if outcome == 'error':
+            error_msg = self.whatsapp_service._get_translated_message('upload_error', language)
+            return self.whatsapp_service.send_message(phone_number, error_msg, language)
+        
+        if outcome == 'uploaded':
+            # Successfully uploaded via API
+            task_completed_msg = self.whatsapp_service._get_translated_message('task_completed', language)
+            
+            message = (
+                f"{task_completed_msg} 🎉\n\n"
+                f"✅ Photo attached successfully!\n"
+                f"✅ Task marked as completed automatically!\n\n"
+                f"{self.whatsapp_service._get_translated_message('thank_you', language)} 📸"
+            )
+        elif outcome == 'spooled':
+            message = self.whatsapp_service._get_translated_message('photo_queued', language)
+        elif outcome == 'attached':
+            message = f"✅ Photo attached and task marked as completed!"
+        else:
+            message = "❌ Error saving image to task."
+
+        # Send success message with welcome buttons
+        return self.whatsapp_service.send_template(phone_number, 'welcome_buttons', message, language)
+
     def _store_user_context(self, phone_number, context_data):
         """Store temporary user context for button interactions"""
         # Simple in-memory storage - consider using database for production
@@ -1354,12 +1463,11 @@ class TaskService:
         tasks = self.task_model.get_pending_photo_tasks(member['id'])
         
         if not tasks:
-            no_pending_msg = self.whatsapp_service._get_translated_message('no_pending_photos', language) or "✅ No tasks waiting for photos!\n\nAll your completed tasks have their required photos."
-            buttons = self.whatsapp_service._create_welcome_buttons(language)
-            self.whatsapp_service.send_message(phone_number, no_pending_msg, language, buttons)
+            no_pending_msg = self.whatsapp_service._get_translated_message('no_pending_photos', language)
+            self.whatsapp_service.send_template(phone_number, 'welcome_buttons', no_pending_msg, language)
             return
         
-        pending_header = self.whatsapp_service._get_translated_message('pending_photos_header', language) or "📸 *Tasks Waiting for Photos:*\n\n"
+        pending_header = self.whatsapp_service._get_translated_message('pending_photos_header', language)
         message = pending_header
         
         for i, task in enumerate(tasks, 1):
@@ -1367,51 +1475,23 @@ class TaskService:
             message += f"   🏠 {task.get('property_name', 'N/A')}\n"
             message += f"   📅 Completed: {task.get('completed_at', 'N/A')}\n\n"
         
-        send_photo_msg = self.whatsapp_service._get_translated_message('send_photo_instruction', language) or "Simply send a photo now to attach it to the most recent task!"
+        send_photo_msg = self.whatsapp_service._get_translated_message('send_photo_instruction', language)
         message += send_photo_msg
         
-        buttons = self.whatsapp_service._create_welcome_buttons(language)
-        self.whatsapp_service.send_message(phone_number, message, language, buttons)
+        self.whatsapp_service.send_template(phone_number, 'welcome_buttons', message, language)
 
     def handle_help(self, member, phone_number, language):
         """Show help with main menu option"""
-        help_message = self.whatsapp_service._get_translated_message('help_full', language) or (
-            f"Hello {member['name']}! I'm your team management assistant.\n\n"
-            "Available commands:\n"
-            "• *tasks* - List your assigned tasks\n"
-            "• *status [task-number] [status]* - Update task status\n"
-            "• *pending photos* - View tasks waiting for photos\n"
-            "• *recurring* - View your recurring tasks\n"
-            "• *settings* - Configure your preferences\n"
-            "• Send image to attach to completed task\n\n"
-            "Examples:\n"
-            "*status 1 completed* - Mark task 1 as completed\n"
-            "*tasks* - View all your tasks\n"
-            "*pending photos* - See tasks needing photos\n"
-            "*recurring* - View recurring tasks\n\n"
-            "📸 *Note:* Some tasks require photos before completion. "
-            "Just send the photo and I'll handle the rest!"
-        )
+        help_message = catalog.format('help_full', language, member['name'])
         
         # Add main menu button
-        buttons = [
-            {
-                "type": "reply",
-                "reply": {
-                    "id": "main_menu",  # Changed from "help_main_menu" to "main_menu"
-                    "title": "🏠 Main Menu"
-                }
-            }
-        ]
-        
-        self.whatsapp_service.send_message(phone_number, help_message, language, buttons)
+        self.whatsapp_service.send_template(phone_number, 'main_menu_button', help_message, language)
 
     def handle_unknown_command(self, member, phone_number, language):
-        unknown_msg = self.whatsapp_service._get_translated_message('unknown_command', language) or "I didn't understand that command."
+        unknown_msg = self.whatsapp_service._get_translated_message('unknown_command', language)
         
         # Provide helpful buttons
-        buttons = self.whatsapp_service._create_welcome_buttons(language)
-        self.whatsapp_service.send_message(phone_number, unknown_msg, language, buttons)
+        self.whatsapp_service.send_template(phone_number, 'welcome_buttons', unknown_msg, language)
 
     def handle_recurring_tasks(self, member, phone_number, language):
         """Show recurring tasks assigned to the user"""
@@ -1443,73 +1523,13 @@ class TaskService:
 
     def _get_recurring_translated_message(self, message_key, language='en'):
         """Get translated messages for recurring tasks"""
-        messages = {
-            'en': {
-                'no_recurring_tasks': "You don't have any recurring tasks assigned. 🔄",
-                'recurring_tasks_header': "🔄 *Your Recurring Tasks*",
-                'recurring_reminder': "🔔 Recurring task reminder"
-            },
-            'hi': {
-                'no_recurring_tasks': "आपके पास कोई आवर्ती कार्य नहीं हैं। 🔄",
-                'recurring_tasks_header': "🔄 *आपके आवर्ती कार्य*",
-                'recurring_reminder': "🔔 आवर्ती कार्य अनुस्मारक"
-            },
-            'es': {
-                'no_recurring_tasks': "No tienes tareas recurrentes asignadas. 🔄",
-                'recurring_tasks_header': "🔄 *Tus Tareas Recurrentes*",
-                'recurring_reminder': "🔔 Recordatorio de tarea recurrente"
-            }
-        }
-        
-        if language not in messages:
-            language = 'en'
-            
-        return messages[language].get(message_key, messages['en'].get(message_key, ""))
+        return catalog.get(message_key, language)
     
     def handle_language_change(self, member, phone_number, language):
         """Handle language change request and save to DB"""
         message = "🌐 *Language Settings*\n\nSelect your preferred language:"
         
-        sections = [
-            {
-                "title": "Available Languages",
-                "rows": [
-                    {
-                        "id": "lang_en",
-                        "title": "🇺🇸 English",
-                        "description": "Switch to English"
-                    },
-                    {
-                        "id": "lang_hi",
-                        "title": "🇮🇳 Hindi",
-                        "description": "हिंदी में बदलें"
-                    },
-                    {
-                        "id": "lang_es",
-                        "title": "🇪🇸 Spanish",
-                        "description": "Cambiar a Español"
-                    }
-                ]
-            },
-            {
-                "title": "Navigation",
-                "rows": [
-                    {
-                        "id": "back_settings",
-                        "title": "⬅️ Back to Settings",
-                        "description": "Return to settings menu"
-                    }
-                ]
-            }
-        ]
-        
-        success = self.whatsapp_service.send_interactive_list(
-            phone_number, 
-            message, 
-            "Select Language", 
-            sections,
-            language
-        )
+        success = self.whatsapp_service.send_template(phone_number, 'language_list', message, language)
         
         if not success:
             buttons = [
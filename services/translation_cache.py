@@ -0,0 +1,196 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.metrics import Counters
+
+
+def translation_key(text, source_language, target_language):
+    """(text hash, source, target); the hash keeps long descriptions out of the index"""
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+    return digest, source_language, target_language
+
+
+class TranslationCache:
+    """Two-tier cache of translated strings.
+
+    An in-process TTL + LRU dict serves repeat translations in microseconds.
+    When ``db_path`` is given, entries are also written to a local SQLite
+    table, so they survive restarts; a memory miss that finds a fresh row on
+    disk promotes it back into memory. The disk tier is trimmed to
+    ``db_max_entries`` (least recently stored first) every PURGE_EVERY writes.
+    """
+
+    PURGE_EVERY = 500
+
+    def __init__(self, ttl_seconds=7 * 86400, max_entries=5000, db_path=None, db_max_entries=200000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self.db_path = db_path
+        self.db_max_entries = max(1, int(db_max_entries))
+        self.logger = logging.getLogger(__name__)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = None
+
+        self.counters = Counters('memory_hits', 'disk_hits', 'misses', 'stores', 'evictions', 'disk_errors')
+
+        if db_path:
+            self._open_db()
+
+    def get(self, text, source_language, target_language):
+        """Cached translation, or None on a miss"""
+        key = translation_key(text, source_language, target_language)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, translated = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.counters.incr('memory_hits')
+                    return translated
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db_get(key, now)
+                if row is not None:
+                    translated, stored_at = row
+                    self._remember(key, translated, stored_at + self.ttl_seconds)
+                    self.counters.incr('disk_hits')
+                    return translated
+
+            self.counters.incr('misses')
+            return None
+
+    def put(self, text, source_language, target_language, translated):
+        if not text or not translated:
+            return
+        key = translation_key(text, source_language, target_language)
+        now = time.time()
+        with self._lock:
+            self._remember(key, translated, now + self.ttl_seconds)
+            self.counters.incr('stores')
+            if self._db is not None:
+                self._db_put(key, translated, now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations")
+                self._db.commit()
+
+    def get_stats(self):
+        counters = self.counters.snapshot()
+        hits = counters['memory_hits'] + counters['disk_hits']
+        lookups = hits + counters['misses']
+        with self._lock:
+            size = len(self._entries)
+            disk_size = self._db_count() if self._db is not None else 0
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "disk_size": disk_size,
+            "db_max_entries": self.db_max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "durable": self._db is not None,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_hit_rate": round(counters['memory_hits'] / lookups, 4) if lookups else 0.0,
+            "counters": counters,
+        }
+
+    def _remember(self, key, translated, expires_at):
+        self._entries[key] = (expires_at, translated)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters.incr('evictions')
+
+    def _open_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                text_hash TEXT NOT NULL,
+                source_language TEXT NOT NULL,
+                target_language TEXT NOT NULL,
+                translated TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (text_hash, source_language, target_language)
+            )
+        """)
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_translations_stored_at ON translations (stored_at)"
+        )
+        self._db.commit()
+        self._purge_db(time.time())
+
+    def _db_get(self, key, now):
+        try:
+            return self._db.execute(
+                "SELECT translated, stored_at FROM translations "
+                "WHERE text_hash = ? AND source_language = ? AND target_language = ? AND stored_at > ?",
+                key + (now - self.ttl_seconds,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.counters.incr('disk_errors')
+            self.logger.error(f"Translation cache read error: {e}")
+            return None
+
+    def _db_put(self, key, translated, now):
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations "
+                "(text_hash, source_language, target_language, translated, stored_at) VALUES (?, ?, ?, ?, ?)",
+                key + (translated, now),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._purge_db(now)
+            self._db.commit()
+        except sqlite3.Error as e:
+            # The memory tier still has it, don't fail the translation
+            self.counters.incr('disk_errors')
+            self.logger.error(f"Translation cache write error: {e}")
+
+    def _purge_db(self, now):
+        """Drop expired rows, then the oldest rows beyond db_max_entries"""
+        self._db.execute("DELETE FROM translations WHERE stored_at <= ?", (now - self.ttl_seconds,))
+        excess = self._db_count() - self.db_max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY stored_at LIMIT ?)",
+                (excess,),
+            )
+        self._db.commit()
+
+    def _db_count(self):
+        return self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+
+_translation_cache = None
+_translation_cache_lock = threading.Lock()
+
+
+def get_translation_cache():
+    """The shared translation cache, sized from the TRANSLATION_CACHE_* settings"""
+    global _translation_cache
+    with _translation_cache_lock:
+        if _translation_cache is None:
+            _translation_cache = TranslationCache(
+                ttl_seconds=int(os.getenv('TRANSLATION_CACHE_TTL', 7 * 86400)),
+                max_entries=int(os.getenv('TRANSLATION_CACHE_SIZE', 5000)),
+                db_path=os.getenv('TRANSLATION_CACHE_DB_PATH', 'data/translation_cache.sqlite3') or None,
+                db_max_entries=int(os.getenv('TRANSLATION_CACHE_DB_SIZE', 200000)),
+            )
+        return _translation_cache
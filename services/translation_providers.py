@@ -0,0 +1,260 @@
+import html
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.metrics import Counters, LatencyStats
+
+
+class GoogleProvider:
+    """Google Translate's free mobile page, the endpoint deep-translator scrapes.
+
+    Called over the shared keep-alive client instead of deep-translator,
+    which sends no timeout: every request is bounded by the remaining hedge
+    deadline, so a hung call gives its executor thread back in time.
+    """
+
+    name = 'google'
+    URL = "https://translate.google.com/m"
+    RESULT = re.compile(r'<div[^>]*class="(?:result-container|t0)"[^>]*>(.*?)</div>', re.S)
+    # Our codes that Google spells differently
+    CODES = {'zh': 'zh-CN'}
+
+    def __init__(self, http=None):
+        if http is None:
+            from services.http_client import get_http_client
+            http = get_http_client('google')
+        self.http = http
+
+    def translate(self, text, source_language, target_language, timeout):
+        response = self.http.get(
+            self.URL, endpoint='translate', timeout=timeout,
+            params={'sl': self.CODES.get(source_language, source_language),
+                    'tl': self.CODES.get(target_language, target_language), 'q': text}
+        )
+        if response.status_code == 200:
+            match = self.RESULT.search(response.text)
+            if match:
+                return html.unescape(match.group(1)).strip()
+        return None
+
+
+class MyMemoryProvider:
+    """MyMemory Translation API (free), over the shared keep-alive client"""
+
+    name = 'mymemory'
+    URL = "https://api.mymemory.translated.net/get"
+
+    def __init__(self, http=None):
+        if http is None:
+            from services.http_client import get_http_client
+            http = get_http_client('mymemory')
+        self.http = http
+
+    def translate(self, text, source_language, target_language, timeout):
+        response = self.http.get(
+            self.URL, endpoint='translate', timeout=timeout,
+            params={'q': text, 'langpair': f'{source_language}|{target_language}'}
+        )
+        if response.status_code == 200:
+            data = response.json()
+            if data['responseStatus'] == 200:
+                return data['responseData']['translatedText']
+        return None
+
+
+class ProviderStats:
+    """Counters, latency and moving averages used to rank one provider"""
+
+    ALPHA = 0.2
+
+    def __init__(self, name, position):
+        self.name = name
+        self.position = position
+        self.counters = Counters('attempts', 'successes', 'failures', 'wins', 'hedges', 'cancelled')
+        self.latency = LatencyStats()
+        self.success_ewma = 1.0
+        self.latency_ewma = None
+        self._lock = threading.Lock()
+
+    def record(self, ok, seconds):
+        self.counters.incr('successes' if ok else 'failures')
+        self.latency.record(seconds)
+        with self._lock:
+            self.success_ewma += self.ALPHA * ((1.0 if ok else 0.0) - self.success_ewma)
+            # Only answers feed the latency average: a stall or failure is cut
+            # short by the hedge and already counts through success_ewma
+            if ok:
+                if self.latency_ewma is None:
+                    self.latency_ewma = seconds
+                else:
+                    self.latency_ewma += self.ALPHA * (seconds - self.latency_ewma)
+
+    def score(self):
+        """Expected seconds to a good answer; lower ranks first.
+
+        Latency of successful answers over the success rate. Providers
+        without samples score 0 so each one gets tried early; one that has
+        only failed so far ranks last.
+        """
+        with self._lock:
+            if self.latency_ewma is None:
+                return 0.0 if self.success_ewma >= 1.0 else float('inf')
+            return self.latency_ewma / max(self.success_ewma, 0.05)
+
+    def snapshot(self):
+        with self._lock:
+            success_ewma = self.success_ewma
+            latency_ewma = self.latency_ewma
+        counters = self.counters.snapshot()
+        finished = counters['successes'] + counters['failures']
+        return {
+            "success_rate": round(counters['successes'] / finished, 4) if finished else None,
+            "success_ewma": round(success_ewma, 4),
+            "latency_ewma_ms": round(latency_ewma * 1000, 1) if latency_ewma is not None else None,
+            "counters": counters,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class HedgedTranslator:
+    """Races translation providers within one overall deadline.
+
+    Providers are tried best-ranked first. If the first has not answered
+    after ``hedge_delay`` seconds, the next is started as a hedge; a failure
+    starts the next one immediately. The first non-empty translation wins,
+    even one identical to the input (names, numbers, "OK"), and the other
+    attempts are cancelled: queued
+    ones never run, running ones get at most the remaining deadline as their
+    request timeout and their late answer only feeds the ranking.
+
+    Every EXPLORE_EVERY-th request swaps the top two providers so a demoted
+    provider keeps getting samples and can win its place back.
+
+    A provider is any object with ``name`` and
+    ``translate(text, source_language, target_language, timeout)``.
+    """
+
+    EXPLORE_EVERY = 20
+
+    def __init__(self, providers, deadline=8.0, hedge_delay=0.8, max_workers=8):
+        self.providers = list(providers)
+        self.deadline = deadline
+        self.hedge_delay = hedge_delay
+        self.logger = logging.getLogger(__name__)
+        self._stats = {p.name: ProviderStats(p.name, i) for i, p in enumerate(self.providers)}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+        self.counters = Counters('requests', 'hedged', 'timeouts', 'all_failed')
+        self.latency = LatencyStats()
+
+    def translate(self, text, source_language, target_language, deadline=None):
+        """Winning translation, or None if nothing answered in time"""
+        if source_language == target_language:
+            return text
+        self.counters.incr('requests')
+        started = time.monotonic()
+        deadline_at = started + (deadline if deadline is not None else self.deadline)
+        ranked = self.ranked()
+        if len(ranked) > 1 and self.counters.get('requests') % self.EXPLORE_EVERY == 0:
+            ranked[0], ranked[1] = ranked[1], ranked[0]
+        pending = {}
+        next_index = 0
+        next_hedge_at = started
+        translated = None
+
+        while pending or next_index < len(ranked):
+            now = time.monotonic()
+            if now >= deadline_at:
+                self.counters.incr('timeouts')
+                break
+
+            if next_index < len(ranked) and (not pending or now >= next_hedge_at):
+                provider = ranked[next_index]
+                next_index += 1
+                if pending:
+                    self.counters.incr('hedged')
+                    self._stats[provider.name].counters.incr('hedges')
+                future = self._executor.submit(
+                    self._attempt, provider, text, source_language, target_language, deadline_at - now
+                )
+                pending[future] = provider
+                next_hedge_at = now + self.hedge_delay
+                continue
+
+            wait_until = deadline_at
+            if next_index < len(ranked):
+                wait_until = min(wait_until, next_hedge_at)
+            done, _ = wait(pending, timeout=max(0.0, wait_until - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = pending.pop(future)
+                result = future.result()
+                if result is not None and translated is None:
+                    translated = result
+                    self._stats[provider.name].counters.incr('wins')
+            if translated is not None:
+                break
+        else:
+            self.counters.incr('all_failed')
+
+        for future, provider in pending.items():
+            # An attempt that is already running cannot be cancelled; it finishes in the background
+            if future.cancel():
+                self._stats[provider.name].counters.incr('cancelled')
+
+        self.latency.record(time.monotonic() - started)
+        return translated
+
+    def ranked(self):
+        """Providers in the order they will be tried"""
+        return sorted(
+            self.providers,
+            key=lambda p: (self._stats[p.name].score(), self._stats[p.name].position)
+        )
+
+    def get_stats(self):
+        return {
+            "deadline_seconds": self.deadline,
+            "hedge_delay_seconds": self.hedge_delay,
+            "order": [p.name for p in self.ranked()],
+            "counters": self.counters.snapshot(),
+            "latency": self.latency.snapshot(),
+            "providers": {name: stats.snapshot() for name, stats in self._stats.items()},
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _attempt(self, provider, text, source_language, target_language, timeout):
+        stats = self._stats[provider.name]
+        stats.counters.incr('attempts')
+        started = time.monotonic()
+        try:
+            translated = provider.translate(text, source_language, target_language, timeout)
+        except Exception as e:
+            self.logger.warning(f"{provider.name} translation failed: {e}")
+            translated = None
+        # Only an empty answer or an error is a failure; an unchanged text is a valid translation
+        ok = bool(translated and translated.strip())
+        stats.record(ok, time.monotonic() - started)
+        return translated if ok else None
+
+
+_translator = None
+_translator_lock = threading.Lock()
+
+
+def get_hedged_translator():
+    """The shared Google + MyMemory translator, timed by the TRANSLATION_* settings"""
+    global _translator
+    with _translator_lock:
+        if _translator is None:
+            _translator = HedgedTranslator(
+                [GoogleProvider(), MyMemoryProvider()],
+                deadline=float(os.getenv('TRANSLATION_DEADLINE', 8.0)),
+                hedge_delay=float(os.getenv('TRANSLATION_HEDGE_DELAY', 0.8)),
+                max_workers=int(os.getenv('TRANSLATION_WORKERS', 8)),
+            )
+        return _translator
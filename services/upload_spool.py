@@ -0,0 +1,455 @@
+"""Durable spool of photo uploads the backend API has not accepted yet.
+
+    python -m services.upload_spool stats
+    python -m services.upload_spool list --status pending
+    python -m services.upload_spool drain [--failed]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from utils.metrics import Counters, LatencyStats
+
+PENDING = 'pending'
+UPLOADING = 'uploading'
+UPLOADED = 'uploaded'
+FAILED = 'failed'
+
+ENTRY_FIELDS = ('id', 'idempotency_key', 'task_id', 'client_id', 'member_id', 'image_path', 'file_hash',
+                'status', 'attempts', 'next_attempt_at', 'last_error', 'backend_filename',
+                'created_at', 'updated_at')
+
+
+def file_hash(path, chunk_size=64 * 1024):
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def idempotency_key(task_id, image_hash):
+    """One key per (task occurrence, photo bytes), sent with every attempt"""
+    return f"task-{task_id}-{image_hash}"
+
+
+class UploadSpool:
+    """Retry queue for backend photo uploads, kept in SQLite.
+
+    ``submit()`` tries the upload once. When it fails the photo is recorded
+    as pending and a background worker retries it with exponential backoff
+    and jitter (``base_delay`` doubling up to ``max_delay``). Every attempt
+    sends the same ``Idempotency-Key`` built from the task occurrence id and
+    the file's sha256. Direct uploads are recorded too, so a key the spool
+    has seen uploaded is not sent again.
+
+    After a failed attempt the backend counts as down for ``base_delay``
+    seconds: new photos go straight to the spool instead of waiting on
+    timeouts, and the worker stops its round early. Entries that still fail
+    after ``max_attempts`` are marked failed, not deleted, and can be put
+    back with ``drain(include_failed=True)``; the same photo resent for the
+    task also starts its entry over. Uploaded entries are kept for
+    ``retention_seconds``.
+
+    ``upload(image_path, task_id, client_id, idempotency_key=...)`` returns
+    the backend filename or None, like ``ImageService.upload_to_backend``.
+    """
+
+    def __init__(self, upload, db_path='data/upload_spool.sqlite3', base_delay=30, max_delay=3600,
+                 max_attempts=20, poll_interval=5, batch_size=20, retention_seconds=7 * 86400,
+                 claim_timeout=600):
+        self.upload = upload
+        self.db_path = db_path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.retention_seconds = retention_seconds
+        self.claim_timeout = claim_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._running = False
+        self._down_until = 0.0
+
+        self.counters = Counters('direct_uploads', 'spooled', 'requeued', 'already_uploaded', 'attempts',
+                                 'retried_uploads', 'retry_failures', 'failed',
+                                 'bytes_uploaded', 'bytes_not_resent')
+        self.attempt_latency = LatencyStats()
+
+    def open(self):
+        """Open the spool table without starting the retry worker (CLI use)"""
+        if self._db is not None:
+            return
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The CLI may drain the same file while the app is running
+        self._db = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS upload_spool (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                task_id INTEGER NOT NULL,
+                client_id TEXT NOT NULL,
+                member_id INTEGER,
+                image_path TEXT NOT NULL,
+                file_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                backend_filename TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_upload_spool_due ON upload_spool (status, next_attempt_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_upload_spool_hash ON upload_spool (file_hash)")
+        self._db.execute(
+            "DELETE FROM upload_spool WHERE status = ? AND updated_at < ?",
+            (UPLOADED, time.time() - self.retention_seconds),
+        )
+        self._db.commit()
+
+    def start(self):
+        """Open the spool and start the retry worker"""
+        if self._running:
+            return
+        self.open()
+        self._stop.clear()
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="upload-spool", daemon=True)
+        self._thread.start()
+        pending = self._count(PENDING)
+        self.logger.info(f"✅ Upload spool started, {pending} uploads pending")
+
+    def stop(self, timeout=5):
+        """Stop the retry worker; pending uploads stay on disk"""
+        self._running = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def is_queued(self, task_id, image_hash):
+        """True while the photo waits for a retry, i.e. the spool will still deliver it"""
+        if self._db is None:
+            return False
+        entry = self._get(idempotency_key(task_id, image_hash))
+        return bool(entry) and entry['status'] in (PENDING, UPLOADING)
+
+    def backend_available(self):
+        return time.time() >= self._down_until
+
+    def submit(self, image_path, task_id, client_id, member_id=None, image_hash=None):
+        """Upload now if the backend is up, otherwise spool. Returns the backend filename or None."""
+        if self._db is None:
+            # Spool not opened: plain upload, as before
+            return self.upload(image_path, task_id, client_id)
+
+        image_hash = image_hash or file_hash(image_path)
+        key = idempotency_key(task_id, image_hash)
+        entry = self._get(key)
+        if entry and entry['status'] == UPLOADED:
+            # The same photo resent for the same task
+            self.counters.incr('already_uploaded')
+            self.counters.incr('bytes_not_resent', os.path.getsize(image_path))
+            return entry['backend_filename']
+        if entry and entry['status'] == FAILED:
+            return self._requeue(entry, image_path)
+        if entry:
+            # Already waiting for a retry
+            return None
+
+        if self.backend_available():
+            started = time.perf_counter()
+            filename = self.upload(image_path, task_id, client_id, idempotency_key=key)
+            self.attempt_latency.record(time.perf_counter() - started)
+            self.counters.incr('attempts')
+            if filename:
+                self._backend_up()
+                self.counters.incr('direct_uploads')
+                self.counters.incr('bytes_uploaded', os.path.getsize(image_path))
+                # Recorded so a resend is not uploaded again and the file can be reclaimed
+                self._insert(key, image_path, image_hash, task_id, client_id, member_id, 1, None,
+                             status=UPLOADED, backend_filename=filename)
+                return filename
+            self._backend_down()
+            error, attempts = "upload failed", 1
+        else:
+            error, attempts = "backend unavailable", 0
+
+        if self._insert(key, image_path, image_hash, task_id, client_id, member_id, attempts, error):
+            self.counters.incr('spooled')
+        print(f"📥 Upload of task {task_id} photo spooled for retry ({key})")
+        return None
+
+    def _requeue(self, entry, image_path):
+        """Start a failed entry over when its photo is resent; tries it now if the backend is up"""
+        entry = dict(entry, status=PENDING, attempts=0, image_path=image_path, next_attempt_at=time.time())
+        self._update(entry['id'], status=PENDING, attempts=0, image_path=image_path,
+                     next_attempt_at=entry['next_attempt_at'])
+        self.counters.incr('requeued')
+        print(f"🔁 Upload of task {entry['task_id']} photo resent after giving up, retrying "
+              f"({entry['idempotency_key']})")
+        if self.backend_available():
+            self._attempt(entry)
+        entry = self._get(entry['idempotency_key'])
+        return entry['backend_filename'] if entry['status'] == UPLOADED else None
+
+    def retry_due(self):
+        """Retry the pending uploads that are due; stops at the first failure"""
+        if not self.backend_available():
+            return 0
+        uploaded = 0
+        for entry in self._due(limit=self.batch_size):
+            if not self._attempt(entry):
+                break
+            uploaded += 1
+        return uploaded
+
+    def drain(self, include_failed=False):
+        """Try every pending upload now, ignoring backoff. Returns counts."""
+        if include_failed:
+            with self._db_lock:
+                self._db.execute(
+                    "UPDATE upload_spool SET status = ?, attempts = 0, updated_at = ? WHERE status = ?",
+                    (PENDING, time.time(), FAILED),
+                )
+                self._db.commit()
+
+        uploaded = failed = 0
+        for entry in self._due(limit=None, due_before=float('inf')):
+            if self._attempt(entry):
+                uploaded += 1
+            else:
+                failed += 1
+        return {"uploaded": uploaded, "failed": failed, "pending": self._count(PENDING)}
+
+    def reclaimable_hashes(self, uploaded_before):
+        """Digests uploaded before the given time that no unfinished entry still needs"""
+        if self._db is None:
+            return set()
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT file_hash FROM upload_spool WHERE status = ? AND updated_at < ? "
+                "AND file_hash NOT IN (SELECT file_hash FROM upload_spool WHERE status != ?)",
+                (UPLOADED, uploaded_before, UPLOADED),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def list_entries(self, status=None, limit=50):
+        query = f"SELECT {', '.join(ENTRY_FIELDS)} FROM upload_spool"
+        params = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY id DESC LIMIT ?"
+        with self._db_lock:
+            rows = self._db.execute(query, params + (limit,)).fetchall()
+        return [dict(zip(ENTRY_FIELDS, row)) for row in rows]
+
+    def get_stats(self):
+        by_status, oldest = {}, None
+        if self._db is not None:
+            with self._db_lock:
+                by_status = dict(self._db.execute(
+                    "SELECT status, COUNT(*) FROM upload_spool GROUP BY status"
+                ).fetchall())
+                oldest = self._db.execute(
+                    "SELECT MIN(created_at) FROM upload_spool WHERE status = ?", (PENDING,)
+                ).fetchone()[0]
+        return {
+            "running": self._running,
+            "backend_available": self.backend_available(),
+            "entries_by_status": by_status,
+            "oldest_pending_age_s": round(time.time() - oldest, 1) if oldest else None,
+            "counters": self.counters.snapshot(),
+            "attempt_latency": self.attempt_latency.snapshot(),
+        }
+
+    def _worker(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.retry_due()
+            except Exception as e:
+                self.logger.error(f"❌ Upload spool retry round failed: {e}")
+
+    def _attempt(self, entry):
+        """Claim one entry and upload it; True when the backend accepted it"""
+        if not self._claim(entry['id']):
+            # Another process (the CLI or the app) has it
+            return True
+
+        if not os.path.exists(entry['image_path']):
+            self._update(entry['id'], status=FAILED, last_error="file missing")
+            self.counters.incr('failed')
+            return True
+
+        started = time.perf_counter()
+        try:
+            filename = self.upload(entry['image_path'], entry['task_id'], entry['client_id'],
+                                   idempotency_key=entry['idempotency_key'])
+            error = None if filename else "upload failed"
+        except Exception as e:
+            filename, error = None, str(e)
+        self.attempt_latency.record(time.perf_counter() - started)
+        self.counters.incr('attempts')
+
+        if filename:
+            self._backend_up()
+            self._update(entry['id'], status=UPLOADED, backend_filename=filename, last_error=None)
+            self.counters.incr('retried_uploads')
+            self.counters.incr('bytes_uploaded', os.path.getsize(entry['image_path']))
+            print(f"✅ Spooled upload for task {entry['task_id']} delivered")
+            return True
+
+        self._backend_down()
+        attempts = entry['attempts'] + 1
+        self.counters.incr('retry_failures')
+        if self.max_attempts and attempts >= self.max_attempts:
+            self._update(entry['id'], status=FAILED, attempts=attempts, last_error=error)
+            self.counters.incr('failed')
+            self.logger.error(f"❌ Giving up on spooled upload {entry['idempotency_key']} after {attempts} attempts")
+        else:
+            self._update(entry['id'], status=PENDING, attempts=attempts, last_error=error,
+                         next_attempt_at=time.time() + self._backoff(attempts))
+        return False
+
+    def _backoff(self, attempts):
+        delay = min(self.max_delay, self.base_delay * 2 ** max(0, attempts - 1))
+        # Jitter so photos spooled together do not retry together
+        return delay * random.uniform(0.5, 1.0)
+
+    def _backend_down(self):
+        self._down_until = time.time() + self.base_delay
+
+    def _backend_up(self):
+        self._down_until = 0.0
+
+    def _get(self, key):
+        with self._db_lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(ENTRY_FIELDS)} FROM upload_spool WHERE idempotency_key = ?", (key,)
+            ).fetchone()
+        return dict(zip(ENTRY_FIELDS, row)) if row else None
+
+    def _release_stale_claims(self):
+        """Put back entries claimed by a process that died mid-upload"""
+        with self._db_lock:
+            cursor = self._db.execute(
+                "UPDATE upload_spool SET status = ? WHERE status = ? AND updated_at < ?",
+                (PENDING, UPLOADING, time.time() - self.claim_timeout),
+            )
+            self._db.commit()
+        if cursor.rowcount:
+            self.logger.warning(f"Released {cursor.rowcount} stale upload claims")
+
+    def _due(self, limit, due_before=None):
+        # Checked on every pass: a crash and restart inside claim_timeout
+        # would otherwise leave its claims stuck in 'uploading'
+        self._release_stale_claims()
+        query = (f"SELECT {', '.join(ENTRY_FIELDS)} FROM upload_spool "
+                 f"WHERE status = ? AND next_attempt_at <= ? ORDER BY next_attempt_at")
+        params = (PENDING, time.time() if due_before is None else due_before)
+        if limit:
+            query += " LIMIT ?"
+            params += (limit,)
+        with self._db_lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [dict(zip(ENTRY_FIELDS, row)) for row in rows]
+
+    def _count(self, status):
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM upload_spool WHERE status = ?", (status,)).fetchone()[0]
+
+    def _insert(self, key, image_path, image_hash, task_id, client_id, member_id, attempts, error,
+                status=PENDING, backend_filename=None):
+        now = time.time()
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT INTO upload_spool (idempotency_key, task_id, client_id, member_id, image_path, "
+                    "file_hash, status, attempts, next_attempt_at, last_error, backend_filename, "
+                    "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, task_id, str(client_id), member_id, image_path, image_hash, status, attempts,
+                     now + self._backoff(max(1, attempts)), error, backend_filename, now, now),
+                )
+            except sqlite3.IntegrityError:
+                return False
+            self._db.commit()
+        return True
+
+    def _claim(self, entry_id):
+        with self._db_lock:
+            cursor = self._db.execute(
+                "UPDATE upload_spool SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (UPLOADING, time.time(), entry_id, PENDING),
+            )
+            self._db.commit()
+        return cursor.rowcount == 1
+
+    def _update(self, entry_id, **changes):
+        changes['updated_at'] = time.time()
+        columns = ', '.join(f"{name} = ?" for name in changes)
+        with self._db_lock:
+            self._db.execute(f"UPDATE upload_spool SET {columns} WHERE id = ?",
+                             tuple(changes.values()) + (entry_id,))
+            self._db.commit()
+
+
+_spool = None
+_spool_lock = threading.Lock()
+
+
+def get_upload_spool(upload=None):
+    """Process-wide spool configured from the environment"""
+    global _spool
+    with _spool_lock:
+        if _spool is None:
+            if upload is None:
+                from services.image_service import ImageService
+                upload = ImageService().upload_to_backend
+            _spool = UploadSpool(
+                upload,
+                db_path=os.getenv('UPLOAD_SPOOL_PATH', 'data/upload_spool.sqlite3'),
+                base_delay=float(os.getenv('UPLOAD_RETRY_BASE_DELAY', 30)),
+                max_delay=float(os.getenv('UPLOAD_RETRY_MAX_DELAY', 3600)),
+                max_attempts=int(os.getenv('UPLOAD_RETRY_MAX_ATTEMPTS', 20)),
+            )
+        return _spool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or drain the photo upload spool")
+    parser.add_argument('command', choices=['stats', 'list', 'drain'])
+    parser.add_argument('--status', choices=[PENDING, UPLOADING, UPLOADED, FAILED], help="list: filter by status")
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--failed', action='store_true', help="drain: also retry entries that gave up")
+    args = parser.parse_args()
+
+    spool = get_upload_spool()
+    spool.open()
+    if args.command == 'stats':
+        result = spool.get_stats()
+    elif args.command == 'list':
+        result = spool.list_entries(status=args.status, limit=args.limit)
+    else:
+        result = spool.drain(include_failed=args.failed)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
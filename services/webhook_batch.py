@@ -0,0 +1,34 @@
+import threading
+
+
+class WebhookBatch:
+    """Team members for every distinct sender in one webhook payload.
+
+    The first event that needs a member triggers a single multi-key lookup
+    for all senders in the batch; every other event reuses the result.
+    """
+
+    def __init__(self, team_member_model, phone_numbers):
+        self.team_member_model = team_member_model
+        self.phone_numbers = list(dict.fromkeys(phone_numbers))
+        self._members = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        """Look up all senders in one round trip (only the first call queries)"""
+        with self._lock:
+            if self._members is None and not self._failed:
+                try:
+                    self._members = self.team_member_model.find_by_phones(self.phone_numbers)
+                except Exception as e:
+                    print(f"❌ Batch member lookup failed: {e}")
+                    self._failed = True
+            return self._members
+
+    def get_member(self, phone_number):
+        members = self.resolve()
+        if members is None:
+            # Batch query failed, fall back to a lookup for this sender only
+            return self.team_member_model.find_by_phone(phone_number)
+        return members.get(phone_number)
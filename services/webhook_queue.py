@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from services.sender_dispatcher import SenderDispatcher
+from utils.metrics import Counters
+
+
+class WebhookQueue:
+    """In-process work queue for webhook payloads with an optional SQLite spool.
+
+    The webhook route enqueues the raw payload and returns 200 straight away.
+    ``splitter(payload)`` turns a payload into ``(sender_key, event)`` pairs
+    which are handed to a ``SenderDispatcher``, so events from one sender are
+    handled in order while different senders run in parallel.
+    When ``spool_path`` is set every event is written to SQLite first and
+    only deleted once handled, so anything still queued when the process dies
+    is replayed on the next ``start()``. Event keys starting with ``_`` hold
+    in-memory context only and are not spooled.
+    """
+
+    def __init__(self, handler, splitter=None, num_workers=4, max_size=1000,
+                 spool_path=None, lane_idle_timeout=300):
+        self.handler = handler
+        self.splitter = splitter
+        self.max_size = max(1, int(max_size))
+        self.spool_path = spool_path
+        self.logger = logging.getLogger(__name__)
+
+        self.dispatcher = SenderDispatcher(
+            self._handle_event,
+            num_workers=num_workers,
+            max_pending=self.max_size,
+            idle_timeout=lane_idle_timeout,
+        )
+        self._running = False
+
+        self._spool = None
+        self._spool_lock = threading.Lock()
+
+        self.counters = Counters('enqueued', 'events', 'rejected', 'replayed')
+
+    def start(self):
+        """Open the spool, start the workers and replay leftover events"""
+        if self._running:
+            return
+
+        if self.spool_path:
+            self._open_spool()
+
+        self.dispatcher.start()
+        self._running = True
+
+        if self._spool is not None:
+            self._replay_spool()
+
+        self.logger.info(f"✅ Webhook queue started with {self.dispatcher.num_workers} workers")
+
+    def stop(self, timeout=5):
+        """Stop the workers; spooled events that were not handled are kept"""
+        self._running = False
+        self.dispatcher.stop(timeout=timeout)
+
+        if self._spool is not None:
+            with self._spool_lock:
+                self._spool.close()
+                self._spool = None
+
+    def enqueue(self, payload):
+        """Queue a payload for background handling. Returns the events that were not accepted."""
+        events = self.splitter(payload) if self.splitter else [(None, payload)]
+        return self.enqueue_events(events)
+
+    def enqueue_events(self, events):
+        """Queue ``(sender_key, event)`` pairs already split from a payload.
+
+        Returns the pairs that were not accepted (all of them when stopped or
+        full, an empty list when everything was queued) for the caller to
+        handle inline. Once one event of a sender is refused, that sender's
+        later events are refused too so they stay in order.
+        """
+        if not self._running:
+            return list(events)
+
+        if self.dispatcher.pending + len(events) > self.max_size:
+            self.counters.incr('rejected', len(events))
+            return list(events)
+
+        rejected = []
+        refused_keys = set()
+        for key, event in events:
+            if key is not None and key in refused_keys:
+                rejected.append((key, event))
+                continue
+            spool_id = self._spool_insert(key, event)
+            if not self.dispatcher.submit(key, (spool_id, event)):
+                self._spool_delete(spool_id)
+                refused_keys.add(key)
+                rejected.append((key, event))
+                continue
+            self.counters.incr('events')
+
+        if rejected:
+            self.counters.incr('rejected', len(rejected))
+            self.logger.warning(f"⚠️ Webhook queue refused {len(rejected)} of {len(events)} events")
+        if len(rejected) < len(events):
+            self.counters.incr('enqueued')
+        return rejected
+
+    def get_stats(self):
+        """Queue depth, wait/processing times and worker utilisation"""
+        stats = self.dispatcher.get_stats()
+        stats.update({
+            "running": self._running,
+            "depth": stats["pending"],
+            "max_size": self.max_size,
+            "durable": self._spool is not None,
+            "queue_counters": self.counters.snapshot(),
+        })
+        return stats
+
+    def _handle_event(self, item):
+        spool_id, event = item
+        try:
+            self.handler(event)
+        finally:
+            # Failed events are dropped as well, otherwise a poison
+            # message would be replayed on every restart
+            self._spool_delete(spool_id)
+
+    def _open_spool(self):
+        directory = os.path.dirname(self.spool_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._spool = sqlite3.connect(self.spool_path, check_same_thread=False)
+        self._spool.execute("""
+            CREATE TABLE IF NOT EXISTS webhook_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                lane_key TEXT,
+                payload TEXT NOT NULL
+            )
+        """)
+        self._spool.commit()
+
+    def _replay_spool(self):
+        with self._spool_lock:
+            rows = self._spool.execute(
+                "SELECT id, lane_key, payload FROM webhook_events ORDER BY id"
+            ).fetchall()
+
+        for spool_id, key, payload in rows:
+            try:
+                event = json.loads(payload)
+            except ValueError:
+                self._spool_delete(spool_id)
+                continue
+
+            if not self.dispatcher.submit(key, (spool_id, event)):
+                # Leave the rest on disk for the next start
+                self.logger.warning("Webhook queue full while replaying spool")
+                break
+            self.counters.incr('replayed')
+
+        if rows:
+            self.logger.info(f"🔁 Replayed {self.counters.get('replayed')} spooled webhook events")
+
+    def _spool_insert(self, key, event):
+        if self._spool is None:
+            return None
+        with self._spool_lock:
+            cursor = self._spool.execute(
+                "INSERT INTO webhook_events (lane_key, payload) VALUES (?, ?)",
+                (key, json.dumps({k: v for k, v in event.items() if not k.startswith('_')})),
+            )
+            self._spool.commit()
+            return cursor.lastrowid
+
+    def _spool_delete(self, spool_id):
+        if spool_id is None or self._spool is None:
+            return
+        with self._spool_lock:
+            self._spool.execute("DELETE FROM webhook_events WHERE id = ?", (spool_id,))
+            self._spool.commit()
@@ -1,9 +1,12 @@
-import requests
 import os
 from dotenv import load_dotenv
-from services.language_service import LanguageService
+from services.language_service import get_language_service
+from services.outbound_sender import get_outbound_sender, INTERACTIVE, BULK
+from services.message_catalog import catalog
+from services.payload_templates import templates, field, BUTTONS
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 import logging
-import json
+import threading
 
 
 load_dotenv()
@@ -18,7 +21,11 @@ class WhatsAppService:
         if not all([self.meta_access_token, self.phone_number_id]):
             raise ValueError("Missing Meta environment variables")
             
-        self.language_service = LanguageService()
+        self.language_service = get_language_service()
+        self.outbound = get_outbound_sender()
+        # How long a reply may hold the webhook or lane thread: the old direct HTTP read timeout
+        self.send_timeout = float(os.getenv('OUTBOUND_SEND_TIMEOUT', 20))
+        self._register_templates()
         self.logger = logging.getLogger(__name__)
 
     def _clean_phone_number_for_meta(self, phone_number):
@@ -52,7 +59,7 @@ class WhatsAppService:
         if not tasks:
             return self._get_translated_message("no_tasks", language)
 
-        task_list = self._get_translated_message("task_list_header", language).format(len(tasks))
+        task_list = catalog.format("task_list_header", language, len(tasks))
         
         for i, task in enumerate(tasks):
             task_list += f"*{i + 1}. {task['title']}*\n"
@@ -81,126 +88,7 @@ class WhatsAppService:
 
     def _get_translated_message(self, message_key, language='en'):
         """Get translated message based on key and language"""
-        messages = {
-            'en': {
-                'no_tasks': "You don't have any tasks assigned at the moment. 🎉",
-                'task_list_header': "📋 *Your Tasks ({})*\n\n",
-                'property': "Property",
-                'no_description': "No description",
-                'status': "Status",
-                'type': "Type",
-                'update_instruction': "To update status, reply:\n*status [number] [status]*\nExample: *status 1 completed*",
-                'welcome': "Welcome back {}! 👋\n\nI'm your team management assistant.",
-                'help': "Available commands:\n• *tasks* - List your assigned tasks\n• *status [task-number] [status]* - Update task status",
-                'photo_required': "📸 *Photo Required* \n\nTask requires a completion photo.",
-                'invalid_format': "❌ Invalid format. Please use: *status [task-number] [status]*",
-                'task_completed': "✅ Task completed successfully!",
-                'image_uploaded': "✅ Photo attached successfully!",
-                'no_access': "❌ Sorry, you are not registered in our system.",
-                'invalid_status': "❌ Invalid status. Use: pending, in_progress, or completed",
-                'invalid_task': "❌ Invalid task number.",
-                'no_tasks_photos': "❌ No tasks found that require photos.",
-                'download_error': "❌ Failed to download image.",
-                'thank_you': "Thank you for documenting your work!",
-                'upload_error': "❌ Error processing image.",
-                'no_pending_photos': "✅ No tasks waiting for photos!",
-                'pending_photos_header': "📸 *Tasks Waiting for Photos:*\n\n",
-                'send_photo_instruction': "Simply send a photo now!",
-                'help_full': "Hello {}! I'm your team management assistant.",
-                'unknown_command': "I didn't understand that command.",
-                'status_updated': "📝 Status updated for"
-            },
-            'hi': {
-                'no_tasks': "आपके पास इस समय कोई कार्य नहीं है। 🎉",
-                'task_list_header': "📋 *आपके कार्य ({})*\n\n",
-                'property': "संपत्ति",
-                'no_description': "कोई विवरण नहीं",
-                'status': "स्थिति", 
-                'type': "प्रकार",
-                'update_instruction': "स्थिति अपडेट करने के लिए, जवाब दें:\n*status [संख्या] [स्थिति]*\nउदाहरण: *status 1 completed*",
-                'welcome': "वापसी पर स्वागत है {}! 👋\n\nमैं आपका टीम प्रबंधन सहायक हूं।",
-                'help': "उपलब्ध आदेश:\n• *tasks* - आपके सौंपे गए कार्य देखें\n• *status [कार्य-संख्या] [स्थिति]* - कार्य स्थिति अपडेट करें",
-                'photo_required': "📸 *फोटो आवश्यक* \n\nकार्य को पूरा करने के लिए फोटो की आवश्यकता है।",
-                'invalid_format': "❌ गलत प्रारूप। कृपया उपयोग करें: *status [संख्या] [स्थिति]*",
-                'task_completed': "✅ कार्य सफलतापूर्वक पूरा हुआ!",
-                'image_uploaded': "✅ फोटो सफलतापूर्वक जोड़ा गया!",
-                'no_access': "❌ क्षमा करें, आप हमारे सिस्टम में पंजीकृत नहीं हैं।",
-                'invalid_status': "❌ गलत स्थिति। उपयोग करें: pending, in_progress, या completed",
-                'invalid_task': "❌ गलत कार्य संख्या।",
-                'no_tasks_photos': "❌ फोटो की आवश्यकता वाले कोई कार्य नहीं मिले।",
-                'download_error': "❌ फोटो डाउनलोड करने में विफल।",
-                'thank_you': "आपके काम को दस्तावेज करने के लिए धन्यवाद!",
-                'upload_error': "❌ फोटो प्रोसेस करने में त्रुटि।",
-                'no_pending_photos': "✅ फोटो की प्रतीक्षा में कोई कार्य नहीं!",
-                'pending_photos_header': "📸 *फोटो की प्रतीक्षा में कार्य:*\n\n",
-                'send_photo_instruction': "बस अब एक फोटो भेजें!",
-                'help_full': "नमस्ते {}! मैं आपका टीम प्रबंधन सहायक हूं।",
-                'unknown_command': "मैं उस आदेश को नहीं समझा।",
-                'status_updated': "📝 स्थिति अपडेट की गई"
-            },
-            'es': {
-                'no_tasks': "No tienes tareas asignadas en este momento. 🎉",
-                'task_list_header': "📋 *Tus Tareas ({})*\n\n", 
-                'property': "Propiedad",
-                'no_description': "Sin descripción",
-                'status': "Estado",
-                'type': "Tipo",
-                'update_instruction': "Para actualizar el estado, responde:\n*status [número] [estado]*\nEjemplo: *status 1 completed*",
-                'welcome': "¡Bienvenido de nuevo {}! 👋\n\nSoy tu asistente de gestión de equipo.",
-                'help': "Comandos disponibles:\n• *tasks* - Lista tus tareas asignadas\n• *status [número-tarea] [estado]* - Actualizar estado de tarea", 
-                'photo_required': "📸 *Foto Requerida* \n\nLa tarea requiere una foto de finalización.",
-                'invalid_format': "❌ Formato inválido. Por favor usa: *status [número] [estado]*",
-                'task_completed': "✅ ¡Tarea completada con éxito!",
-                'image_uploaded': "✅ ¡Foto adjuntada con éxito!",
-                'no_access': "❌ Lo siento, no estás registrado en nuestro sistema.",
-                'invalid_status': "❌ Estado inválido. Usa: pending, in_progress, o completed",
-                'invalid_task': "❌ Número de tarea inválido.",
-                'no_tasks_photos': "❌ No se encontraron tareas que requieran fotos.",
-                'download_error': "❌ Error al descargar la imagen.",
-                'thank_you': "¡Gracias por documentar tu trabajo!",
-                'upload_error': "❌ Error al procesar la imagen.",
-                'no_pending_photos': "✅ ¡No hay tareas esperando fotos!",
-                'pending_photos_header': "📸 *Tareas Esperando Fotos:*\n\n",
-                'send_photo_instruction': "¡Simplemente envía una foto ahora!",
-                'help_full': "¡Hola {}! Soy tu asistente de gestión de equipo.",
-                'unknown_command': "No entendí ese comando.",
-                'status_updated': "📝 Estado actualizado para"
-            },
-            'fr': {
-                'no_tasks': "Vous n'avez aucune tâche assignée pour le moment. 🎉",
-                'task_list_header': "📋 *Vos Tâches ({})*\n\n",
-                'property': "Propriété", 
-                'no_description': "Aucune description",
-                'status': "Statut",
-                'type': "Type",
-                'update_instruction': "Pour mettre à jour le statut, répondez:\n*status [numéro] [statut]*\nExemple: *status 1 completed*",
-                'welcome': "Bon retour {}! 👋\n\nJe suis votre assistant de gestion d'équipe.",
-                'help': "Commandes disponibles:\n• *tasks* - Lister vos tâches assignées\n• *status [numéro-tâche] [statut]* - Mettre à jour le statut de la tâche",
-                'photo_required': "📸 *Photo Requise* \n\nLa tâche nécessite une photo d'achèvement.",
-                'invalid_format': "❌ Format invalide. Veuillez utiliser: *status [numéro] [statut]*", 
-                'task_completed': "✅ Tâche terminée avec succès!",
-                'image_uploaded': "✅ Photo attachée avec succès!",
-                'no_access': "❌ Désolé, vous n'êtes pas enregistré dans notre système.",
-                'invalid_status': "❌ Statut invalide. Utilisez: pending, in_progress, ou completed",
-                'invalid_task': "❌ Numéro de tâche invalide.",
-                'no_tasks_photos': "❌ Aucune tâche nécessitant des photos trouvée.",
-                'download_error': "❌ Échec du téléchargement de l'image.",
-                'thank_you': "Merci d'avoir documenté votre travail!",
-                'upload_error': "❌ Erreur de traitement de l'image.",
-                'no_pending_photos': "✅ Aucune tâche n'attend de photos!",
-                'pending_photos_header': "📸 *Tâches en attente de photos:*\n\n",
-                'send_photo_instruction': "Envoyez simplement une photo maintenant!",
-                'help_full': "Bonjour {}! Je suis votre assistant de gestion d'équipe.",
-                'unknown_command': "Je n'ai pas compris cette commande.",
-                'status_updated': "📝 Statut mis à jour pour"
-            }
-        }
-        
-        # Default to English if language not supported
-        if language not in messages:
-            language = 'en'
-            
-        return messages[language].get(message_key, messages['en'].get(message_key, ""))
+        return catalog.get(message_key, language)
 
     @staticmethod
     def get_status_emoji(status):
@@ -225,10 +113,7 @@ class WhatsAppService:
                 self.logger.error(f"Invalid phone number format: {clean_to}")
                 return False
 
-            headers = {
-                'Authorization': f'Bearer {self.meta_access_token}',
-                'Content-Type': 'application/json'
-            }
+            headers = self._headers()
             
             # Build the interactive list structure
             list_sections = []
@@ -271,15 +156,15 @@ class WhatsAppService:
             
             print(f"📋 Sending interactive list with {len(sections)} sections")
             
-            response = requests.post(self.graph_api_url, headers=headers, json=payload)
+            response = self._post(payload, headers)
             
-            print(f"📋 Response Status: {response.status_code}")
+            print(f"📋 Response Status: {self._status(response)}")
             
-            if response.status_code == 200:
+            if self._is_sent(response):
                 self.logger.info("✅ Interactive list sent successfully!")
                 return True
             else:
-                self.logger.error(f"❌ Failed to send interactive list: {response.text}")
+                self.logger.error(f"❌ Failed to send interactive list: {self._error_text(response)}")
                 return False
                 
         except Exception as e:
@@ -300,10 +185,7 @@ class WhatsAppService:
                 self.logger.error(f"Invalid phone number format: {clean_to}")
                 return False
 
-            headers = {
-                'Authorization': f'Bearer {self.meta_access_token}',
-                'Content-Type': 'application/json'
-            }
+            headers = self._headers()
             
             if buttons:
                 # Create interactive button message
@@ -323,21 +205,20 @@ class WhatsAppService:
                     }
                 }
                 
-                # Debug: Print the button structure
-                print(f"🔘 Button structure: {json.dumps(payload['interactive'], indent=2)}")
+                print(f"🔘 Sending {len(buttons)} buttons")
                 
-                response = requests.post(self.graph_api_url, headers=headers, json=payload)
+                response = self._post(payload, headers)
                 
-                print(f"📤 Response Status: {response.status_code}")
-                print(f"📤 Response: {response.text[:200]}")
+                print(f"📤 Response Status: {self._status(response)}")
+                print(f"📤 Response: {self._error_text(response)[:200]}")
                 
-                if response.status_code == 200:
+                if self._is_sent(response):
                     response_data = response.json()
                     message_id = response_data.get('messages', [{}])[0].get('id', 'N/A')
                     self.logger.info(f"✅ Interactive button message sent successfully! Message ID: {message_id}")
                     return True
                 else:
-                    self.logger.error(f"❌ Failed to send interactive button message. Status: {response.status_code}, Error: {response.text}")
+                    self.logger.error(f"❌ Failed to send interactive button message. Status: {self._status(response)}, Error: {self._error_text(response)}")
                     # IMPORTANT: Don't fall back to text message - fix the button issue instead
                     # Check if buttons are properly formatted
                     self._debug_button_format(buttons)
@@ -360,15 +241,15 @@ class WhatsAppService:
                 
                 print(f"📤 Sending text message...")
                 
-                response = requests.post(self.graph_api_url, headers=headers, json=payload)
+                response = self._post(payload, headers)
                 
-                print(f"📤 Response Status: {response.status_code}")
+                print(f"📤 Response Status: {self._status(response)}")
                 
-                if response.status_code == 200:
+                if self._is_sent(response):
                     self.logger.info("✅ Text message sent successfully!")
                     return True
                 else:
-                    self.logger.error(f"❌ Failed to send text message: {response.text}")
+                    self.logger.error(f"❌ Failed to send text message: {self._error_text(response)}")
                     return False
                 
         except Exception as e:
@@ -377,6 +258,110 @@ class WhatsAppService:
             traceback.print_exc()
             return False
 
+    def send_template(self, to, template_name, body, language='en', **fields):
+        """Send a pre-encoded interactive template with the recipient, body and fields spliced in"""
+        try:
+            clean_to = self._clean_phone_number_for_meta(to)
+            
+            if not self._is_valid_phone_number(clean_to):
+                self.logger.error(f"Invalid phone number format: {clean_to}")
+                return False
+            
+            headers = self._headers()
+            payload = templates.render(template_name, language, to=clean_to, body=body, **fields)
+            response = self._post(payload, headers)
+            
+            print(f"📤 Template '{template_name}' Response Status: {self._status(response)}")
+            
+            if self._is_sent(response):
+                self.logger.info(f"✅ Template '{template_name}' sent successfully!")
+                return True
+            
+            self.logger.error(f"❌ Failed to send template '{template_name}': {self._error_text(response)}")
+            if templates.kind(template_name) == BUTTONS:
+                return self._send_fallback_message(clean_to, body, headers, language)
+            return False
+            
+        except Exception as e:
+            self.logger.error(f"❌ Error sending template '{template_name}': {str(e)}")
+            return False
+
+    def _register_templates(self):
+        """Static button sets, encoded once per language by the template registry"""
+        templates.register('welcome_buttons', BUTTONS, lambda language: {
+            "buttons": self._create_welcome_buttons(language)
+        })
+        templates.register('task_action_buttons', BUTTONS, lambda language: {
+            "buttons": self._create_task_action_buttons(language)
+        })
+        templates.register('task_completion_buttons', BUTTONS, lambda language: {
+            "buttons": self._create_task_completion_buttons(field('task_id'), language)
+        })
+        templates.register('task_status_buttons', BUTTONS, lambda language: {
+            "buttons": self._create_task_status_buttons(field('task_id'), language)
+        })
+
+    def queue_message(self, to, message, language='en', lane=BULK):
+        """Queue a plain text message without waiting; returns a Future of bool.
+
+        Defaults to the bulk lane, which yields to interactive replies.
+        """
+        result = Future()
+        clean_to = self._clean_phone_number_for_meta(to)
+        if not self._is_valid_phone_number(clean_to):
+            self.logger.error(f"Invalid phone number format: {clean_to}")
+            result.set_result(False)
+            return result
+        
+        payload = {
+            "messaging_product": "whatsapp",
+            "recipient_type": "individual",
+            "to": clean_to,
+            "type": "text",
+            "text": {
+                "preview_url": False,
+                "body": message
+            }
+        }
+        
+        future = self.outbound.submit(self.phone_number_id, self.graph_api_url, self._headers(), payload, lane)
+        future.add_done_callback(lambda done: result.set_result(self._is_sent(done.result())))
+        return result
+
+    def _headers(self):
+        return {
+            'Authorization': f'Bearer {self.meta_access_token}',
+            'Content-Type': 'application/json'
+        }
+
+    def _post(self, payload, headers):
+        """Send through the rate-limited outbound queue and wait for Meta's answer.
+
+        Blocks the calling thread for at most ``send_timeout`` seconds
+        (OUTBOUND_SEND_TIMEOUT, default 20, the old HTTP read timeout), also
+        while Meta is throttling us. A reply still queued or backing off by
+        then is cancelled and reported as not sent.
+        """
+        future = self.outbound.submit(self.phone_number_id, self.graph_api_url, headers, payload, INTERACTIVE)
+        try:
+            return future.result(timeout=self.send_timeout)
+        except FutureTimeout:
+            future.cancel()
+            self.logger.error(f"❌ No answer from the outbound queue after {self.send_timeout}s")
+            return None
+
+    @staticmethod
+    def _is_sent(response):
+        return response is not None and response.status_code == 200
+
+    @staticmethod
+    def _status(response):
+        return response.status_code if response is not None else 'not sent'
+
+    @staticmethod
+    def _error_text(response):
+        return response.text if response is not None else 'dropped or timed out in the outbound queue'
+
     def _send_fallback_message(self, clean_to, message, headers, language='en'):
         """Send fallback message when interactive buttons fail"""
         try:
@@ -392,13 +377,13 @@ class WhatsAppService:
                 }
             }
             
-            fallback_response = requests.post(self.graph_api_url, headers=headers, json=fallback_payload)
+            fallback_response = self._post(fallback_payload, headers)
             
-            if fallback_response.status_code == 200:
+            if self._is_sent(fallback_response):
                 self.logger.info("✅ Fallback text message sent successfully!")
                 return True
             else:
-                self.logger.error(f"❌ Fallback message also failed: {fallback_response.text}")
+                self.logger.error(f"❌ Fallback message also failed: {self._error_text(fallback_response)}")
                 return False
                 
         except Exception as e:
@@ -490,7 +475,7 @@ class WhatsAppService:
         if not tasks:
             return self._get_translated_message("no_tasks", language), None
 
-        task_list = self._get_translated_message("task_list_header", language).format(len(tasks))
+        task_list = catalog.format("task_list_header", language, len(tasks))
         
         for i, task in enumerate(tasks):
             task_list += f"*{i + 1}. {task['title']}*\n"
@@ -604,3 +589,16 @@ class WhatsAppService:
         })
         
         return buttons    
+
+
+_whatsapp_service = None
+_whatsapp_service_lock = threading.Lock()
+
+
+def get_whatsapp_service():
+    """The WhatsAppService shared by the task and reminder services"""
+    global _whatsapp_service
+    with _whatsapp_service_lock:
+        if _whatsapp_service is None:
+            _whatsapp_service = WhatsAppService()
+        return _whatsapp_service
@@ -0,0 +1,49 @@
+"""Accuracy of the compiled LanguageDetector against the legacy keyword loops.
+
+Both run over the labelled samples of benchmarks.bench_language_detector,
+scored the way the bot uses them: a detection under MIN_CONFIDENCE counts
+as no guess, i.e. English.
+"""
+import pytest
+
+from benchmarks.bench_language_detector import SAMPLES, legacy_detect
+from services.language_detector import LanguageDetector
+
+MIN_CONFIDENCE = 0.6
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return LanguageDetector()
+
+
+def compiled_detect(detector, text):
+    detection = detector.detect(text)
+    return detection.language if detection.confidence >= MIN_CONFIDENCE else None
+
+
+def accuracy(detect):
+    return sum(detect(text) == expected for text, expected in SAMPLES) / len(SAMPLES)
+
+
+def test_compiled_is_no_worse_than_legacy(detector):
+    compiled = accuracy(lambda text: compiled_detect(detector, text))
+    legacy = accuracy(legacy_detect)
+
+    assert compiled >= legacy, f"compiled {compiled:.0%} < legacy {legacy:.0%}"
+    assert compiled >= 0.95
+
+
+@pytest.mark.parametrize('text, expected', [sample for sample in SAMPLES if legacy_detect(sample[0]) == sample[1]])
+def test_compiled_keeps_every_legacy_hit(detector, text, expected):
+    assert compiled_detect(detector, text) == expected
+
+
+@pytest.mark.parametrize('text', ['now done, photo sent', 'I finished the room, no issues', 'status 1 completed'])
+def test_english_is_not_mistaken_for_latin_languages(detector, text):
+    assert compiled_detect(detector, text) is None
+
+
+def test_empty_text(detector):
+    assert detector.detect('').language is None
+    assert detector.detect(None).confidence == 0.0
@@ -0,0 +1,99 @@
+"""Resuming unfinished media jobs after a restart."""
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from services.media_pipeline import DONE, FAILED, MediaPipeline
+
+
+class Stages:
+    def __init__(self):
+        self.downloaded = []
+        self.notified = threading.Event()
+
+    def download(self, job):
+        self.downloaded.append(job['media_id'])
+        return f"/tmp/{job['media_id']}.jpg"
+
+    def upload(self, job):
+        return f"{job['media_id']}.jpg"
+
+    def attach(self, job):
+        return True
+
+    def notify(self, job):
+        self.notified.set()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'media_jobs.sqlite3')
+
+
+def make_pipeline(db_path, stages, **kwargs):
+    return MediaPipeline(stages.download, stages.upload, stages.attach, stages.notify,
+                         num_workers=1, db_path=db_path, **kwargs)
+
+
+def insert_job(db_path, media_id, owner_pid, owner=None, updated_at=None):
+    """Leave an unfinished job behind, as a process that died mid-job would"""
+    pipeline = make_pipeline(db_path, Stages())
+    pipeline._open_db()
+    pipeline._owner = owner
+    job = {'media_id': media_id, 'task_id': 1, 'client_id': 'c1', 'phone_number': '919876543210'}
+    pipeline._insert(job)
+    pipeline._db.execute("UPDATE media_jobs SET owner_pid = ?, updated_at = COALESCE(?, updated_at) WHERE id = ?",
+                         (owner_pid, updated_at, job['id']))
+    pipeline._db.commit()
+    pipeline._db.close()
+
+
+def job_row(db_path, media_id):
+    with sqlite3.connect(db_path) as db:
+        return db.execute("SELECT stage, outcome FROM media_jobs WHERE media_id = ?", (media_id,)).fetchone()
+
+
+def test_restart_with_same_pid_resumes_its_jobs(db_path):
+    # A container restart usually hands the bot the same pid again
+    insert_job(db_path, 'media-1', os.getpid(), owner=f"{os.getpid()}:earlier-run")
+    stages = Stages()
+    pipeline = make_pipeline(db_path, stages)
+
+    pipeline.start()
+    try:
+        assert stages.notified.wait(5)
+    finally:
+        pipeline.stop()
+
+    assert stages.downloaded == ['media-1']
+    assert job_row(db_path, 'media-1') == (DONE, 'uploaded')
+
+
+def test_job_owned_by_another_live_process_is_left_alone(db_path):
+    insert_job(db_path, 'media-2', os.getppid(), owner=f"{os.getppid()}:other")
+    stages = Stages()
+    pipeline = make_pipeline(db_path, stages)
+
+    pipeline.start()
+    time.sleep(0.2)
+    pipeline.stop()
+
+    assert stages.downloaded == []
+    assert pipeline.counters.get('resumed') == 0
+
+
+def test_stale_job_is_expired_instead_of_resumed(db_path):
+    insert_job(db_path, 'media-3', os.getppid(), updated_at=time.time() - 7200)
+    stages = Stages()
+    pipeline = make_pipeline(db_path, stages, max_job_age=3600)
+
+    pipeline.start()
+    time.sleep(0.2)
+    pipeline.stop()
+
+    assert stages.downloaded == []
+    assert job_row(db_path, 'media-3') == (FAILED, 'expired')
+    assert pipeline.counters.get('expired') == 1
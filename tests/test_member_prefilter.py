@@ -0,0 +1,119 @@
+"""A member added after the Bloom prefilter was built."""
+from contextlib import contextmanager
+
+import pytest
+
+import models.member_prefilter
+import models.team_member
+from models.member_cache import get_member_cache
+from models.member_prefilter import MemberPrefilter
+from models.team_member import TeamMember
+
+EXISTING = '919876543210'
+NEW = '918765432109'
+
+
+def member_row(member_id, phone):
+    return {
+        'id': member_id, 'client_id': 3, 'name': f"Member {member_id}", 'role': 'staff', 'phone': phone,
+        'status': 'active', 'preferred_language': 'en', 'last_selected_property_id': None,
+        'notification_preferences': None, 'settings_updated_at': None,
+    }
+
+
+class FakeTable:
+    """Active team_members rows, answering the prefilter and lookup queries"""
+
+    def __init__(self, *phones):
+        self.rows = [member_row(i + 1, phone) for i, phone in enumerate(phones)]
+        self.lookups = 0
+
+    def add(self, phone):
+        self.rows.append(member_row(len(self.rows) + 1, phone))
+
+    def execute(self, query, params):
+        query = ' '.join(query.split())
+        if query.startswith('SELECT COUNT(*)'):
+            return [(len(self.rows), max(row['id'] for row in self.rows), hash(tuple(row['phone'] for row in self.rows)))]
+        if query.startswith('SELECT phone FROM'):
+            return [(row['phone'],) for row in self.rows]
+        if 'WHERE phone_key = %s' in query:
+            self.lookups += 1
+            return [dict(row) for row in self.rows if row['phone'].endswith(params[0])]
+        raise AssertionError(f"unexpected query: {query}")
+
+
+class FakeCursor:
+    def __init__(self, table):
+        self.table = table
+        self.rows = []
+
+    def execute(self, query, params=None):
+        self.rows = self.table.execute(query, params)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, table):
+        self.table = table
+
+    @contextmanager
+    def connection(self):
+        class Connection:
+            def cursor(_, *args, **kwargs):
+                return FakeCursor(self.table)
+        yield Connection()
+
+
+@pytest.fixture
+def table(monkeypatch):
+    monkeypatch.setenv('MEMBER_PREFILTER_ENABLED', 'false')
+    monkeypatch.setenv('MEMBER_CACHE_WATERMARK_INTERVAL', '0')
+    table = FakeTable(EXISTING)
+    pool = FakePool(table)
+    monkeypatch.setattr(models.team_member, 'get_pool', lambda db_config: pool)
+    monkeypatch.setattr(models.member_prefilter, 'get_pool', lambda db_config: pool)
+    get_member_cache().clear()
+    yield table
+    get_member_cache().clear()
+
+
+@pytest.fixture
+def model(table):
+    model = TeamMember({'host': 'test'})
+    model.prefilter = MemberPrefilter({'host': 'test'}, cache=get_member_cache())
+    model.prefilter.refresh()
+    return model
+
+
+def test_stranger_is_rejected_without_a_query(model, table):
+    assert model.find_by_phone(f"whatsapp:{NEW}") is None
+    assert table.lookups == 0
+
+
+def test_new_member_is_found_after_the_next_refresh(model, table):
+    # Rejected by the prefilter and remembered in the negative cache
+    assert model.find_by_phone(f"whatsapp:{NEW}") is None
+
+    table.add(NEW)
+    assert model.prefilter.refresh()
+
+    member = model.find_by_phone(f"whatsapp:{NEW}")
+    assert member is not None and member['phone'] == NEW
+    assert table.lookups == 1
+
+
+def test_unchanged_table_keeps_negative_entries(model, table):
+    assert model.find_by_phone(f"whatsapp:{NEW}") is None
+
+    assert not model.prefilter.refresh()
+
+    assert get_member_cache().is_missing(NEW[-10:])
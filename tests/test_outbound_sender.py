@@ -0,0 +1,87 @@
+"""OutboundSender delivery, cancellation and shutdown."""
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+from services.outbound_sender import BULK, INTERACTIVE, OutboundSender
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = ''
+
+
+class FakeGraph:
+    """Records posts; answers 429 while ``throttled`` is set"""
+
+    def __init__(self):
+        self.posts = []
+        self.throttled = False
+        self.lock = threading.Lock()
+
+    def post(self, url, endpoint=None, headers=None, json=None, data=None):
+        with self.lock:
+            self.posts.append(json if json is not None else data)
+        return FakeResponse(429 if self.throttled else 200)
+
+
+@pytest.fixture
+def graph():
+    return FakeGraph()
+
+
+@pytest.fixture
+def sender(graph):
+    sender = OutboundSender(num_workers=2, reserved_workers=1, max_retries=3, backoff_base=0.05, backoff_max=0.05)
+    sender.http = graph
+    yield sender
+    sender.stop()
+
+
+def test_reply_is_sent(sender, graph):
+    sender.start()
+
+    response = sender.submit('phone-1', 'url', {}, {'n': 1}).result(timeout=2)
+
+    assert response.status_code == 200
+    assert graph.posts == [{'n': 1}]
+
+
+def test_cancelled_reply_is_not_sent_late(sender, graph):
+    # Queued while no worker runs, as when the lanes are backed up
+    future = sender.submit('phone-1', 'url', {}, {'n': 1}, INTERACTIVE)
+    assert future.cancel()
+
+    sender.start()
+    assert sender.submit('phone-1', 'url', {}, {'n': 2}).result(timeout=2).status_code == 200
+
+    assert graph.posts == [{'n': 2}]
+    assert sender.counters.get('abandoned') == 1
+
+
+def test_stop_resolves_queued_and_retrying_messages(sender, graph):
+    graph.throttled = True
+    sender.backoff_base = sender.backoff_max = 60
+    sender.start()
+    retrying = sender.submit('phone-1', 'url', {}, {'n': 1}, INTERACTIVE)
+    while not sender.get_stats()['retrying']:
+        threading.Event().wait(0.01)
+
+    queued = [sender.submit('phone-1', 'url', {}, {'n': i}, BULK) for i in range(2, 5)]
+    sender.stop()
+
+    done, not_done = wait([retrying] + queued, timeout=2)
+    assert not not_done
+    assert all(future.result() is None or future.result().status_code == 429 for future in done)
+    assert sender.get_stats()['retrying'] == 0
+    assert sender.get_stats()['lanes'][BULK]['depth'] == 0
+
+
+def test_submit_after_stop_resolves_at_once(sender):
+    sender.start()
+    sender.stop()
+
+    assert sender.submit('phone-1', 'url', {}, {'n': 1}).result(timeout=1) is None
@@ -0,0 +1,172 @@
+"""Database round trips per WhatsApp command.
+
+TaskService runs against a fake pool whose cursors record every
+execute(), so each test pins how many queries a command costs and that the
+sender is looked up in team_members at most once per message.
+"""
+import re
+from contextlib import contextmanager
+
+import pytest
+
+import models.task
+import models.team_member
+import services.task_service
+from models.member_cache import get_member_cache
+from services.request_context import RequestContext
+
+PHONE = '919876543210'
+
+MEMBER = {
+    'id': 7, 'client_id': 3, 'name': 'Asha', 'role': 'staff', 'phone': PHONE, 'status': 'active',
+    'preferred_language': 'en', 'last_selected_property_id': None,
+    'notification_preferences': None, 'settings_updated_at': None,
+}
+
+MEMBER_LOOKUP = re.compile(r'FROM team_members\s+WHERE')
+
+
+class FakeCursor:
+    def __init__(self, queries):
+        self.queries = queries
+        self.rows = []
+        self.lastrowid = 1
+        self.rowcount = 1
+
+    def execute(self, query, params=None):
+        query = ' '.join(query.split())
+        self.queries.append(query)
+        self.rows = [dict(MEMBER)] if MEMBER_LOOKUP.search(query) else []
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, queries):
+        self.queries = queries
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self.queries)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self):
+        self.queries = []
+
+    def get_connection(self):
+        return FakeConnection(self.queries)
+
+    @contextmanager
+    def connection(self):
+        yield FakeConnection(self.queries)
+
+    def member_lookups(self):
+        return sum(1 for query in self.queries if MEMBER_LOOKUP.search(query) and query.startswith('SELECT'))
+
+
+class FakeWhatsApp:
+    def __init__(self):
+        self.sent = []
+
+    def _get_translated_message(self, message_key, language='en'):
+        return message_key
+
+    def format_task_list(self, tasks, language='en'):
+        return 'tasks'
+
+    @staticmethod
+    def get_status_emoji(status):
+        return '•'
+
+    def send_message(self, *args, **kwargs):
+        self.sent.append(args)
+        return True
+
+    send_template = send_message
+    send_interactive_list = send_message
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    monkeypatch.setenv('MEMBER_PREFILTER_ENABLED', 'false')
+    monkeypatch.setenv('MEMBER_CACHE_WATERMARK_INTERVAL', '0')
+    monkeypatch.chdir(tmp_path)
+
+    fake = FakePool()
+    monkeypatch.setattr(models.team_member, 'get_pool', lambda db_config: fake)
+    monkeypatch.setattr(models.task, 'get_pool', lambda db_config: fake)
+    return fake
+
+
+@pytest.fixture
+def task_service(pool, monkeypatch):
+    whatsapp = FakeWhatsApp()
+    monkeypatch.setattr(services.task_service, 'get_whatsapp_service', lambda: whatsapp)
+    return services.task_service.TaskService({'host': 'test'})
+
+
+def run_command(task_service, pool, message, context=None):
+    get_member_cache().clear()
+    pool.queries.clear()
+    task_service.whatsapp_service.sent.clear()
+    task_service.handle_message(f"whatsapp:{PHONE}", message, None, context=context)
+    assert task_service.whatsapp_service.sent, f"{message!r} sent no reply"
+    return list(pool.queries)
+
+
+# Queries per command, the sender lookup included
+COMMAND_QUERIES = {
+    'hello': 1,
+    '📋 Tasks': 2,
+    '📷 Photos': 2,
+    '⚙️ Settings': 1,
+    '❓ Help': 1,
+    '🏠 Main Menu': 1,
+    '🏠 Select Property': 2,
+    '✅ Mark Complete': 2,
+    'btn_tasks': 2,
+}
+
+
+@pytest.mark.parametrize('message, expected', COMMAND_QUERIES.items())
+def test_command_query_count(task_service, pool, message, expected):
+    queries = run_command(task_service, pool, message)
+
+    assert pool.member_lookups() == 1, queries
+    assert len(queries) == expected, queries
+
+
+@pytest.mark.parametrize('message, expected', COMMAND_QUERIES.items())
+def test_context_from_webhook_skips_member_lookup(task_service, pool, message, expected):
+    context = RequestContext(PHONE, dict(MEMBER))
+    queries = run_command(task_service, pool, message, context=context)
+
+    assert pool.member_lookups() == 0, queries
+    assert len(queries) == expected - 1, queries
+
+
+def test_language_change_writes_once_without_lookup(task_service, pool):
+    context = RequestContext(PHONE, dict(MEMBER))
+    pool.queries.clear()
+
+    task_service.save_language_preference(f"whatsapp:{PHONE}", 'hi', 'Hindi', context=context)
+
+    assert pool.member_lookups() == 0, pool.queries
+    assert [query.split()[0] for query in pool.queries] == ['UPDATE'], pool.queries
+    assert context.preferred_language == 'hi'
@@ -0,0 +1,130 @@
+"""HedgedTranslator outcomes and provider ranking."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.http_client import HttpClient
+from services.translation_providers import GoogleProvider, HedgedTranslator
+
+
+class EchoProvider:
+    """Answers with the input unchanged, as Google does for names and numbers"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    def translate(self, text, source_language, target_language, timeout):
+        self.calls += 1
+        return text
+
+
+class EmptyProvider(EchoProvider):
+    def translate(self, text, source_language, target_language, timeout):
+        self.calls += 1
+        return ''
+
+
+@pytest.fixture
+def translator():
+    translators = []
+
+    def make(*providers):
+        translators.append(HedgedTranslator(providers, deadline=2.0, hedge_delay=0.5))
+        return translators[-1]
+
+    yield make
+    for translator in translators:
+        translator.shutdown()
+
+
+@pytest.mark.parametrize('text', ['OK', 'Asha', '42', 'WiFi'])
+def test_identical_translation_is_a_success(translator, text):
+    echo = EchoProvider('echo')
+    hedged = translator(echo)
+
+    assert hedged.translate(text, 'en', 'hi') == text
+
+    stats = hedged.get_stats()
+    assert stats['providers']['echo']['counters']['successes'] == 1
+    assert stats['providers']['echo']['counters']['failures'] == 0
+    assert stats['counters']['all_failed'] == 0
+
+
+def test_empty_answer_is_a_failure(translator):
+    empty, echo = EmptyProvider('empty'), EchoProvider('echo')
+    hedged = translator(empty, echo)
+
+    assert hedged.translate('OK', 'en', 'hi') == 'OK'
+    assert hedged.get_stats()['providers']['empty']['counters']['failures'] == 1
+    assert hedged.ranked()[0] is echo
+
+
+def test_same_language_skips_the_providers(translator):
+    echo = EchoProvider('echo')
+    hedged = translator(echo)
+
+    assert hedged.translate('hello', 'en', 'en') == 'hello'
+    assert echo.calls == 0
+
+
+def start_server(handle):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            handle(self)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def google():
+    servers = []
+
+    def make(handle):
+        server = start_server(handle)
+        servers.append(server)
+        provider = GoogleProvider(http=HttpClient('google-test'))
+        provider.URL = f"http://127.0.0.1:{server.server_address[1]}/m"
+        return provider
+
+    yield make
+    for server in servers:
+        server.shutdown()
+
+
+def test_google_reads_the_result_container(google):
+    def handle(request):
+        assert 'tl=zh-CN' in request.path
+        body = '<html><div class="result-container">Tom &amp; Jerry</div></html>'.encode()
+        request.send_response(200)
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    assert google(handle).translate('Tom & Jerry', 'en', 'zh', timeout=2) == 'Tom & Jerry'
+
+
+def test_hung_google_call_ends_at_the_deadline(google, translator):
+    release = threading.Event()
+    provider = google(lambda request: release.wait(10))
+    hedged = translator(provider)
+
+    started = time.monotonic()
+    try:
+        for _ in range(3):
+            assert hedged.translate('hello', 'en', 'hi', deadline=0.3) is None
+        # The attempts themselves time out, so no executor thread stays stuck
+        hedged._executor.shutdown(wait=True)
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 3
+    assert hedged.get_stats()['providers']['google']['counters']['failures'] == 3
@@ -0,0 +1,69 @@
+"""Resending a photo whose spooled upload was given up on."""
+import pytest
+
+from services.upload_spool import FAILED, PENDING, UPLOADED, UploadSpool, file_hash, idempotency_key
+
+
+class Backend:
+    def __init__(self):
+        self.up = False
+        self.calls = 0
+
+    def upload(self, image_path, task_id, client_id, idempotency_key=None):
+        self.calls += 1
+        return f"backend-{task_id}.jpg" if self.up else None
+
+
+@pytest.fixture
+def photo(tmp_path):
+    path = tmp_path / 'photo.jpg'
+    path.write_bytes(b'jpeg bytes')
+    return str(path)
+
+
+@pytest.fixture
+def backend():
+    return Backend()
+
+
+@pytest.fixture
+def spool(tmp_path, backend):
+    spool = UploadSpool(backend.upload, db_path=str(tmp_path / 'spool.sqlite3'), base_delay=0, max_attempts=2)
+    spool.open()
+    return spool
+
+
+def give_up(spool, photo):
+    """Submit while the backend is down and retry until the spool marks the entry failed"""
+    assert spool.submit(photo, 5, 'c1') is None
+    while spool.list_entries(status=PENDING):
+        spool.drain()
+    [entry] = spool.list_entries()
+    assert entry['status'] == FAILED
+    return entry
+
+
+def test_resend_after_max_attempts_uploads_when_backend_is_back(spool, backend, photo):
+    give_up(spool, photo)
+    backend.up = True
+
+    assert spool.submit(photo, 5, 'c1') == 'backend-5.jpg'
+    assert spool.list_entries()[0]['status'] == UPLOADED
+    assert spool.counters.get('requeued') == 1
+
+
+def test_resend_after_max_attempts_is_queued_again(spool, backend, photo):
+    give_up(spool, photo)
+
+    assert spool.submit(photo, 5, 'c1') is None
+
+    [entry] = spool.list_entries()
+    assert entry['status'] == PENDING
+    assert spool.is_queued(5, file_hash(photo))
+
+
+def test_failed_entry_is_not_reported_as_queued(spool, photo):
+    give_up(spool, photo)
+
+    assert not spool.is_queued(5, file_hash(photo))
+    assert spool.list_entries()[0]['idempotency_key'] == idempotency_key(5, file_hash(photo))
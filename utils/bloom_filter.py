@@ -0,0 +1,36 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Compact set membership test with no false negatives.
+
+    ``key in bloom`` is always True for keys that were added and False for
+    most others, with roughly ``error_rate`` false positives at ``capacity``.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(1, int(capacity))
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: two 64-bit halves of one digest give every position
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def size_bytes(self):
+        return len(self.bits)
@@ -15,4 +15,15 @@ def format_datetime(dt):
 
 def get_env_variable(key, default=None):
     """Get environment variable with fallback"""
-    return os.getenv(key, default)
\ No newline at end of file
+    return os.getenv(key, default)
+
+def normalize_phone_key(phone_number):
+    """Canonical lookup key for a phone number: its last 10 digits.
+
+    Matches the generated team_members.phone_key column, so '917667130178',
+    '+91 76671 30178' and '07667130178' all resolve to '7667130178'.
+    """
+    if not phone_number:
+        return ""
+    digits = ''.join(filter(str.isdigit, phone_number.replace('whatsapp:', '')))
+    return digits[-10:]
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import deque
+
+
+class LatencyStats:
+    """Thread-safe latency recorder keeping a rolling window of samples"""
+
+    BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self, window=1024):
+        self._samples = deque(maxlen=window)
+        self._buckets = [0] * (len(self.BUCKETS_MS) + 1)
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """Record one duration in seconds"""
+        ms = seconds * 1000.0
+        with self._lock:
+            self._samples.append(ms)
+            self._count += 1
+            self._total += ms
+            if ms > self._max:
+                self._max = ms
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if ms <= bound:
+                    self._buckets[i] += 1
+                    break
+            else:
+                self._buckets[-1] += 1
+
+    def time(self):
+        """Context manager recording the duration of the wrapped block"""
+        return _Timer(self)
+
+    def snapshot(self):
+        """Return count, mean, percentiles and bucket counts in milliseconds"""
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self._count
+            total = self._total
+            max_ms = self._max
+            buckets = list(self._buckets)
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            index = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+            return round(samples[index], 2)
+
+        labels = [f"le_{bound}ms" for bound in self.BUCKETS_MS] + ["inf"]
+        return {
+            "count": count,
+            "mean_ms": round(total / count, 2) if count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(max_ms, 2),
+            "buckets": dict(zip(labels, buckets)),
+        }
+
+
+class _Timer:
+    def __init__(self, stats):
+        self.stats = stats
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats.record(time.perf_counter() - self.started)
+        return False
+
+
+class Counters:
+    """Thread-safe named counters"""
+
+    def __init__(self, *names):
+        self._values = {name: 0 for name in names}
+        self._lock = threading.Lock()
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name):
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)